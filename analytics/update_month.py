@@ -1,5 +1,11 @@
 import sqlite3
 import pandas as pd
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'final', 'src'))
+from date_keys import date_strings
+from db_session import bump_generation
 
 def normalize_date_column_interactive(db_path):
     # Get input from user
@@ -16,13 +22,16 @@ def normalize_date_column_interactive(db_path):
         if date_column not in df.columns:
             raise ValueError(f"Column '{date_column}' not found in table '{table_name}'.")
 
-        # Normalize the date column
-        df[date_column] = pd.to_datetime(df[date_column], errors='coerce').dt.strftime('%Y-%m-%d')
-
-        # Drop rows with invalid dates (optional)
+        # Drop rows without a date
         df = df.dropna(subset=[date_column])
 
-        # Save updated table back
+        # Normalize the date column; values in another or an ambiguous format
+        # raise instead of being dropped
+        df[date_column] = date_strings(df[date_column], 'day')
+
+        # Save updated table back; the generation bump commits with it and
+        # invalidates cached query results
+        bump_generation(conn)
         df.to_sql(table_name, conn, if_exists="replace", index=False)
 
         print(f"\n✅ Successfully updated '{table_name}'. '{date_column}' is now in 'YYYY-MM-DD' format.")
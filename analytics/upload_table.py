@@ -1,6 +1,11 @@
 import sqlite3
 import pandas as pd
 import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'final', 'src'))
+from date_keys import date_strings
+from db_session import bump_generation
 
 # === CONFIGURABLE INPUTS ===
 csv_file = input("Enter full path to your CSV file: ").strip()
@@ -26,8 +31,8 @@ try:
         # except:
         #     # If parsing fails, keep the original format
         #     pass
-        df["month"] = pd.to_datetime(df["month"], format="%B-%Y")
-        df["month"] = df["month"].dt.strftime("%Y-%m-%d")
+        # Format is detected once ('%B-%Y', ISO, ...); mixed formats raise
+        df["month"] = date_strings(df["month"], "month")
         
     # Convert spend to float and calculate sum
     if "spend" in df.columns:
@@ -43,6 +48,8 @@ except Exception as e:
 conn = sqlite3.connect(db_name)
 
 # === SAVE TO SQLITE ===
+# The generation bump commits with the data and invalidates cached query results
+bump_generation(conn)
 df.to_sql(table_name, conn, if_exists="append", index=False)
 
 # === CLOSE CONNECTION ===
@@ -1,7 +1,12 @@
+import os
+import sys
 import pandas as pd
 import numpy as np
 from datetime import datetime
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'final', 'src'))
+from account_ids import normalize_account_ids
+
 # Read the CSV file
 df = pd.read_csv('AOP_24-25_final.csv')
 
@@ -53,17 +58,8 @@ for _, row in df.iterrows():
 # Convert the list of dictionaries to a DataFrame
 transformed_df = pd.DataFrame(transformed_data)
 
-# Convert account_id to string and handle padding for numerical IDs
-def pad_account_id(account_id):
-    if pd.isna(account_id):
-        return account_id
-    account_str = str(account_id)
-    if account_str.isdigit():
-        return account_str.zfill(12)  # Pad with zeros to length 12
-    return account_str
-
-# Apply padding only to numerical account_ids
-transformed_df['account_id'] = transformed_df['account_id'].apply(pad_account_id)
+# Convert account_id to string and pad numerical IDs to 12 digits
+transformed_df['account_id'] = normalize_account_ids(transformed_df['account_id'])
 
 # Show processing summary
 print("\nProcessing Summary:")
@@ -1,7 +1,12 @@
+import os
+import sys
 import pandas as pd
 import numpy as np
 from datetime import datetime
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'final', 'src'))
+from account_ids import normalize_account_ids, is_account_id
+
 # Read the CSV file
 df = pd.read_csv('AOP_25-26.csv')
 
@@ -67,19 +72,10 @@ for _, row in df.iterrows():
 # Convert the list of dictionaries to a DataFrame
 transformed_df = pd.DataFrame(transformed_data)
 
-# Drop rows with null values in account_id
-transformed_df = transformed_df.dropna(subset=['account_id'])
-
-# Identify and drop non-numerical account_ids
-numerical_accounts = transformed_df['account_id'].astype(str).str.match(r'^\d+$')
-transformed_df = transformed_df[numerical_accounts]
-
-# Find the maximum length of numerical account_ids
-max_length = transformed_df['account_id'].astype(str).str.len().max()
-print(f"\nMaximum numerical account_id length: {max_length}")
-
-# Pad account_ids with leading zeros
-transformed_df['account_id'] = transformed_df['account_id'].astype(str).str.zfill(max_length)
+# Normalize account_ids (strip, remove trailing .0, pad to 12 digits), then
+# drop null and non-numerical ones
+transformed_df['account_id'] = normalize_account_ids(transformed_df['account_id'])
+transformed_df = transformed_df[is_account_id(transformed_df['account_id'])]
 
 # Show processing summary
 print("\nProcessing Summary:")
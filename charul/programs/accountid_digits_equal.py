@@ -1,37 +1,26 @@
 import pandas as pd
 import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'final', 'src'))
+from account_ids import normalize_account_ids, is_account_id, ACCOUNT_ID_LENGTH
 
 def process_account_ids(input_file, output_file):
     # Read the CSV file
     df = pd.read_csv(input_file)
     
-    # Find maximum length of account IDs
-    max_length = 0
-    for account_id in df['account_id']:
-        # Convert to string first to get length
-        str_id = str(account_id)
-        if str_id.isdigit():  # Check if it's all digits
-            length = len(str_id)
-            max_length = max(max_length, length)
-    
-    # Process each account_id and collect summary information
-    processed_ids = []
-    padded_ids = []  # Store account_ids that were padded
-    for account_id in df['account_id']:
-        str_id = str(account_id)
-        if str_id.isdigit():  # Check if it's all digits
-            original_length = len(str_id)
-            if original_length < max_length:
-                padded_ids.append({
-                    'original_id': str_id,
-                    'original_length': original_length,
-                    'new_length': max_length
-                })
-            # Convert back to string with leading zeros if needed
-            processed_id = str_id.zfill(max_length)
-        else:
-            processed_id = account_id
-        processed_ids.append(processed_id)
+    # Every numerical account ID is padded to the same 12 digits
+    max_length = ACCOUNT_ID_LENGTH
+    
+    # Normalize all account_ids at once and collect the ones that were padded
+    original_ids = df['account_id'].astype(str).str.strip().str.replace(r'\.0$', '', regex=True)
+    processed_ids = normalize_account_ids(df['account_id'])
+    padded = is_account_id(processed_ids) & (original_ids.str.len() < max_length)
+    padded_ids = [{
+        'original_id': original_id,
+        'original_length': len(original_id),
+        'new_length': max_length
+    } for original_id in original_ids[padded]]
     
     # Update the DataFrame
     df['account_id'] = processed_ids
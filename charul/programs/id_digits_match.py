@@ -1,5 +1,9 @@
 import pandas as pd
 import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'final', 'src'))
+from account_ids import normalize_account_ids, is_account_id, ACCOUNT_ID_LENGTH
 
 def process_id_columns(input_file, output_file):
     # Read the CSV file
@@ -24,8 +28,22 @@ def process_id_columns(input_file, output_file):
     
     all_padded_ids = {}  # Store padded IDs for each column
     
-    # Process each column with its own max length
+    # Account IDs always use the shared 12-digit normalizer
+    if 'account_id' in existing_columns:
+        max_lengths['account_id'] = ACCOUNT_ID_LENGTH
+        original_ids = df['account_id'].astype(str).str.strip()
+        df['account_id'] = normalize_account_ids(df['account_id'])
+        padded = is_account_id(df['account_id']) & (original_ids.str.len() < ACCOUNT_ID_LENGTH)
+        all_padded_ids['account_id'] = [{
+            'original_id': original_id,
+            'original_length': len(original_id),
+            'new_length': ACCOUNT_ID_LENGTH
+        } for original_id in original_ids[padded]]
+    
+    # Process each other column with its own max length
     for column in existing_columns:
+        if column == 'account_id':
+            continue
         processed_ids = []
         padded_ids = []  # Store account_ids that were padded
         column_max_length = max_lengths[column]
@@ -1,6 +1,9 @@
 import pandas as pd
 import numpy as np
 import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'final', 'src'))
+from account_ids import normalize_account_ids
 
 # Paths
 INPUT_FILE = '../data_files/DailyServiceWiseCost26to2may.csv'
@@ -52,9 +55,9 @@ def main():
     #         return d
     # df_long['day'] = df_long['day'].apply(fix_day_format)
 
-    # Normalize account_id to string and remove trailing .0 if present
-    df_long['account_id'] = df_long['account_id'].astype(str).str.strip().str.replace(r'\.0$', '', regex=True)
-    df_filtered[id_col] = df_filtered[id_col].astype(str).str.strip().str.replace(r'\.0$', '', regex=True)
+    # Normalize account_id: strip, remove trailing .0 and pad to 12 digits
+    df_long['account_id'] = normalize_account_ids(df_long['account_id'])
+    df_filtered[id_col] = normalize_account_ids(df_filtered[id_col])
 
     # Create a dictionary for mapping
     service_name_mapping = dict(zip(mapping_df['service_name'], mapping_df['new_service_name']))
@@ -103,13 +106,6 @@ def main():
     if not mismatch:
         print("All account totals match.")
 
-     # Find the maximum length of numerical account_ids
-    max_length = df_long['account_id'].astype(str).str.len().max()
-    print(f"\nMaximum numerical account_id length: {max_length}")
-
-    # Pad account_ids with leading zeros
-    df_long['account_id'] = df_long['account_id'].astype(str).str.zfill(max_length)
-
     # Show processing summary
     print("\nProcessing Summary:")
     print("\nSample of processed account_ids (showing first 20):")
@@ -0,0 +1,73 @@
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from account_ids import normalize_account_ids
+
+def build_account_ids(n_rows, n_accounts=2000, seed=0):
+    """
+    Raw account IDs as they reach the transforms: 12-digit strings, IDs that
+    lost their leading zeros, '.0' float artifacts, No_AC_ID placeholders and blanks.
+    """
+    rng = np.random.default_rng(seed)
+    ids = rng.choice(10 ** 12, size=n_accounts, replace=False)
+    variants = np.array(
+        [f"{i:012d}" for i in ids[:n_accounts // 2]]
+        + [str(i % 10 ** 10) for i in ids[n_accounts // 2:n_accounts * 3 // 4]]
+        + [f"{i}.0" for i in ids[n_accounts * 3 // 4:n_accounts - 20]]
+        + [f"No_AC_ID_{i}" for i in range(10)]
+        + [' ', ''] * 5,
+        dtype=object
+    )
+    return pd.Series(variants[rng.integers(0, len(variants), n_rows)])
+
+def spend_process_account_id(acc_id):
+    """The previous transform_spend per-element normalizer, kept here as a baseline."""
+    if pd.isna(acc_id):
+        return None
+    acc_id = str(acc_id).strip()
+    numeric_id = ''.join(filter(str.isdigit, acc_id))
+    if numeric_id and numeric_id.isdigit():
+        return numeric_id.zfill(12)
+    return acc_id
+
+def aop_normalize_account_id(account_id):
+    """The previous transform_aop per-element normalizer, kept here as a baseline."""
+    if pd.isna(account_id) or account_id == '':
+        return None
+    account_id = str(account_id).strip()
+    if account_id.startswith('No_AC_ID') or not account_id.isdigit():
+        return account_id
+    return account_id.zfill(12)
+
+def time_call(func, values):
+    """Run func and return (seconds, result)."""
+    start = time.perf_counter()
+    result = func(values)
+    return time.perf_counter() - start, result
+
+def main(n_rows=1000000):
+    values = build_account_ids(n_rows)
+    print(f"Account IDs: {n_rows} rows, {values.nunique()} distinct values")
+
+    spend_time, spend_ids = time_call(lambda s: s.apply(spend_process_account_id), values)
+    aop_time, aop_ids = time_call(lambda s: s.apply(aop_normalize_account_id), values)
+    vector_time, normalized = time_call(normalize_account_ids, values)
+
+    # Outside the known bugs of the old applies the results are identical
+    clean = values.str.fullmatch(r'\s*\d+\s*')
+    pd.testing.assert_series_equal(normalized[clean], aop_ids[clean], check_names=False, check_dtype=False)
+    pd.testing.assert_series_equal(normalized[clean], spend_ids[clean], check_names=False, check_dtype=False)
+    spend_diff = (normalized.fillna('') != spend_ids.fillna('')).sum()
+    aop_diff = (normalized.fillna('') != aop_ids.fillna('')).sum()
+
+    print(f"- transform_spend apply: {spend_time:.3f}s ({spend_diff} rows differ: No_AC_ID digits, '.0' and blanks)")
+    print(f"- transform_aop apply:   {aop_time:.3f}s ({aop_diff} rows differ: '.0' artifacts, blanks)")
+    print(f"- vectorized:            {vector_time:.3f}s")
+    print(f"- speedup:               {min(spend_time, aop_time) / vector_time:.1f}x")
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:2]])
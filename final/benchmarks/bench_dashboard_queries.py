@@ -0,0 +1,124 @@
+import os
+import sys
+import time
+import sqlite3
+import tempfile
+import statistics
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from create_db import bootstrap_db
+
+# The original UNIQUE-only layout, used as the "before" schema
+BASELINE_SCHEMA = """
+CREATE TABLE account_details (account_id TEXT PRIMARY KEY, account_name TEXT, hod_id TEXT, entity TEXT);
+CREATE TABLE hod_details (hod_id TEXT PRIMARY KEY, hod_name TEXT, entity TEXT);
+CREATE TABLE service_details (service_id INTEGER NOT NULL PRIMARY KEY, service_name TEXT, service_type TEXT);
+CREATE TABLE as_acct_monthly (account_id TEXT NOT NULL, month DATE NOT NULL, spend REAL NOT NULL, UNIQUE(account_id, month));
+CREATE TABLE aop_budget_monthly (account_id TEXT, month DATE NOT NULL, aop_amount REAL NOT NULL, UNIQUE(account_id, month));
+CREATE TABLE as_acct_service_daily (account_id TEXT NOT NULL, day DATE NOT NULL, spend REAL NOT NULL,
+                                    service_id INTEGER NOT NULL, UNIQUE(account_id, day, service_id));
+CREATE TABLE as_acct_service_monthly (account_id TEXT NOT NULL, month DATE NOT NULL, spend REAL NOT NULL,
+                                      service_id INTEGER NOT NULL, UNIQUE(account_id, month, service_id));
+"""
+
+# Query patterns used by the Metabase dashboards
+QUERIES = {
+    'entity spend by month': (
+        "SELECT m.month, SUM(m.spend) FROM as_acct_monthly m "
+        "JOIN account_details a ON a.account_id = m.account_id "
+        "WHERE a.entity = ? AND m.month BETWEEN ? AND ? GROUP BY m.month",
+        ('OCL', '2024-04-01', '2024-09-01')),
+    'hod spend by month': (
+        "SELECT m.month, SUM(m.spend) FROM as_acct_monthly m "
+        "JOIN account_details a ON a.account_id = m.account_id "
+        "WHERE a.hod_id = ? GROUP BY m.month",
+        ('HOD_003',)),
+    'service daily trend': (
+        "SELECT day, SUM(spend) FROM as_acct_service_daily "
+        "WHERE service_id = ? AND day BETWEEN ? AND ? GROUP BY day",
+        (7, '2024-05-01', '2024-05-31')),
+    'all services on one day': (
+        "SELECT service_id, SUM(spend) FROM as_acct_service_daily WHERE day = ? GROUP BY service_id",
+        ('2024-06-15',)),
+    'services for one month': (
+        "SELECT service_id, SUM(spend) FROM as_acct_service_monthly WHERE month = ? GROUP BY service_id",
+        ('2024-06-01',)),
+    'spend vs aop for one month': (
+        "SELECT m.account_id, m.spend, b.aop_amount FROM as_acct_monthly m "
+        "JOIN aop_budget_monthly b ON b.account_id = m.account_id AND b.month = m.month "
+        "WHERE m.month = ?",
+        ('2024-06-01',)),
+}
+
+def populate(conn, n_accounts, n_services, n_days, seed=0):
+    """Fill the baseline schema with synthetic spend data."""
+    rng = np.random.default_rng(seed)
+    entities = ['OCL', 'PPSL', 'PIBPL', 'Nearbuy', 'PML', 'Creditmate', 'PaiPai']
+    accounts = [f"{i:012d}" for i in range(n_accounts)]
+    days = pd.date_range('2024-04-01', periods=n_days).strftime('%Y-%m-%d')
+    months = sorted({d[:8] + '01' for d in days})
+
+    conn.executemany("INSERT INTO hod_details VALUES (?, ?, ?)",
+                     [(f"HOD_{i:03d}", f"hod {i}", entities[i % len(entities)]) for i in range(1, 21)])
+    conn.executemany("INSERT INTO account_details VALUES (?, ?, ?, ?)",
+                     [(a, f"account {i}", f"HOD_{i % 20 + 1:03d}", entities[i % len(entities)])
+                      for i, a in enumerate(accounts)])
+    conn.executemany("INSERT INTO service_details VALUES (?, ?, ?)",
+                     [(i, f"service {i}", 'Compute') for i in range(1, n_services + 1)])
+
+    acct = np.repeat(accounts, n_days * n_services)
+    day = np.tile(np.repeat(days, n_services), n_accounts)
+    service = np.tile(np.arange(1, n_services + 1), n_accounts * n_days)
+    spend = rng.gamma(2.0, 5.0, size=len(acct))
+    conn.executemany("INSERT INTO as_acct_service_daily VALUES (?, ?, ?, ?)",
+                     zip(acct.tolist(), day.tolist(), spend.tolist(), service.tolist()))
+
+    conn.execute("""
+        INSERT INTO as_acct_service_monthly
+        SELECT account_id, substr(day, 1, 8) || '01', SUM(spend), service_id
+        FROM as_acct_service_daily GROUP BY account_id, substr(day, 1, 8), service_id
+    """)
+    conn.execute("""
+        INSERT INTO as_acct_monthly
+        SELECT account_id, month, SUM(spend) FROM as_acct_service_monthly GROUP BY account_id, month
+    """)
+    conn.executemany("INSERT INTO aop_budget_monthly VALUES (?, ?, ?)",
+                     [(a, m, 1000.0) for a in accounts for m in months])
+    conn.commit()
+    return len(acct)
+
+def time_queries(db_path, repeats=5):
+    """Median latency in ms for every dashboard query."""
+    conn = sqlite3.connect(db_path)
+    results = {}
+    for name, (sql, params) in QUERIES.items():
+        timings = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            conn.execute(sql, params).fetchall()
+            timings.append((time.perf_counter() - start) * 1000)
+        results[name] = statistics.median(timings)
+    conn.close()
+    return results
+
+def main(n_accounts=300, n_services=30, n_days=180):
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = os.path.join(tmp_dir, 'bench.db')
+        conn = sqlite3.connect(db_path)
+        conn.executescript(BASELINE_SCHEMA)
+        rows = populate(conn, n_accounts, n_services, n_days)
+        conn.close()
+        print(f"Synthetic database: {rows} daily rows ({n_accounts} accounts x {n_services} services x {n_days} days)")
+
+        before = time_queries(db_path)
+        bootstrap_db(db_path)
+        after = time_queries(db_path)
+
+    print(f"\n{'query':<28}{'before ms':>12}{'after ms':>12}{'speedup':>10}")
+    for name in QUERIES:
+        print(f"{name:<28}{before[name]:>12.2f}{after[name]:>12.2f}{before[name] / max(after[name], 1e-6):>9.1f}x")
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:4]])
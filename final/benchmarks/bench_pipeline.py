@@ -0,0 +1,154 @@
+import os
+import sys
+import io
+import tempfile
+import contextlib
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from generate_cost_explorer import generate_dataset
+from create_db import bootstrap_db
+from db_session import DBSession
+from instrument import RunMetrics
+from transform_spend import transform_monthly_spend, transform_cost_explorer_spend
+from transform_aop import transform_aop_data
+from spend_schema import concat_spend_frames
+from validate_spend import (validate_pre_transpose, validate_post_transpose, validate_cost_explorer_file,
+                            validate_cost_explorer_transform, extract_account_details_from_filename)
+from update_account_details import validate_and_update_accounts_from_file
+from update_account_monthly_spend import update_account_monthly_spend
+from ingest_folder import write_spend_batch, WRITE_BATCH_SIZE
+from update_aop_budget import update_aop_budget_monthly
+
+# Multiples of BASE_VOLUME (our current export sizes) to run
+SCALES = [1, 10, 100]
+
+# Entity the generated accounts are loaded under
+BENCH_ENTITY = 'OCL'
+
+def read_folder(folder):
+    """Read every per-account file of a generated folder"""
+    return [(name, pd.read_csv(os.path.join(folder, name))) for name in sorted(os.listdir(folder))]
+
+def transform_folder(frames, date_col):
+    """Transform per-account frames into long frames, one per file"""
+    parts = []
+    for name, df in frames:
+        account_id, account_name = extract_account_details_from_filename(name)
+        parts.append(transform_cost_explorer_spend(df, account_id, account_name, date_col))
+    return parts
+
+def write_folder(db_path, parts, file_type):
+    """
+    Write per-account frames the way ingest_folder does: WRITE_BATCH_SIZE files per
+    batch through write_spend_batch (accounts, services, spend, rollups and cube
+    refresh), one checkpoint per batch.
+    """
+    # Sub-stage timings of write_spend_batch are not part of the report
+    batch_metrics = RunMetrics(f'bench_write_type{file_type}')
+    with DBSession(db_path) as session:
+        for start in range(0, len(parts), WRITE_BATCH_SIZE):
+            df_batch = concat_spend_frames(parts[start:start + WRITE_BATCH_SIZE])
+            write_spend_batch(session.conn, df_batch, BENCH_ENTITY, file_type, db_path, batch_metrics)
+            session.checkpoint()
+
+def write_monthly(db_path, monthly):
+    """Write a consolidated monthly frame the way main.py does: accounts, then spend, one commit"""
+    with DBSession(db_path) as session:
+        if not validate_and_update_accounts_from_file(monthly, BENCH_ENTITY, session.conn):
+            raise RuntimeError("Account update failed")
+        if update_account_monthly_spend(monthly, session.conn) is None:
+            raise RuntimeError("update_account_monthly_spend failed")
+
+def validate_folder(frames, df_long, date_col):
+    """Pre and post-transpose checks of every per-account frame"""
+    for (name, df), (_, part) in zip(frames, df_long.groupby('account_id', sort=False)):
+        is_valid, message, service_totals = validate_cost_explorer_file(df)
+        if not is_valid:
+            raise RuntimeError(f"{name}: {message}")
+        is_valid, message = validate_cost_explorer_transform(part, service_totals)
+        if not is_valid:
+            raise RuntimeError(f"{name}: {message}")
+
+def run_scale(scale, work_dir, seed=0):
+    """Generate one dataset and time every pipeline stage on a fresh database"""
+    data_dir = os.path.join(work_dir, f'data_{scale}x')
+    db_path = os.path.join(work_dir, f'bench_{scale}x.db')
+    dataset = generate_dataset(data_dir, scale, seed)
+    monthly_file = dataset['account_monthly'][0]
+
+    # Metrics files stay in the temp directory with the rest of the run
+    with RunMetrics(f'bench_pipeline_{scale}x', metrics_dir=work_dir) as metrics, \
+            contextlib.redirect_stdout(io.StringIO()):
+        bootstrap_db(db_path)
+
+        with metrics.stage('read') as stage:
+            wide = pd.read_csv(monthly_file, header=None)
+            daily_frames = read_folder(dataset['daily'][0])
+            service_frames = read_folder(dataset['service_monthly'][0])
+            stage['rows_out'] = len(wide) + sum(len(df) for _, df in daily_frames + service_frames)
+
+        with metrics.stage('transform_spend') as stage:
+            monthly = transform_monthly_spend(wide)
+            daily_parts = transform_folder(daily_frames, 'day')
+            service_parts = transform_folder(service_frames, 'month')
+            daily = concat_spend_frames(daily_parts)
+            service_monthly = concat_spend_frames(service_parts)
+            stage['rows_out'] = len(monthly) + len(daily) + len(service_monthly)
+
+        with metrics.stage('validate_spend', rows_in=len(monthly) + len(daily) + len(service_monthly)):
+            is_valid, message, account_totals, month_totals = validate_pre_transpose(wide, 3)
+            if not is_valid:
+                raise RuntimeError(message)
+            is_valid, message = validate_post_transpose(monthly, 3, (account_totals, month_totals))
+            if not is_valid:
+                raise RuntimeError(message)
+            validate_folder(daily_frames, daily, 'day')
+            validate_folder(service_frames, service_monthly, 'month')
+
+        # The same write paths as main.py (monthly) and ingest_folder (daily, service monthly)
+        with metrics.stage('write (monthly)', rows_in=len(monthly)):
+            write_monthly(db_path, monthly)
+        with metrics.stage('write (daily)', rows_in=len(daily)):
+            write_folder(db_path, daily_parts, 1)
+        with metrics.stage('write (service monthly)', rows_in=len(service_monthly)):
+            write_folder(db_path, service_parts, 2)
+
+        with metrics.stage('update_aop_budget', rows_in=dataset['aop'][1]):
+            transformed_aop = transform_aop_data(dataset['aop'][0])
+            try:
+                with DBSession(db_path) as session:
+                    if not transformed_aop or not update_aop_budget_monthly(transformed_aop, session.conn):
+                        raise RuntimeError("AOP update failed")
+            finally:
+                # transform_aop_data always writes into data_files/AOP
+                if transformed_aop:
+                    os.remove(transformed_aop)
+
+    return dataset['volume'], metrics.stages
+
+def main(scales=SCALES):
+    results = {}
+    previous_dir = os.getcwd()
+    with tempfile.TemporaryDirectory() as work_dir:
+        # Discrepancy reports and other side files land in the temp directory
+        os.chdir(work_dir)
+        try:
+            for scale in scales:
+                volume, stages = run_scale(scale, work_dir)
+                print(f"{scale}x: {volume}")
+                results[scale] = {record['stage']: record for record in stages}
+        finally:
+            os.chdir(previous_dir)
+
+    stage_names = list(results[scales[0]])
+    print(f"\n{'stage':<32}" + ''.join(f"{f'{scale}x s':>12}{f'{scale}x rows/s':>16}" for scale in scales))
+    for name in stage_names:
+        line = f"{name:<32}"
+        for scale in scales:
+            record = results[scale][name]
+            line += f"{record['seconds']:>12.3f}{(record['rows_per_sec'] or 0):>16,.0f}"
+        print(line)
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or SCALES)
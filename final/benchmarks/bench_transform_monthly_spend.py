@@ -0,0 +1,73 @@
+import os
+import sys
+import io
+import time
+import contextlib
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from transform_spend import transform_monthly_spend
+from spend_schema import export_frame
+
+def build_wide_frame(n_accounts, n_months, seed=0):
+    """Build a frame shaped like the OCL account-monthly export (header=None)."""
+    rng = np.random.default_rng(seed)
+    account_ids = [f"{i:012d}" for i in range(n_accounts)]
+    account_names = [f"account-{i} ($)" for i in range(n_accounts)]
+    months = pd.date_range('2022-04-01', periods=n_months, freq='MS').strftime('%Y-%m-%d')
+    spend = rng.gamma(2.0, 500.0, size=(n_months, n_accounts)).round(6).astype(str)
+
+    rows = [
+        ['Linked account'] + account_ids + ['Total costs ($)'],
+        ['Linked account name'] + account_names + [''],
+        ['Linked account total'] + [''] * n_accounts + [''],
+    ]
+    for j, month in enumerate(months):
+        rows.append([month] + spend[j].tolist() + [''])
+    return pd.DataFrame(rows)
+
+def loop_transform_monthly_spend(df):
+    """The previous nested-loop implementation, kept here as the baseline."""
+    df = df.iloc[:, :-1]
+    account_ids = df.iloc[0].values[1:]
+    account_names = df.iloc[1].values[1:]
+    months = df.iloc[3:, 0].values
+    spend_data = df.iloc[3:, 1:].values
+    records = []
+    for i, account_id in enumerate(account_ids):
+        for j, month in enumerate(months):
+            records.append({
+                'account_id': account_id,
+                'account_name': account_names[i],
+                'month': month,
+                'spend': spend_data[j, i]
+            })
+    df_long = pd.DataFrame(records)
+    df_long['spend'] = df_long['spend'].fillna(0)
+    df_long['account_name'] = df_long['account_name'].str.replace(' ($)', '', regex=False)
+    return df_long
+
+def time_call(func, df):
+    """Run func quietly and return (seconds, result)."""
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = func(df)
+    return time.perf_counter() - start, result
+
+def main(n_accounts=10000, n_months=36):
+    df = build_wide_frame(n_accounts, n_months)
+    print(f"Wide frame: {n_accounts} accounts x {n_months} months")
+
+    loop_time, expected = time_call(loop_transform_monthly_spend, df)
+    vector_time, actual = time_call(transform_monthly_spend, df)
+
+    expected['spend'] = expected['spend'].astype(float)
+    pd.testing.assert_frame_equal(expected, export_frame(actual).astype({'account_id': object, 'account_name': object}), check_dtype=False)
+
+    print(f"- nested loop: {loop_time:.3f}s")
+    print(f"- vectorized:  {vector_time:.3f}s")
+    print(f"- speedup:     {loop_time / vector_time:.1f}x (outputs identical)")
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:3]])
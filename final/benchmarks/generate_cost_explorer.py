@@ -0,0 +1,137 @@
+import os
+import sys
+import csv
+import numpy as np
+import pandas as pd
+
+# Roughly the volume of our current exports: the OCL account-monthly file has
+# ~150 linked accounts x 13 months, the PPSL per-account folders ~20 accounts x
+# ~15 services x ~400 days
+BASE_VOLUME = {'accounts': 150, 'months': 13, 'daily_accounts': 20, 'services': 15, 'days': 400}
+
+SERVICE_NAMES = [
+    'EC2-Instances', 'EC2-Other', 'Relational Database Service', 'S3', 'CloudFront', 'Elastic Load Balancing',
+    'Savings Plans for  Compute usage', 'Elastic Container Service for Kubernetes', 'ElastiCache', 'Glue',
+    'Athena', 'Redshift', 'Key Management Service', 'CloudWatch', 'SQS', 'SNS', 'Secrets Manager',
+    'Lambda', 'DynamoDB', 'Kinesis', 'OpenSearch Service', 'Route 53', 'VPC', 'Cost Explorer',
+    'CloudTrail', 'Glacier', 'Step Functions', 'Service Catalog', 'Simple Workflow Service', 'CloudFormation',
+]
+
+def make_accounts(n_accounts, rng):
+    """Random 12-digit account IDs (some with leading zeros) and names"""
+    ids = rng.choice(10 ** 11, size=n_accounts, replace=False) * 10 + rng.integers(0, 10, n_accounts)
+    # About one in ten real IDs starts with '00'
+    ids = np.where(rng.random(n_accounts) < 0.1, ids % 10 ** 10, ids)
+    account_ids = [f"{i:012d}" for i in ids]
+    account_names = [f"synthetic-{i}_{'prod' if i % 3 else 'nonprod'}" for i in range(n_accounts)]
+    return account_ids, account_names
+
+def make_services(n_services):
+    """Service names, padded with numbered ones beyond the real list"""
+    return [SERVICE_NAMES[i] if i < len(SERVICE_NAMES) else f'Synthetic Service {i}' for i in range(n_services)]
+
+def make_spend(shape, rng, sparsity=0.2):
+    """Gamma-distributed spend with some blank cells, as Cost Explorer leaves them"""
+    spend = rng.gamma(0.8, 400.0, size=shape) * rng.lognormal(0.0, 1.5, size=shape[1])
+    return np.where(rng.random(shape) < sparsity, np.nan, spend)
+
+def write_rows(path, rows):
+    """Write rows quoted the way Cost Explorer exports them"""
+    with open(path, 'w', newline='') as f:
+        csv.writer(f, quoting=csv.QUOTE_ALL).writerows(rows)
+
+def fmt(values):
+    """Format a row of floats, leaving NaN cells empty"""
+    return ['' if np.isnan(v) else repr(float(v)) for v in values]
+
+def generate_account_monthly(path, account_ids, account_names, months, rng):
+    """
+    Account-monthly export (main.py file type 3): one column per linked account,
+    'Linked account'/'Linked account name'/'Linked account total' header rows,
+    one row per month and a 'Total costs ($)' column.
+    """
+    spend = make_spend((len(months), len(account_ids)), rng, sparsity=0.05)
+    totals = np.nansum(spend, axis=0)
+    rows = [
+        ['Linked account'] + account_ids + [''],
+        ['Linked account name'] + [f'{name} ($)' for name in account_names] + ['Total costs ($)'],
+        ['Linked account total'] + fmt(totals) + fmt([totals.sum()]),
+    ]
+    for month, values in zip(months, spend):
+        rows.append([month] + fmt(values) + fmt([np.nansum(values)]))
+    write_rows(path, rows)
+    return len(months) * len(account_ids)
+
+def generate_per_account(path, services, dates, rng):
+    """
+    Per-account service-wise export (daily for file type 1, monthly for type 2):
+    one column per service, a 'Service total' row and a 'Total costs($)' column.
+    """
+    spend = make_spend((len(dates), len(services)), rng)
+    totals = np.nansum(spend, axis=0)
+    rows = [
+        ['Service'] + [f'{name}($)' for name in services] + ['Total costs($)'],
+        ['Service total'] + fmt(totals) + fmt([totals.sum()]),
+    ]
+    for date, values in zip(dates, spend):
+        rows.append([date] + fmt(values) + fmt([np.nansum(values)]))
+    write_rows(path, rows)
+    return len(dates) * len(services)
+
+def generate_aop(path, account_ids, account_names, fiscal_year, rng):
+    """AOP budget file (format without HOD and entity): account_id, account_name, Apr-YY ... Mar-YY"""
+    months = pd.date_range(f'{fiscal_year}-04-01', periods=12, freq='MS').strftime('%b-%y').tolist()
+    budget = (rng.gamma(2.0, 50000.0, size=(len(account_ids), 1)) * rng.uniform(0.9, 1.1, size=(1, 12))).round(-2)
+    df = pd.DataFrame(budget.astype(np.int64), columns=months)
+    df.insert(0, 'account_id', account_ids)
+    df.insert(1, 'account_name', account_names)
+    df.to_csv(path, index=False)
+    return len(account_ids) * 12
+
+def generate_dataset(out_dir, scale=1, seed=0, **volume):
+    """
+    Write a full synthetic dataset under out_dir.
+    Args:
+        out_dir (str): Target directory
+        scale (float): Multiplier on the number of accounts in BASE_VOLUME
+        seed (int): Random seed
+        **volume: Overrides for accounts, months, daily_accounts, services, days
+    Returns:
+        dict: Paths of the generated files and their spend cell counts
+    """
+    volume = {**BASE_VOLUME, **volume}
+    n_accounts = int(volume['accounts'] * scale)
+    n_daily_accounts = int(volume['daily_accounts'] * scale)
+    rng = np.random.default_rng(seed)
+
+    account_ids, account_names = make_accounts(n_accounts, rng)
+    months = pd.date_range('2024-04-01', periods=volume['months'], freq='MS').strftime('%Y-%m-%d').tolist()
+    days = pd.date_range('2024-04-01', periods=volume['days'], freq='D').strftime('%Y-%m-%d').tolist()
+    services = make_services(volume['services'])
+
+    os.makedirs(out_dir, exist_ok=True)
+    dataset = {'volume': dict(volume, accounts=n_accounts, daily_accounts=n_daily_accounts)}
+
+    path = os.path.join(out_dir, f'SYN_{months[0]}_{months[-1]}.csv')
+    dataset['account_monthly'] = (path, generate_account_monthly(path, account_ids, account_names, months, rng))
+
+    for file_type, dates in [('daily', days), ('service_monthly', months)]:
+        folder = os.path.join(out_dir, file_type)
+        os.makedirs(folder, exist_ok=True)
+        cells = 0
+        for account_id, account_name in zip(account_ids[:n_daily_accounts], account_names[:n_daily_accounts]):
+            cells += generate_per_account(os.path.join(folder, f'{account_name} ({account_id}).csv'), services, dates, rng)
+        dataset[file_type] = (folder, cells)
+
+    path = os.path.join(out_dir, 'SYN_AOP.csv')
+    dataset['aop'] = (path, generate_aop(path, account_ids, account_names, months[0][:4], rng))
+    return dataset
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python generate_cost_explorer.py <out_dir> [scale] [seed]")
+        sys.exit(1)
+    dataset = generate_dataset(sys.argv[1], float(sys.argv[2]) if len(sys.argv) > 2 else 1,
+                               int(sys.argv[3]) if len(sys.argv) > 3 else 0)
+    for name, value in dataset.items():
+        print(f"{name}: {value}")
@@ -1,6 +1,6 @@
 CREATE TABLE aop_budget_monthly (
-    account_id TEXT,
+    account_id TEXT NOT NULL,
     month DATE NOT NULL,
     aop_amount REAL NOT NULL,
-    UNIQUE(account_id, month)
-);
\ No newline at end of file
+    PRIMARY KEY(account_id, month)
+) WITHOUT ROWID;
\ No newline at end of file
@@ -2,5 +2,5 @@ CREATE TABLE as_acct_monthly(
     account_id TEXT NOT NULL,
     month DATE NOT NULL,
     spend REAL NOT NULL,
-    UNIQUE(account_id, month)
-);
\ No newline at end of file
+    PRIMARY KEY(account_id, month)
+) WITHOUT ROWID;
\ No newline at end of file
@@ -2,6 +2,6 @@ CREATE TABLE as_acct_service_daily(
     account_id TEXT NOT NULL,
     day DATE NOT NULL,
     spend REAL NOT NULL,
-    service_id INTEGER MOT NULL ,
-    UNIQUE(account_id,day,service_id)
-);
\ No newline at end of file
+    service_id INTEGER NOT NULL,
+    PRIMARY KEY(account_id,day,service_id)
+) WITHOUT ROWID;
\ No newline at end of file
@@ -3,5 +3,5 @@ CREATE TABLE as_acct_service_monthly (
     month DATE NOT NULL,
     spend REAL NOT NULL,
     service_id INTEGER NOT NULL,
-    UNIQUE(account_id, month,service_id)
-);
\ No newline at end of file
+    PRIMARY KEY(account_id, month,service_id)
+) WITHOUT ROWID;
\ No newline at end of file
@@ -2,5 +2,5 @@ CREATE TABLE as_service_monthly (
     service_id INTEGER NOT NULL,
     month DATE NOT NULL,
     spend REAL NOT NULL,
-    UNIQUE(service_id,month)
-);
\ No newline at end of file
+    PRIMARY KEY(service_id,month)
+) WITHOUT ROWID;
\ No newline at end of file
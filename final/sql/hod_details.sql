@@ -2,5 +2,6 @@ CREATE TABLE hod_details (
    hod_id TEXT PRIMARY KEY,
    hod_name TEXT,
    hod_email_id TEXT,
-   tech_leader TEXT
+   tech_leader TEXT,
+   entity TEXT
 );
\ No newline at end of file
@@ -0,0 +1,45 @@
+-- Secondary and covering indexes for the Metabase dashboard filters
+-- (month/day, service_id, hod_id, entity). Natural keys are the primary keys.
+
+-- Daily spend by day / month range and by service
+CREATE INDEX IF NOT EXISTS idx_as_acct_service_daily_day
+    ON as_acct_service_daily (day, service_id, account_id, spend);
+CREATE INDEX IF NOT EXISTS idx_as_acct_service_daily_service
+    ON as_acct_service_daily (service_id, day, spend);
+
+-- Service monthly spend by month and by service
+CREATE INDEX IF NOT EXISTS idx_as_acct_service_monthly_month
+    ON as_acct_service_monthly (month, service_id, account_id, spend);
+CREATE INDEX IF NOT EXISTS idx_as_acct_service_monthly_service
+    ON as_acct_service_monthly (service_id, month, spend);
+
+-- AOP by month. as_acct_monthly gets no month index: with one, the planner
+-- scans every month in range and probes account_details per row for entity
+-- filters, instead of going entity -> account_id -> primary key range.
+DROP INDEX IF EXISTS idx_as_acct_monthly_month;
+CREATE INDEX IF NOT EXISTS idx_aop_budget_monthly_month
+    ON aop_budget_monthly (month, account_id, aop_amount);
+
+CREATE INDEX IF NOT EXISTS idx_as_service_monthly_month
+    ON as_service_monthly (month, service_id, spend);
+
+-- Dimension lookups by HOD, entity and name
+CREATE INDEX IF NOT EXISTS idx_account_details_hod
+    ON account_details (hod_id, account_id);
+CREATE INDEX IF NOT EXISTS idx_account_details_entity
+    ON account_details (entity, hod_id, account_id);
+CREATE INDEX IF NOT EXISTS idx_hod_details_name_entity
+    ON hod_details (hod_name, entity);
+CREATE INDEX IF NOT EXISTS idx_service_details_name
+    ON service_details (service_name);
+CREATE INDEX IF NOT EXISTS idx_service_details_type
+    ON service_details (service_type, service_id);
+
+-- Spend vs AOP cube: month range, HOD and service type filters.
+-- The primary key already serves entity -> hod -> service type filters.
+CREATE INDEX IF NOT EXISTS idx_spend_aop_cube_month
+    ON spend_aop_cube (month, entity, hod_id, service_type, spend, aop_amount, variance);
+CREATE INDEX IF NOT EXISTS idx_spend_aop_cube_hod
+    ON spend_aop_cube (hod_id, month, service_type, spend, aop_amount, variance);
+CREATE INDEX IF NOT EXISTS idx_spend_aop_cube_service_type
+    ON spend_aop_cube (service_type, month, entity, hod_id, spend);
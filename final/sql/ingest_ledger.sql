@@ -0,0 +1,13 @@
+CREATE TABLE ingest_ledger(
+    file_hash TEXT NOT NULL,
+    entity TEXT NOT NULL,
+    file_type INTEGER NOT NULL,
+    file_name TEXT,
+    start_date DATE,
+    end_date DATE,
+    row_count INTEGER,
+    status TEXT NOT NULL CHECK (status IN ('loaded', 'failed')),
+    reason TEXT,
+    ingested_at TEXT NOT NULL,
+    PRIMARY KEY(file_hash, entity, file_type)
+) WITHOUT ROWID;
\ No newline at end of file
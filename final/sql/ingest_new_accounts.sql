@@ -0,0 +1,10 @@
+CREATE TABLE ingest_new_accounts(
+    account_id TEXT NOT NULL,
+    account_name TEXT,
+    hod_id TEXT,
+    entity TEXT,
+    file_hash TEXT NOT NULL DEFAULT '',
+    file_name TEXT,
+    added_at TEXT NOT NULL,
+    PRIMARY KEY(account_id, file_hash)
+) WITHOUT ROWID;
\ No newline at end of file
@@ -1,4 +1,4 @@
-INSERT INTO cloud_partners (id, partner_name) VALUES
+INSERT OR IGNORE INTO cloud_partners (cloud_id, partner_name) VALUES
 (1, 'AWS'),
 (2, 'Azure'),
 (3, 'GCP'),
@@ -1,4 +1,4 @@
-INSERT INTO config_table (key, value) VALUES
+INSERT OR IGNORE INTO config_table (key, value) VALUES
 ('year_start', '4'),
 ('year_end', '3'),
 ('commitment_amt', '60000000');
\ No newline at end of file
@@ -3,6 +3,6 @@ CREATE TABLE people_spend (
     month DATE NOT NULL,
     spend REAL NOT NULL,
     head_count INTEGER NOT NULL,
-    resource_type TEXT NOT NULL
-    UNIQUE(hod_id, month)
-);
\ No newline at end of file
+    resource_type TEXT NOT NULL,
+    PRIMARY KEY(hod_id, month)
+) WITHOUT ROWID;
\ No newline at end of file
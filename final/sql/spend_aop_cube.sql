@@ -0,0 +1,10 @@
+CREATE TABLE spend_aop_cube(
+    entity TEXT NOT NULL,
+    hod_id TEXT NOT NULL,
+    service_type TEXT NOT NULL,
+    month DATE NOT NULL,
+    spend REAL NOT NULL,
+    aop_amount REAL,
+    variance REAL,
+    PRIMARY KEY(entity, hod_id, service_type, month)
+) WITHOUT ROWID;
@@ -0,0 +1,38 @@
+import numpy as np
+import pandas as pd
+
+# Every AWS account ID is 12 digits; exports drop leading zeros when a
+# spreadsheet treats the column as a number
+ACCOUNT_ID_LENGTH = 12
+# Placeholder IDs used in the AOP files for budget lines without an account
+NO_ACCOUNT_PREFIX = 'No_AC_ID'
+
+def normalize_account_ids(values):
+    """
+    Normalize account IDs the same way on every spend and AOP path:
+    - missing or blank values become None
+    - IDs containing letters ('No_AC_ID...' placeholders, names) are only stripped
+    - numeric IDs lose a float '.0' artifact and any quotes or separators, and are
+      left-padded with zeros to 12 digits
+    Each distinct value is normalized once, with vectorized string ops.
+    Args:
+        values (array-like): Raw account IDs (strings, ints, floats or categorical)
+    Returns:
+        pd.Series: Normalized IDs (object dtype), aligned with the input index
+    """
+    values = values if isinstance(values, pd.Series) else pd.Series(values)
+    # Missing values get code -1
+    codes, uniques = pd.factorize(values)
+    text = pd.Series(np.asarray(uniques, dtype=object)).astype(str).str.strip()
+    # '123456789012.0' from a column that was read as float
+    text = text.str.replace(r'^(\d+)\.0+$', r'\1', regex=True)
+    digits = text.str.replace(r'\D', '', regex=True)
+    is_numeric = (digits != '') & ~text.str.contains(r'[A-Za-z]', regex=True)
+    normalized = text.where(~is_numeric, digits.str.zfill(ACCOUNT_ID_LENGTH))
+    normalized = np.where(text == '', None, normalized.to_numpy(dtype=object))
+    lookup = np.append(normalized, None)
+    return pd.Series(lookup[codes], index=values.index, dtype=object)
+
+def is_account_id(normalized):
+    """Boolean mask of normalized IDs that are real 12-digit account IDs"""
+    return normalized.str.fullmatch(rf'\d{{{ACCOUNT_ID_LENGTH}}}').fillna(False).astype(bool)
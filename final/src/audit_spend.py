@@ -0,0 +1,162 @@
+import sys
+import pandas as pd
+from datetime import datetime
+from db_session import connect, get_db_path
+
+# Same tolerance as np.isclose(a, b, rtol=1e-5): |a - b| <= atol + rtol * |b|
+RTOL = 1e-5
+ATOL = 1e-8
+
+# Partitions written by the current batch (see update_spend.stage_touched_months)
+TOUCHED_SCOPE = """
+    scope AS (SELECT account_id, month FROM touched_months)
+"""
+
+def _daily_vs_service_monthly_sql(touched_only):
+    """Build the daily rollup vs as_acct_service_monthly comparison."""
+    if touched_only:
+        daily = """
+            daily AS (
+                SELECT d.account_id, t.month, d.service_id, SUM(d.spend) AS daily_sum
+                FROM scope t
+                JOIN as_acct_service_daily d
+                  ON d.account_id = t.account_id
+                 AND d.day >= t.month AND d.day < date(t.month, '+1 month')
+                GROUP BY d.account_id, t.month, d.service_id
+            )"""
+        monthly = """
+            monthly AS (
+                SELECT s.account_id, s.month, s.service_id, s.spend AS monthly_sum
+                FROM scope t
+                JOIN as_acct_service_monthly s ON s.account_id = t.account_id AND s.month = t.month
+            )"""
+        ctes = [TOUCHED_SCOPE, daily, monthly]
+    else:
+        daily = """
+            daily AS (
+                SELECT account_id, substr(day, 1, 7) || '-01' AS month, service_id, SUM(spend) AS daily_sum
+                FROM as_acct_service_daily
+                GROUP BY account_id, substr(day, 1, 7), service_id
+            )"""
+        monthly = """
+            monthly AS (
+                SELECT account_id, month, service_id, spend AS monthly_sum FROM as_acct_service_monthly
+            )"""
+        ctes = [daily, monthly]
+
+    # Full outer join over the union of keys from both sides
+    return "WITH " + ",".join(ctes) + f""",
+        keys AS (
+            SELECT account_id, month, service_id FROM daily
+            UNION
+            SELECT account_id, month, service_id FROM monthly
+        )
+        SELECT k.month, k.account_id, k.service_id,
+               COALESCE(d.daily_sum, 0) AS daily_sum,
+               COALESCE(m.monthly_sum, 0) AS monthly_sum,
+               COALESCE(d.daily_sum, 0) - COALESCE(m.monthly_sum, 0) AS difference
+        FROM keys k
+        LEFT JOIN daily d ON d.account_id = k.account_id AND d.month = k.month AND d.service_id = k.service_id
+        LEFT JOIN monthly m ON m.account_id = k.account_id AND m.month = k.month AND m.service_id = k.service_id
+        WHERE abs(COALESCE(d.daily_sum, 0) - COALESCE(m.monthly_sum, 0)) > {ATOL} + {RTOL} * abs(COALESCE(m.monthly_sum, 0))
+        ORDER BY k.month, k.account_id, k.service_id
+    """
+
+def _service_monthly_vs_account_monthly_sql(touched_only):
+    """Build the service monthly rollup vs as_acct_monthly comparison."""
+    if touched_only:
+        service = """
+            service AS (
+                SELECT s.account_id, s.month, SUM(s.spend) AS service_sum
+                FROM scope t
+                JOIN as_acct_service_monthly s ON s.account_id = t.account_id AND s.month = t.month
+                GROUP BY s.account_id, s.month
+            )"""
+        monthly = """
+            monthly AS (
+                SELECT m.account_id, m.month, m.spend AS monthly_sum
+                FROM scope t
+                JOIN as_acct_monthly m ON m.account_id = t.account_id AND m.month = t.month
+            )"""
+        ctes = [TOUCHED_SCOPE, service, monthly]
+    else:
+        service = """
+            service AS (
+                SELECT account_id, month, SUM(spend) AS service_sum
+                FROM as_acct_service_monthly
+                GROUP BY account_id, month
+            )"""
+        monthly = """
+            monthly AS (
+                SELECT account_id, month, spend AS monthly_sum FROM as_acct_monthly
+            )"""
+        ctes = [service, monthly]
+
+    return "WITH " + ",".join(ctes) + f""",
+        keys AS (
+            SELECT account_id, month FROM service
+            UNION
+            SELECT account_id, month FROM monthly
+        )
+        SELECT k.month, k.account_id,
+               COALESCE(s.service_sum, 0) AS service_sum,
+               COALESCE(m.monthly_sum, 0) AS monthly_sum,
+               COALESCE(s.service_sum, 0) - COALESCE(m.monthly_sum, 0) AS difference
+        FROM keys k
+        LEFT JOIN service s ON s.account_id = k.account_id AND s.month = k.month
+        LEFT JOIN monthly m ON m.account_id = k.account_id AND m.month = k.month
+        WHERE abs(COALESCE(s.service_sum, 0) - COALESCE(m.monthly_sum, 0)) > {ATOL} + {RTOL} * abs(COALESCE(m.monthly_sum, 0))
+        ORDER BY k.month, k.account_id
+    """
+
+def find_daily_discrepancies(conn, touched_only=True):
+    """
+    Compare daily rollups against as_acct_service_monthly in one statement.
+    Args:
+        conn (sqlite3.Connection): Open database connection
+        touched_only (bool): Limit the check to the touched_months temp table
+    Returns:
+        pd.DataFrame: month, account_id, service_id, daily_sum, monthly_sum, difference
+    """
+    return pd.read_sql_query(_daily_vs_service_monthly_sql(touched_only), conn)
+
+def find_monthly_discrepancies(conn, touched_only=True):
+    """
+    Compare service monthly rollups against as_acct_monthly in one statement.
+    Returns:
+        pd.DataFrame: month, account_id, service_sum, monthly_sum, difference
+    """
+    return pd.read_sql_query(_service_monthly_vs_account_monthly_sql(touched_only), conn)
+
+def save_discrepancies(discrepancies_df, prefix='spend_discrepancies'):
+    """Save discrepancies to CSV if any were found"""
+    if discrepancies_df.empty:
+        return None
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    output_file = f'{prefix}_{timestamp}.csv'
+    discrepancies_df.to_csv(output_file, index=False)
+    print(f"\nDiscrepancies found and saved to {output_file}:")
+    print(discrepancies_df.to_string())
+    return output_file
+
+def audit_database(db_path=None):
+    """
+    Standalone consistency audit over the whole database.
+    Returns: (daily_discrepancies, monthly_discrepancies)
+    """
+    conn = connect(db_path)
+    try:
+        daily = find_daily_discrepancies(conn, touched_only=False)
+        monthly = find_monthly_discrepancies(conn, touched_only=False)
+    finally:
+        conn.close()
+
+    print(f"\nConsistency audit completed:")
+    print(f"- {len(daily)} daily vs service monthly discrepancies")
+    print(f"- {len(monthly)} service monthly vs account monthly discrepancies")
+    save_discrepancies(daily, 'audit_daily_discrepancies')
+    save_discrepancies(monthly, 'audit_monthly_discrepancies')
+    return daily, monthly
+
+if __name__ == "__main__":
+    audit_database(sys.argv[1] if len(sys.argv) > 1 else get_db_path())
@@ -0,0 +1,147 @@
+import os
+import re
+import sys
+import time
+from db_session import connect, get_db_path
+
+# Table definitions in creation order, one file per table in final/sql
+TABLE_FILES = [
+    'cloud_partners', 'config_table', 'business_details', 'hod_details', 'people_details',
+    'account_details', 'service_details', 'aop_budget_monthly', 'as_acct_monthly',
+    'as_acct_service_daily', 'as_acct_service_monthly', 'as_service_monthly', 'people_spend',
+    'ingest_ledger', 'ingest_new_accounts', 'spend_aop_cube',
+]
+
+# Seed data, inserted with INSERT OR IGNORE so re-runs are harmless
+SEED_FILES = ['insert_cloud_partners', 'insert_config']
+
+INDEX_FILE = 'indexes'
+
+def get_sql_dir():
+    """Get the absolute path to final/sql"""
+    current_dir = os.path.dirname(os.path.abspath(__file__))
+    return os.path.join(os.path.dirname(current_dir), 'sql')
+
+def read_sql(name):
+    """Read one .sql file from final/sql"""
+    with open(os.path.join(get_sql_dir(), f'{name}.sql')) as f:
+        return f.read()
+
+def normalize_sql(sql):
+    """Collapse whitespace and case so schema definitions can be compared"""
+    return re.sub(r'\s+', ' ', sql.strip().rstrip(';')).replace('( ', '(').replace(' )', ')').lower()
+
+def get_table_sql(cursor, table):
+    """Return the CREATE statement of an existing table, or None"""
+    cursor.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ?", (table,))
+    result = cursor.fetchone()
+    return result[0] if result else None
+
+def get_columns(cursor, table):
+    """Return the column names of a table"""
+    cursor.execute(f"PRAGMA table_info({table})")
+    return [row[1] for row in cursor.fetchall()]
+
+def get_required_columns(cursor, table, without_rowid=False):
+    """Return the columns a row cannot leave NULL: NOT NULL without a default, or part of a WITHOUT ROWID key"""
+    cursor.execute(f"PRAGMA table_info({table})")
+    return [row[1] for row in cursor.fetchall() if (row[3] and row[4] is None) or (without_rowid and row[5])]
+
+def rebuild_table(cursor, table, sql):
+    """
+    Migrate an existing table to the definition in sql: create the new layout,
+    copy the common columns across, then swap it in place of the old table.
+    Rows with NULL in a column the new layout requires are parked in
+    <table>__rejected instead of failing the migration. Rows that collide on the
+    new primary key keep the last copy.
+    Returns:
+        dict: copied, rejected and duplicates (rows dropped by the key collapse)
+    """
+    new_table = f'{table}__new'
+    cursor.execute(f"DROP TABLE IF EXISTS {new_table}")
+    cursor.execute(re.sub(rf'CREATE TABLE\s+{table}\b', f'CREATE TABLE {new_table}', sql, count=1, flags=re.IGNORECASE))
+
+    old_columns = get_columns(cursor, table)
+    common = [col for col in get_columns(cursor, new_table) if col in old_columns]
+    columns = ', '.join(common)
+    without_rowid = re.search(r'WITHOUT\s+ROWID', sql, flags=re.IGNORECASE) is not None
+    required = [col for col in get_required_columns(cursor, new_table, without_rowid) if col in old_columns]
+    valid = ' AND '.join(f"{col} IS NOT NULL" for col in required) or '1'
+
+    rejected_table = f'{table}__rejected'
+    cursor.execute(f"SELECT COUNT(*) FROM {table} WHERE NOT ({valid})")
+    rejected = cursor.fetchone()[0]
+    if rejected:
+        cursor.execute(f"DROP TABLE IF EXISTS {rejected_table}")
+        cursor.execute(f"CREATE TABLE {rejected_table} AS SELECT * FROM {table} WHERE NOT ({valid})")
+
+    cursor.execute(f"INSERT OR REPLACE INTO {new_table} ({columns}) SELECT {columns} FROM {table} WHERE {valid}")
+    cursor.execute(f"SELECT (SELECT COUNT(*) FROM {table} WHERE {valid}), (SELECT COUNT(*) FROM {new_table})")
+    candidates, copied = cursor.fetchone()
+
+    cursor.execute(f"DROP TABLE {table}")
+    cursor.execute(f"ALTER TABLE {new_table} RENAME TO {table}")
+    return {'copied': copied, 'rejected': rejected, 'duplicates': candidates - copied}
+
+def bootstrap_db(db_path=None, with_indexes=True):
+    """
+    Create every table from final/sql, migrate tables whose definition changed,
+    create the secondary/covering indexes and refresh planner statistics.
+    Returns:
+        bool: True if successful, False otherwise
+    """
+    try:
+        conn = connect(db_path)
+        cursor = conn.cursor()
+        created, migrated = [], []
+        
+        # Table creation and migration happen in one transaction
+        cursor.execute("BEGIN")
+        
+        for table in TABLE_FILES:
+            sql = read_sql(table)
+            existing_sql = get_table_sql(cursor, table)
+            if existing_sql is None:
+                cursor.execute(sql)
+                created.append(table)
+            elif normalize_sql(existing_sql) != normalize_sql(sql):
+                counts = rebuild_table(cursor, table, sql)
+                migrated.append(table)
+                print(f"Migrated {table} to the current layout ({counts['copied']} rows copied)")
+                if counts['rejected']:
+                    print(f"- {counts['rejected']} rows with NULL key columns moved to {table}__rejected")
+                if counts['duplicates']:
+                    print(f"- {counts['duplicates']} rows dropped as duplicates of a primary key (last copy kept)")
+        
+        for seed in SEED_FILES:
+            cursor.execute(read_sql(seed))
+        
+        conn.commit()
+        
+        if with_indexes:
+            cursor.executescript(read_sql(INDEX_FILE))
+        
+        # Refresh the statistics the query planner uses to pick indexes
+        start_time = time.perf_counter()
+        conn.execute("ANALYZE")
+        conn.commit()
+        analyze_time = time.perf_counter() - start_time
+        conn.close()
+        
+        print(f"\nDatabase bootstrap completed:")
+        print(f"- {len(created)} tables created")
+        print(f"- {len(migrated)} tables migrated")
+        print(f"- ANALYZE took {analyze_time:.2f}s")
+        return True
+
+    except Exception as e:
+        print(f"Error bootstrapping database: {str(e)}")
+        if 'conn' in locals():
+            conn.rollback()
+            conn.close()
+        return False
+
+if __name__ == "__main__":
+    db_path = sys.argv[1] if len(sys.argv) > 1 else get_db_path()
+    print(f"Bootstrapping database at {db_path}")
+    bootstrap_db(db_path)
@@ -0,0 +1,150 @@
+import numpy as np
+import pandas as pd
+
+# Formats seen in our exports and AOP sheets, tried in this order.
+# A column must parse completely under one of them.
+DATE_FORMATS = [
+    '%Y-%m-%d',           # 2025-04-01 (transformed files, Cost Explorer)
+    '%Y-%m-%d %H:%M:%S',  # 2025-04-01 00:00:00 (datetimes written back to CSV)
+    '%d-%b-%Y',           # 01-Apr-2025
+    '%d-%b-%y',           # 01-Apr-25
+    '%b-%y',              # Apr-25 (AOP month columns)
+    '%b-%Y',              # Apr-2025
+    '%B-%Y',              # April-2025
+    '%B %Y',              # April 2025
+    '%Y-%m',              # 2025-04
+    '%d/%m/%Y',           # 01/04/2025
+    '%m/%d/%Y',           # 04/01/2025
+]
+EPOCH = np.datetime64('1970-01-01', 'D')
+# Integer input is only taken as encoded keys inside these bounds (1970-2099);
+# yyyymmdd or yyyymm numbers read from a CSV fall outside them
+DAY_KEY_RANGE = (0, int((np.datetime64('2099-12-31', 'D') - EPOCH).astype(int)))
+MONTH_KEY_RANGE = (197001, 209912)
+# Parsed (format, text) pairs and detected formats kept across calls, so
+# chunks and files that share dates skip detection and only parse new values
+DATE_CACHE_SIZE = 100000
+_parsed_cache = {}
+_format_cache = {}
+
+def _unique_text(values):
+    """Factorize values into (codes, stripped unique strings); missing values get code -1"""
+    codes, uniques = pd.factorize(pd.Series(values) if not isinstance(values, pd.Series) else values)
+    text = pd.Index(np.asarray(uniques, dtype=object)).astype(str).str.strip()
+    return codes, text
+
+def _parse(text, fmt):
+    """Parse unique strings with one format, datetime64[D] with NaT where they don't match"""
+    return pd.to_datetime(text, format=fmt, errors='coerce').to_numpy().astype('datetime64[D]')
+
+def detect_date_format(values):
+    """
+    Find the one format every distinct value parses under.
+    Args:
+        values (array-like): Date strings
+    Returns:
+        str: strftime format from DATE_FORMATS
+    Raises:
+        ValueError: If no format fits all values (mixed or unknown formats), or if
+            several formats fit with different results (e.g. 01/04/2025)
+    """
+    _, text = _unique_text(values)
+    if len(text) == 0:
+        return DATE_FORMATS[0]
+    key = tuple(text)
+    if key in _format_cache:
+        return _format_cache[key]
+    matches = {}
+    for fmt in DATE_FORMATS:
+        parsed = _parse(text, fmt)
+        if not np.isnat(parsed).any():
+            matches[fmt] = parsed
+    if not matches:
+        # Report which values each near-miss format could not read
+        best = max(DATE_FORMATS, key=lambda fmt: (~np.isnat(_parse(text, fmt))).sum())
+        unparsed = text[np.isnat(_parse(text, best))]
+        raise ValueError(f"Mixed or unknown date formats: {len(unparsed)} of {len(text)} distinct values "
+                         f"do not match '{best}', e.g. {unparsed[:5].tolist()}")
+    fmt, parsed = next(iter(matches.items()))
+    conflicting = [other for other, result in matches.items() if not np.array_equal(result, parsed)]
+    if conflicting:
+        raise ValueError(f"Ambiguous date format: values such as {text[:3].tolist()} "
+                         f"parse differently as '{fmt}' and '{conflicting[0]}'")
+    if len(_format_cache) >= DATE_CACHE_SIZE:
+        _format_cache.clear()
+    _format_cache[key] = fmt
+    return fmt
+
+def parse_dates(values, fmt=None):
+    """
+    Parse a date column into datetime64[D], detecting the format once and
+    parsing each distinct value once.
+    Args:
+        values (array-like): Date strings
+        fmt (str): Known format, skips detection
+    Returns:
+        np.ndarray: datetime64[D] values, NaT for missing ones
+    Raises:
+        ValueError: On mixed or ambiguous formats, or values that don't match fmt
+    """
+    codes, text = _unique_text(values)
+    fmt = fmt or detect_date_format(text)
+
+    # Only values not parsed by an earlier call go through to_datetime
+    new_text = [value for value in text if (fmt, value) not in _parsed_cache]
+    if new_text:
+        parsed = _parse(pd.Index(new_text), fmt)
+        if np.isnat(parsed).any():
+            raise ValueError(f"Dates do not match '{fmt}': {pd.Index(new_text)[np.isnat(parsed)][:5].tolist()}")
+        if len(_parsed_cache) + len(new_text) > DATE_CACHE_SIZE:
+            _parsed_cache.clear()
+        _parsed_cache.update(zip(((fmt, value) for value in new_text), parsed))
+
+    lookup = np.array([_parsed_cache[(fmt, value)] for value in text] + [np.datetime64('NaT')], dtype='datetime64[D]')
+    return lookup[codes]
+
+def encode_dates(values, col, fmt=None):
+    """
+    Turn a date column into int32 keys: days since 1970-01-01 for 'day',
+    yyyymm for 'month'. Integer input is taken as already encoded if every
+    value is a valid key of that kind.
+    Raises:
+        ValueError: On unparseable or missing dates, or integers that are not valid keys
+    """
+    values = pd.Series(values)
+    if pd.api.types.is_integer_dtype(values.dtype):
+        return check_keys(values.to_numpy(dtype=np.int64), col).astype(np.int32)
+    days = parse_dates(values, fmt)
+    if np.isnat(days).any():
+        raise ValueError(f"Missing dates in {col} column")
+    if col == 'day':
+        return (days - EPOCH).astype(np.int32)
+    months = days.astype('datetime64[M]').astype(np.int64)
+    return ((1970 + months // 12) * 100 + months % 12 + 1).astype(np.int32)
+
+def check_keys(keys, col):
+    """Raise unless every integer is a day key (days since 1970-01-01) or month key (yyyymm)"""
+    low, high = DAY_KEY_RANGE if col == 'day' else MONTH_KEY_RANGE
+    invalid = (keys < low) | (keys > high)
+    if col != 'day':
+        invalid |= (keys % 100 < 1) | (keys % 100 > 12)
+    if invalid.any():
+        expected = 'days since 1970-01-01' if col == 'day' else 'yyyymm months'
+        raise ValueError(f"Integers in {col} column are not {expected}, e.g. {pd.unique(keys[invalid])[:5].tolist()}")
+    return keys
+
+def decode_dates(keys, col):
+    """
+    Turn int32 keys back into the ISO strings the database stores
+    ('YYYY-MM-DD' for days, 'YYYY-MM-01' for months), decoding each distinct key once.
+    """
+    inverse, uniques = pd.factorize(np.asarray(keys))
+    if col == 'day':
+        text = (EPOCH + uniques.astype('timedelta64[D]')).astype(str)
+    else:
+        text = np.array([f"{key // 100:04d}-{key % 100:02d}-01" for key in uniques.tolist()])
+    return text.astype(object)[inverse]
+
+def date_strings(values, col, fmt=None):
+    """Canonical ISO strings of a day/month column, whatever format or encoding it comes in"""
+    return decode_dates(encode_dates(values, col, fmt), col)
@@ -0,0 +1,157 @@
+import os
+import sqlite3
+import time
+
+# Pragmas applied to every connection opened through this module
+PRAGMAS = [
+    ('journal_mode', 'WAL'),
+    ('synchronous', 'NORMAL'),
+    ('temp_store', 'MEMORY'),
+    ('cache_size', '-65536'),  # negative value = KiB, i.e. 64 MB page cache
+]
+
+# sqlite3 keeps this many prepared statements per connection
+STATEMENT_CACHE_SIZE = 256
+
+# config_table key of the generation counter; every commit that wrote anything
+# through connect() bumps it, so cached query results keyed by it are never
+# served after the data changed
+GENERATION_KEY = 'db_generation'
+
+def get_db_path():
+    """Get the absolute path to the database file"""
+    current_dir = os.path.dirname(os.path.abspath(__file__))
+    project_root = os.path.dirname(os.path.dirname(current_dir))
+    return os.path.join(project_root, 'final', 'sqlite', 'mydatabase.db')
+
+def apply_pragmas(conn):
+    """Apply the tuned pragmas to an open connection"""
+    for name, value in PRAGMAS:
+        conn.execute(f"PRAGMA {name} = {value}")
+
+class Connection(sqlite3.Connection):
+    """
+    Connection returned by connect(). A commit that wrote anything bumps the
+    generation counter in the same transaction. Callbacks registered with
+    after_commit() run once the current transaction is committed and are dropped
+    if it is rolled back, so caches derived from the data only ever describe
+    committed rows.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.commit_callbacks = {}
+        # total_changes as of the last commit or rollback
+        self.committed_changes = self.total_changes
+
+    def after_commit(self, key, callback):
+        """Run callback after the next commit; a later callback with the same key replaces it"""
+        self.commit_callbacks[key] = callback
+
+    def commit(self):
+        if self.total_changes != self.committed_changes:
+            bump_generation(self)
+        super().commit()
+        self.committed_changes = self.total_changes
+        callbacks, self.commit_callbacks = self.commit_callbacks, {}
+        for callback in callbacks.values():
+            callback()
+
+    def rollback(self):
+        super().rollback()
+        self.committed_changes = self.total_changes
+        self.commit_callbacks = {}
+
+def connect(db_path=None, factory=Connection):
+    """Open a tuned connection to the database"""
+    db_path = db_path or get_db_path()
+    # Ensure the database directory exists
+    os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+    conn = sqlite3.connect(db_path, cached_statements=STATEMENT_CACHE_SIZE, factory=factory)
+    conn.row_factory = sqlite3.Row
+    apply_pragmas(conn)
+    return conn
+
+def has_config_table(conn):
+    """True if the database was bootstrapped with config_table (see create_db.py)"""
+    return conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'config_table'"
+    ).fetchone() is not None
+
+def get_generation(conn):
+    """Current generation of the database contents (0 before the first ingest or without config_table)"""
+    if not has_config_table(conn):
+        return 0
+    row = conn.execute("SELECT value FROM config_table WHERE key = ?", (GENERATION_KEY,)).fetchone()
+    return int(row[0]) if row else 0
+
+def bump_generation(conn):
+    """
+    Increment the generation counter inside the caller's transaction, so it
+    becomes visible together with the data it describes. The key is created on
+    first use; databases without config_table have no generation and are left as is.
+    Returns:
+        bool: True if the counter was bumped
+    """
+    if not has_config_table(conn):
+        return False
+    conn.execute("""
+        INSERT INTO config_table (key, value) VALUES (?, '1')
+        ON CONFLICT(key) DO UPDATE SET value = CAST(value AS INTEGER) + 1
+    """, (GENERATION_KEY,))
+    return True
+
+class DBSession:
+    """
+    One connection and one atomic transaction for a whole main.py run.
+    Pass session.conn to the stage functions; everything is committed once on
+    exit, or rolled back if the block raises or rollback() was called.
+    Stage functions never commit, roll back or close a connection they were
+    given; only the session does.
+    """
+
+    def __init__(self, db_path=None):
+        self.db_path = db_path or get_db_path()
+        self.conn = None
+        self.rolled_back = False
+        self.checkpoints = 0
+        self.start_time = None
+
+    def __enter__(self):
+        self.conn = connect(self.db_path)
+        self.start_time = time.perf_counter()
+        return self
+
+    def checkpoint(self):
+        """Commit what has been written so far, e.g. after each batch of a long run"""
+        self.conn.commit()
+        self.checkpoints += 1
+
+    def rollback(self):
+        """Discard everything written since the last checkpoint and commit nothing more"""
+        self.conn.rollback()
+        self.rolled_back = True
+
+    def rollback_to_checkpoint(self):
+        """Discard what was written since the last checkpoint and carry on, e.g. after a failed batch"""
+        self.conn.rollback()
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            if exc_type is not None and not self.rolled_back:
+                self.rollback()
+            if self.rolled_back:
+                print(f"\nDatabase session rolled back ({self.checkpoints} earlier checkpoints kept)")
+                return False
+
+            commit_start = time.perf_counter()
+            self.conn.commit()
+            commit_time = time.perf_counter() - commit_start
+            total_time = time.perf_counter() - self.start_time
+
+            print(f"\nDatabase session committed in {total_time:.2f}s:")
+            print(f"- {self.checkpoints + 1} commits ({self.checkpoints} checkpoints)")
+            print(f"- final commit took {commit_time * 1000:.1f} ms")
+            return False
+        finally:
+            self.conn.close()
@@ -0,0 +1,213 @@
+import os
+import sys
+import time
+import traceback
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from db_session import DBSession
+from transform_spend import transform_cost_explorer_spend
+from validate_spend import (extract_account_details_from_filename, validate_cost_explorer_file,
+                            validate_cost_explorer_transform)
+from update_account_details import upsert_accounts
+from update_service_details import resolve_service_ids
+from update_spend import (bulk_upsert_daily_spend, bulk_upsert_service_monthly_spend, stage_touched_months,
+                          cascade_daily_spend, cascade_service_monthly_spend)
+from instrument import RunMetrics, get_peak_rss_mb
+from spend_schema import concat_spend_frames
+from ingest_ledger import (ensure_ledger_tables, hash_file, load_ingested_hashes, record_ingest, get_date_range,
+                           show_ledger)
+
+# Number of parsed files written per commit
+WRITE_BATCH_SIZE = 20
+
+def list_spend_files(folder):
+    """List raw per-account spend files in a folder, skipping transformed outputs"""
+    return sorted(
+        os.path.join(folder, name) for name in os.listdir(folder)
+        if name.endswith('.csv') and not name.startswith('transformed_')
+    )
+
+def process_spend_file(file_path, file_type):
+    """
+    Parse, validate and transform one per-account Cost Explorer file.
+    Runs in a worker process, so it never touches the database.
+    Returns: dict with file, status, reason, rows, seconds and the long frame (or None)
+    """
+    start_time = time.perf_counter()
+    result = {'file': file_path, 'status': 'failed', 'reason': '', 'rows': 0, 'df': None}
+    try:
+        account_id, account_name = extract_account_details_from_filename(os.path.basename(file_path))
+        if not account_id or not account_name:
+            result['reason'] = "Could not extract account details from filename"
+            return result
+
+        df = pd.read_csv(file_path)
+
+        is_valid, message, service_totals = validate_cost_explorer_file(df)
+        if not is_valid:
+            result['reason'] = f"Pre-transpose validation failed: {message}"
+            return result
+
+        date_col = 'day' if file_type == 1 else 'month'
+        df_transformed = transform_cost_explorer_spend(df, account_id, account_name, date_col)
+        if df_transformed is None:
+            result['reason'] = "Failed to transform file"
+            return result
+
+        is_valid, message = validate_cost_explorer_transform(df_transformed, service_totals)
+        if not is_valid:
+            result['reason'] = f"Post-transpose validation failed: {message}"
+            return result
+
+        result.update(status='parsed', rows=len(df_transformed), df=df_transformed)
+        return result
+
+    except Exception as e:
+        result['reason'] = f"Error processing file: {str(e)}"
+        return result
+    finally:
+        result['seconds'] = round(time.perf_counter() - start_time, 3)
+        result['peak_rss_mb'] = get_peak_rss_mb()
+
+def ledger_entry(result, entity, file_type):
+    """Ingestion ledger entry for one processed file"""
+    start_date, end_date = get_date_range(result['df']) if result['df'] is not None else (None, None)
+    return {
+        'file_hash': result['file_hash'], 'entity': entity, 'file_type': file_type,
+        'file_name': os.path.basename(result['file']), 'start_date': start_date, 'end_date': end_date,
+        'row_count': result['rows'], 'status': result['status'], 'reason': result['reason'],
+    }
+
+def write_spend_batch(conn, df_batch, entity, file_type, db_path, metrics):
+    """
+    Write one batch of parsed per-account frames: accounts, services and spend in
+    bulk, then the monthly rollups, discrepancy check and cube refresh once for the
+    whole batch. The caller commits.
+    Returns:
+        int: Number of spend rows written
+    """
+    # One account row per file, written in a single round trip
+    with metrics.stage('account_update', rows_in=df_batch['account_id'].nunique()):
+        if not upsert_accounts(df_batch, entity, conn):
+            raise RuntimeError("Failed to update account details")
+
+    with metrics.stage('service_resolution', rows_in=len(df_batch)):
+        success, service_ids = resolve_service_ids(df_batch['service_name'].unique(), db_path, conn)
+        if not success:
+            raise RuntimeError("Failed to resolve service_ids")
+        df_batch['service_id'] = df_batch['service_name'].map(service_ids)
+
+    with metrics.stage('spend_upsert', rows_in=len(df_batch)) as stage:
+        if file_type == 1:
+            stage['rows_out'] = bulk_upsert_daily_spend(conn, df_batch)
+        else:
+            stage['rows_out'] = bulk_upsert_service_monthly_spend(conn, df_batch)
+
+    with metrics.stage('rollup', rows_in=len(df_batch)) as stage:
+        stage['rows_out'] = stage_touched_months(conn, df_batch)
+        if file_type == 1:
+            cascade_daily_spend(conn)
+        else:
+            cascade_service_monthly_spend(conn)
+    return len(df_batch)
+
+def write_batch(session, results, entity, file_type, metrics):
+    """Write a batch of parsed files on the shared session connection and commit once"""
+    df_batch = concat_spend_frames([r['df'] for r in results])
+    write_spend_batch(session.conn, df_batch, entity, file_type, session.db_path, metrics)
+
+    # Ledger entries are committed together with the data they describe
+    record_ingest(session.conn, [ledger_entry(dict(r, status='loaded'), entity, file_type) for r in results])
+    session.checkpoint()
+
+def ingest_spend_folder(folder, entity, file_type=1, max_workers=None, batch_size=WRITE_BATCH_SIZE):
+    """
+    Ingest every per-account spend file in a folder.
+    Files are parsed, validated and transformed in a process pool; this process is
+    the single writer and commits every batch_size files. Files whose contents
+    are already in the ingestion ledger are skipped without being parsed.
+    Returns: list of per-file status dicts
+    """
+    files = list_spend_files(folder)
+    if not files:
+        print(f"No spend files found in {folder}")
+        return []
+
+    print(f"\nIngesting {len(files)} files from {folder}")
+    # Databases bootstrapped before the ledger existed get its tables once per run
+    ensure_ledger_tables()
+    start_time = time.perf_counter()
+    statuses = []
+    pending = []
+
+    def flush(session):
+        # On a failed batch only that batch is lost; earlier batches are committed
+        try:
+            write_batch(session, pending, entity, file_type, metrics)
+            status = 'loaded'
+            reason = ''
+        except Exception as e:
+            traceback.print_exc()
+            session.rollback_to_checkpoint()
+            status = 'failed'
+            reason = f"Database write failed: {str(e)}"
+        for r in pending:
+            r.update(status=status, reason=reason)
+            statuses.append(r)
+        pending.clear()
+
+    with RunMetrics(f"folder_ingest_type{file_type}_{entity}") as metrics, DBSession() as session:
+        # Skip files whose exact contents were already loaded
+        with metrics.stage('hash_files', rows_in=len(files)):
+            file_hashes = {f: hash_file(f) for f in files}
+        loaded_hashes = load_ingested_hashes(session.conn, entity, file_type)
+        to_process = []
+        for f in files:
+            if file_hashes[f] in loaded_hashes:
+                statuses.append({'file': f, 'status': 'skipped', 'reason': 'Already loaded', 'rows': 0, 'seconds': 0.0})
+            else:
+                to_process.append(f)
+        if len(to_process) < len(files):
+            print(f"Skipping {len(files) - len(to_process)} files already in the ingestion ledger")
+
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            futures = [pool.submit(process_spend_file, f, file_type) for f in to_process]
+            for future in as_completed(futures):
+                result = future.result()
+                result['file_hash'] = file_hashes[result['file']]
+                if result['status'] == 'failed':
+                    print(f"Failed: {os.path.basename(result['file'])} - {result['reason']}")
+                    statuses.append(result)
+                    continue
+                metrics.record('parse', result['seconds'], rows_out=result['rows'],
+                               peak_rss_mb=result['peak_rss_mb'], file=os.path.basename(result['file']))
+                pending.append(result)
+                if len(pending) >= batch_size:
+                    flush(session)
+        if pending:
+            flush(session)
+
+        # Failures are recorded last so a rolled back batch can't discard them
+        record_ingest(session.conn, [ledger_entry(s, entity, file_type) for s in statuses if s['status'] == 'failed'])
+
+    for status in statuses:
+        status.pop('df', None)
+
+    elapsed = time.perf_counter() - start_time
+    loaded = sum(1 for s in statuses if s['status'] == 'loaded')
+    rows = sum(s['rows'] for s in statuses if s['status'] == 'loaded')
+    print(f"\nFolder ingest completed in {elapsed:.2f}s:")
+    print(f"- {loaded} of {len(files)} files loaded")
+    print(f"- {len(files) - len(to_process)} files skipped as unchanged")
+    print(f"- {rows} spend rows written")
+
+    # Per-file outcome of this run from the ledger; skipped files show their earlier load
+    print("\nPer-file status (ingest_ledger):")
+    show_ledger(entity=entity, file_type=file_type, file_hashes=list(file_hashes.values()))
+    return statuses
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        print("Usage: python ingest_folder.py <folder> <entity> [file_type: 1=daily, 2=monthly]")
+        sys.exit(1)
+    ingest_spend_folder(sys.argv[1], sys.argv[2], int(sys.argv[3]) if len(sys.argv) > 3 else 1)
@@ -0,0 +1,140 @@
+import sys
+import hashlib
+import pandas as pd
+from datetime import datetime
+from db_session import connect, get_db_path
+from create_db import read_sql, get_table_sql
+from date_keys import encode_dates, decode_dates
+
+LEDGER_TABLES = ['ingest_ledger', 'ingest_new_accounts']
+
+# Files are hashed in blocks of this size so large exports are never loaded whole
+HASH_BLOCK_SIZE = 1024 * 1024
+
+LEDGER_COLUMNS = [
+    'file_hash', 'entity', 'file_type', 'file_name', 'start_date', 'end_date',
+    'row_count', 'status', 'reason', 'ingested_at',
+]
+
+def hash_file(file_path):
+    """SHA-256 of the file contents"""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def ensure_ledger_tables(db_path=None):
+    """
+    Create the ledger tables on databases bootstrapped before they existed.
+    Called once per run, before the first ledger lookup.
+    Returns:
+        list: Names of the tables created
+    """
+    conn = connect(db_path)
+    try:
+        cursor = conn.cursor()
+        created = [table for table in LEDGER_TABLES if get_table_sql(cursor, table) is None]
+        for table in created:
+            cursor.execute(read_sql(table))
+        conn.commit()
+    finally:
+        conn.close()
+    if created:
+        print(f"Created ledger tables: {', '.join(created)}")
+    return created
+
+def get_date_range(df):
+    """First and last day/month key of a transformed frame, or (None, None)"""
+    for col in ['day', 'month']:
+        if col in df.columns and not df.empty:
+            # Keys sort in date order, so only the two ends are decoded
+            keys = encode_dates(df[col], col)
+            first, last = decode_dates([keys.min(), keys.max()], col)
+            return first, last
+    return None, None
+
+def find_ingested(conn, file_hash, entity, file_type):
+    """
+    Look up a successful earlier load of the same file contents.
+    Returns:
+        sqlite3.Row or None: The ledger row if the file was already loaded
+    """
+    cursor = conn.cursor()
+    cursor.execute("""
+        SELECT * FROM ingest_ledger
+        WHERE file_hash = ? AND entity = ? AND file_type = ? AND status = 'loaded'
+    """, (file_hash, entity, file_type))
+    return cursor.fetchone()
+
+def load_ingested_hashes(conn, entity, file_type):
+    """Hashes of every file already loaded for an entity and file type"""
+    cursor = conn.cursor()
+    cursor.execute("""
+        SELECT file_hash FROM ingest_ledger
+        WHERE entity = ? AND file_type = ? AND status = 'loaded'
+    """, (entity, file_type))
+    return {row[0] for row in cursor.fetchall()}
+
+def record_ingest(conn, entries):
+    """
+    Record load attempts in the ledger; a later attempt on the same file replaces
+    the earlier one. The caller commits.
+    Args:
+        conn (sqlite3.Connection): Open database connection
+        entries (list): Dicts with file_hash, entity, file_type, file_name, status and
+            optionally start_date, end_date, row_count and reason
+    """
+    ingested_at = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    rows = [(
+        entry['file_hash'], entry['entity'], entry['file_type'], entry['file_name'],
+        entry.get('start_date'), entry.get('end_date'), entry.get('row_count', 0),
+        entry['status'], entry.get('reason', ''), ingested_at,
+    ) for entry in entries]
+    conn.cursor().executemany(f"""
+        INSERT OR REPLACE INTO ingest_ledger ({', '.join(LEDGER_COLUMNS)})
+        VALUES ({', '.join('?' * len(LEDGER_COLUMNS))})
+    """, rows)
+
+def record_new_accounts(conn, new_accounts, file_hash=None, file_name=None):
+    """
+    Record the accounts a load added, one row per account and load (file_hash,
+    or '' for loads without a file). The caller commits.
+    Args:
+        new_accounts (list): Dicts with account_id, account_name and optionally hod_id, entity
+    """
+    added_at = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    conn.cursor().executemany("""
+        INSERT OR IGNORE INTO ingest_new_accounts
+        (account_id, account_name, hod_id, entity, file_hash, file_name, added_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    """, [(str(account['account_id']), account['account_name'], account.get('hod_id'),
+           account.get('entity'), file_hash or '', file_name, added_at) for account in new_accounts])
+
+# Columns shown for the files of one folder run
+FILE_STATUS_COLUMNS = ['file_name', 'status', 'row_count', 'start_date', 'end_date', 'reason', 'ingested_at']
+
+def show_ledger(db_path=None, limit=20, entity=None, file_type=None, file_hashes=None):
+    """
+    Print the most recent ledger entries, or with file_hashes the per-file status
+    of those files (e.g. one folder run) for the given entity and file type.
+    """
+    conn = connect(db_path)
+    try:
+        if file_hashes is None:
+            ledger = pd.read_sql_query(
+                "SELECT * FROM ingest_ledger ORDER BY ingested_at DESC LIMIT ?", conn, params=(limit,)
+            )
+        else:
+            ledger = pd.read_sql_query(f"""
+                SELECT {', '.join(FILE_STATUS_COLUMNS)} FROM ingest_ledger
+                WHERE entity = ? AND file_type = ? AND file_hash IN ({', '.join('?' * len(file_hashes))})
+                ORDER BY status, file_name
+            """, conn, params=[entity, file_type] + list(file_hashes))
+    finally:
+        conn.close()
+    print(ledger.to_string(index=False))
+    return ledger
+
+if __name__ == "__main__":
+    show_ledger(sys.argv[1] if len(sys.argv) > 1 else get_db_path())
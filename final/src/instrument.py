@@ -0,0 +1,124 @@
+import os
+import sys
+import json
+import time
+import cProfile
+from datetime import datetime
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+# Set to 1 to dump a cProfile of every instrumented run next to its metrics
+PROFILE_ENV = 'CLOUDREV_PROFILE'
+
+# Directory for the metrics files, overriding final/data_files/metrics
+METRICS_DIR_ENV = 'CLOUDREV_METRICS_DIR'
+
+def get_metrics_dir():
+    """Get the metrics directory: $CLOUDREV_METRICS_DIR, or final/data_files/metrics"""
+    if os.environ.get(METRICS_DIR_ENV):
+        return os.path.abspath(os.environ[METRICS_DIR_ENV])
+    current_dir = os.path.dirname(os.path.abspath(__file__))
+    return os.path.join(os.path.dirname(current_dir), 'data_files', 'metrics')
+
+def get_peak_rss_mb():
+    """Peak resident set size of this process in MB, or None if unknown"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in KiB on Linux
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+class RunMetrics:
+    """
+    Per-stage timings for one run, written as JSON lines on exit.
+    Wrap each stage in metrics.stage(name, rows_in) and set stage['rows_out']
+    inside the block. Files go to metrics_dir if given, else get_metrics_dir():
+
+        with RunMetrics('spend_monthly') as metrics:
+            with metrics.stage('transform', rows_in=len(df)) as stage:
+                out = transform(df)
+                stage['rows_out'] = len(out)
+    """
+
+    def __init__(self, run_name, profile=None, metrics_dir=None):
+        self.run_name = run_name
+        self.metrics_dir = metrics_dir
+        self.run_id = f"{run_name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        self.profile = os.environ.get(PROFILE_ENV) == '1' if profile is None else profile
+        self.profiler = None
+        self.stages = []
+
+    def __enter__(self):
+        if self.profile:
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
+        return self
+
+    def record(self, name, seconds, rows_in=None, rows_out=None, status='ok', peak_rss_mb=None, **extra):
+        """Add one stage record, e.g. for work timed in a worker process"""
+        rows = rows_out if rows_out is not None else rows_in
+        record = {
+            'run_id': self.run_id, 'stage': name, 'status': status,
+            'seconds': round(seconds, 4), 'rows_in': rows_in, 'rows_out': rows_out,
+            'rows_per_sec': round(rows / seconds, 1) if rows and seconds > 0 else None,
+            'peak_rss_mb': peak_rss_mb if peak_rss_mb is not None else get_peak_rss_mb(),
+        }
+        record.update(extra)
+        self.stages.append(record)
+        return record
+
+    @contextmanager
+    def stage(self, name, rows_in=None):
+        """Time the enclosed block; set counts['rows_out'] inside it"""
+        counts = {'rows_out': None}
+        status = 'error'
+        start_time = time.perf_counter()
+        try:
+            yield counts
+            status = 'ok'
+        finally:
+            self.record(name, time.perf_counter() - start_time, rows_in, counts['rows_out'], status)
+
+    def summary(self):
+        """Print one line per stage name, summed over repeated stages"""
+        totals = {}
+        for record in self.stages:
+            total = totals.setdefault(record['stage'], {'calls': 0, 'seconds': 0.0, 'rows': 0, 'peak_rss_mb': None})
+            total['calls'] += 1
+            total['seconds'] += record['seconds']
+            rows = record['rows_out'] if record['rows_out'] is not None else record['rows_in']
+            total['rows'] += rows or 0
+            if record['peak_rss_mb'] is not None:
+                total['peak_rss_mb'] = max(total['peak_rss_mb'] or 0, record['peak_rss_mb'])
+        print(f"\nStage timings ({self.run_id}):")
+        for name, total in totals.items():
+            rate = f"{total['rows'] / total['seconds']:,.0f} rows/sec" if total['rows'] and total['seconds'] > 0 else '-'
+            print(f"- {name:<32}{total['calls']:>4}x {total['seconds']:>9.3f}s  {rate:>20}  peak RSS {total['peak_rss_mb']} MB")
+
+    def save(self):
+        """Write the stage records as JSON lines and the profile, if enabled"""
+        metrics_dir = self.metrics_dir or get_metrics_dir()
+        os.makedirs(metrics_dir, exist_ok=True)
+        output_file = os.path.join(metrics_dir, f'{self.run_id}.jsonl')
+        with open(output_file, 'w') as f:
+            for record in self.stages:
+                f.write(json.dumps(record) + '\n')
+        print(f"Stage metrics saved to {output_file}")
+
+        if self.profiler is not None:
+            profile_file = os.path.join(metrics_dir, f'{self.run_id}.prof')
+            self.profiler.dump_stats(profile_file)
+            print(f"Profile saved to {profile_file}")
+        return output_file
+
+    def __exit__(self, exc_type, exc, tb):
+        if self.profiler is not None:
+            self.profiler.disable()
+        if self.stages:
+            self.summary()
+            self.save()
+        return False
@@ -2,13 +2,15 @@ import os
 import pandas as pd
 import traceback
 from update_account_details import validate_and_update_accounts_from_file
-from update_account_service_daily_spend import update_account_service_daily_spend
-from update_account_service_monthly_spend import update_account_service_monthly_spend
 from update_account_monthly_spend import update_account_monthly_spend
 from transform_aop import transform_aop_data
 from update_aop_budget import update_aop_budget_monthly
-from validate_spend import validate_pre_transpose, validate_post_transpose
-from transform_spend import transform_spend_data
+from spend_pipeline import SpendPipeline
+from db_session import DBSession, connect
+from ingest_ledger import ensure_ledger_tables, hash_file, find_ingested, record_ingest, get_date_range
+from ingest_folder import ingest_spend_folder
+from instrument import RunMetrics
+from stream_daily_spend import stream_daily_spend_file, is_consolidated_daily_file, STREAMING_THRESHOLD_BYTES
 
 def get_user_choice():
     """Get user's choice of operation"""
@@ -58,6 +60,73 @@ def get_file_type_choice():
             return int(choice)
         print("Invalid choice. Please enter 1, 2, or 3.")
 
+def record_file_status(file_hash, entity, file_type, file_path, status, reason='', conn=None, df=None):
+    """Record a single-file load attempt, with the date range and row count of df if given"""
+    own_conn = conn is None
+    conn = conn or connect()
+    start_date, end_date = get_date_range(df) if df is not None else (None, None)
+    record_ingest(conn, [{
+        'file_hash': file_hash, 'entity': entity, 'file_type': file_type,
+        'file_name': os.path.basename(file_path), 'start_date': start_date, 'end_date': end_date,
+        'row_count': len(df) if df is not None else None, 'status': status, 'reason': reason,
+    }])
+    if own_conn:
+        conn.commit()
+        conn.close()
+
+def process_single_spend_file(file_path, file_hash, entity, file_type, metrics):
+    """Validate, transform and load one consolidated spend file, timing every stage"""
+    try:
+        # The file is parsed once; every later stage works on the in-memory frame
+        pipeline = SpendPipeline(file_path, file_type, metrics)
+        is_valid, message = pipeline.run()
+        if not is_valid:
+            print(message)
+            record_file_status(file_hash, entity, file_type, file_path, 'failed', message)
+            return
+        transformed_df = pipeline.transformed
+        # The transformed CSV is only an artifact now, written while the database stages run
+        pipeline.save_artifact(background=True)
+        # All database stages share one connection and commit once at the end
+        with DBSession() as session:
+            # Update account details
+            with metrics.stage('account_update', rows_in=len(transformed_df)):
+                accounts_ok = validate_and_update_accounts_from_file(transformed_df, entity, session.conn, file_hash)
+            if accounts_ok:
+                print("Account details updated successfully")
+            else:
+                print("Failed to update account details")
+                session.rollback()
+                record_file_status(file_hash, entity, file_type, file_path, 'failed', "Failed to update account details")
+                return
+            # Update monthly spend
+            with metrics.stage('spend_upsert', rows_in=len(transformed_df)) as stage:
+                summary = update_account_monthly_spend(transformed_df, session.conn)
+                if summary is not None:
+                    stage['rows_out'] = summary['inserted'] + summary['updated']
+            if summary is not None:
+                print(f"Monthly spend updated successfully: {summary['inserted']} inserted, "
+                      f"{summary['updated']} updated, {summary['unchanged']} unchanged")
+                if not summary['largest_deltas'].empty:
+                    print("Largest spend changes:")
+                    print(summary['largest_deltas'].to_string(index=False))
+                # The ledger entry commits together with the data
+                record_file_status(file_hash, entity, file_type, file_path, 'loaded',
+                                   conn=session.conn, df=transformed_df)
+            else:
+                print("Failed to update monthly spend")
+                session.rollback()
+                record_file_status(file_hash, entity, file_type, file_path, 'failed', "Failed to update monthly spend")
+                return
+        print(f"Successfully processed file: {file_path}")
+    except Exception as e:
+        print(f"Error processing file {file_path}: {str(e)}")
+        traceback.print_exc()
+        record_file_status(file_hash, entity, file_type, file_path, 'failed', f"Error processing file: {str(e)}")
+    finally:
+        if 'pipeline' in locals():
+            pipeline.wait_for_artifact()
+
 def main():
     """Main function to process files."""
     print("\nWelcome to CloudRev Data Processing Tool")
@@ -80,10 +149,12 @@ def main():
             if not transformed_file:
                 print("Error transforming AOP data")
                 return
-            if update_aop_budget_monthly(transformed_file):
-                print("AOP budget updated successfully")
-            else:
-                print("Failed to update AOP budget")
+            with DBSession() as session:
+                if update_aop_budget_monthly(transformed_file, session.conn):
+                    print("AOP budget updated successfully")
+                else:
+                    print("Failed to update AOP budget")
+                    session.rollback()
         except Exception as e:
             print(f"Error processing AOP file {file_path}: {str(e)}")
             traceback.print_exc()
@@ -91,59 +162,39 @@ def main():
     elif choice == 2:
         # Spend
         file_type = get_file_type_choice()
-        file_path = input("\nEnter path to Spend file: ").strip()
+        file_path = input("\nEnter path to Spend file or per-account folder: ").strip()
+        if os.path.isdir(file_path):
+            # Folder mode: one Cost Explorer file per linked account
+            if file_type == 3:
+                print("Folder mode supports Account Service Daily/Monthly files only")
+                return
+            ingest_spend_folder(file_path, entity, file_type)
+            return
         if not os.path.isfile(file_path):
             print(f"File not found: {file_path}")
             return
-        try:
-            # Read the file
-            df = pd.read_csv(file_path, header=None)
-            # Validate pre-transpose
-            is_valid, message, account_totals, month_totals = validate_pre_transpose(df, file_type)
-            if not is_valid:
-                print(f"Pre-transpose validation failed: {message}")
-                return
-            # Transform the data
-            transformed_df = transform_spend_data(file_path, file_type)
-            if transformed_df is None:
-                print("Error transforming data")
-                return
-            # Debug: Print before post-transpose validation
-            print("[DEBUG] About to call validate_post_transpose")
-            print(f"[DEBUG] transformed_df columns: {transformed_df.columns.tolist()}")
-            print(f"[DEBUG] transformed_df shape: {transformed_df.shape}")
-            print(transformed_df.head())
-            print(f"[DEBUG] account_totals keys: {list(account_totals.keys())}")
-            print(f"[DEBUG] month_totals keys: {list(month_totals.keys())}")
-            # Validate post-transpose
-            result = validate_post_transpose(transformed_df, file_type, (account_totals, month_totals))
-            print(f"[DEBUG] validate_post_transpose result: {result}")
-            if isinstance(result, tuple):
-                is_valid_post, message_post = result
-            else:
-                is_valid_post = result
-                message_post = ''
-            if not is_valid_post:
-                print(f"Post-transpose validation failed: {message_post}")
-                return
-            # Save the transformed data
-            output_file = os.path.join(os.path.dirname(file_path), f"transformed_{os.path.basename(file_path)}")
-            transformed_df.to_csv(output_file, index=False)
-            print(f"Transformed data saved to: {output_file}")
-            # Update account details
-            if validate_and_update_accounts_from_file(output_file, entity):
-                print("Account details updated successfully")
-            else:
-                print("Failed to update account details")
-            # Update monthly spend
-            if update_account_monthly_spend(output_file):
-                print("Monthly spend updated successfully")
+        # Databases bootstrapped before the ledger existed get its tables once per run
+        ensure_ledger_tables()
+        # Skip files whose exact contents were already loaded
+        file_hash = hash_file(file_path)
+        conn = connect()
+        previous = find_ingested(conn, file_hash, entity, file_type)
+        conn.close()
+        if previous:
+            print(f"Skipping {file_path}: identical file already loaded at {previous['ingested_at']} "
+                  f"({previous['row_count']} rows, {previous['start_date']} to {previous['end_date']})")
+            return
+        if (file_type == 1 and os.path.getsize(file_path) > STREAMING_THRESHOLD_BYTES
+                and is_consolidated_daily_file(file_path)):
+            # Large consolidated daily file: stream it in chunks instead of loading it whole.
+            # The ledger entry (row count, date range) is recorded with the data.
+            if stream_daily_spend_file(file_path, entity=entity, file_hash=file_hash):
+                print(f"Successfully processed file: {file_path}")
             else:
-                print("Failed to update monthly spend")
-            print(f"Successfully processed file: {file_path}")
-        except Exception as e:
-            print(f"Error processing file {file_path}: {str(e)}")
-            traceback.print_exc()
+                record_file_status(file_hash, entity, file_type, file_path, 'failed', "Streaming load failed")
+            return
+        with RunMetrics(f"spend_type{file_type}_{entity}") as metrics:
+            process_single_spend_file(file_path, file_hash, entity, file_type, metrics)
         return
 
 if __name__ == "__main__":
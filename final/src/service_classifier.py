@@ -0,0 +1,180 @@
+import os
+import pickle
+import numpy as np
+import scipy.sparse as sp
+from sklearn.feature_extraction.text import TfidfVectorizer
+from db_session import connect
+
+# Minimum cosine similarity for copying the type of an existing service
+SIMILARITY_THRESHOLD = 0.3
+
+# Refit from scratch once this share of rows was added incrementally,
+# so the vocabulary and IDF weights do not drift too far
+REFIT_RATIO = 0.2
+
+CACHE_FILENAME = 'service_classifier.pkl'
+
+# In-process cache so repeated calls don't unpickle the model every time
+_classifiers = {}
+
+def keyword_service_type(service_name):
+    """Fallback keyword-based categorization used when no similar service exists."""
+    service_name_lower = service_name.lower()
+    if any(word in service_name_lower for word in ['ec2', 'lambda', 'compute', 'server']):
+        return 'Compute'
+    elif any(word in service_name_lower for word in ['s3', 'storage', 'backup']):
+        return 'Storage'
+    elif any(word in service_name_lower for word in ['vpc', 'network', 'route', 'dns']):
+        return 'Network'
+    elif any(word in service_name_lower for word in ['iops', 'throughput']):
+        return 'IOPS'
+    elif any(word in service_name_lower for word in ['rds', 'dynamodb', 'database']):
+        return 'DB'
+    elif any(word in service_name_lower for word in ['ml', 'ai', 'sagemaker', 'comprehend']):
+        return 'AI'
+    return 'Others'
+
+def get_service_details_version(cursor):
+    """Cheap version key for service_details: (row count, max service_id)."""
+    cursor.execute("SELECT COUNT(*), MAX(service_id) FROM service_details")
+    count, max_id = cursor.fetchone()
+    return (count, max_id or 0)
+
+class ServiceTypeClassifier:
+    """
+    TF-IDF nearest-neighbour classifier over the names in service_details.
+    Fitted once, persisted next to the database and extended incrementally
+    as new services are created.
+    """
+
+    def __init__(self):
+        self.vectorizer = None
+        self.matrix = None
+        self.service_types = []
+        self.fitted_rows = 0
+        self.version = None
+
+    def fit(self, service_names, service_types, version):
+        """Fit the vectorizer on all existing service names."""
+        self.service_types = list(service_types)
+        self.fitted_rows = len(self.service_types)
+        self.version = version
+        if not self.service_types:
+            self.vectorizer = None
+            self.matrix = None
+            return self
+        self.vectorizer = TfidfVectorizer()
+        # Rows are L2-normalized, so a dot product is the cosine similarity
+        self.matrix = self.vectorizer.fit_transform(service_names).tocsr()
+        return self
+
+    def classify(self, service_names):
+        """
+        Classify a batch of service names with a single sparse matrix product.
+        Returns: list of service types in the same order as service_names
+        """
+        service_names = list(service_names)
+        if self.matrix is None:
+            return [keyword_service_type(service_name) for service_name in service_names]
+
+        similarities = (self.vectorizer.transform(service_names) @ self.matrix.T).toarray()
+        best_idx = similarities.argmax(axis=1)
+        best_score = similarities[np.arange(len(service_names)), best_idx]
+
+        service_types = []
+        for service_name, idx, score in zip(service_names, best_idx, best_score):
+            if score > SIMILARITY_THRESHOLD:
+                service_types.append(self.service_types[idx])
+            else:
+                service_types.append(keyword_service_type(service_name))
+        return service_types
+
+    def add(self, service_names, service_types, version):
+        """Append newly created services without refitting the vocabulary."""
+        service_names = list(service_names)
+        if not service_names:
+            return self
+        if self.matrix is None:
+            return self.fit(service_names, service_types, version)
+        self.matrix = sp.vstack([self.matrix, self.vectorizer.transform(service_names)]).tocsr()
+        self.service_types.extend(service_types)
+        self.version = version
+        return self
+
+    def needs_refit(self):
+        """True once enough rows were added incrementally to warrant a full refit."""
+        added = len(self.service_types) - self.fitted_rows
+        return added > max(1, self.fitted_rows) * REFIT_RATIO
+
+def get_cache_path(db_path):
+    """Classifier cache lives in the same directory as the database."""
+    return os.path.join(os.path.dirname(os.path.abspath(db_path)), CACHE_FILENAME)
+
+def save_classifier(classifier, db_path):
+    """Persist the classifier next to the database."""
+    try:
+        with open(get_cache_path(db_path), 'wb') as f:
+            pickle.dump(classifier, f)
+    except Exception as e:
+        print(f"Error saving service classifier: {str(e)}")
+
+def save_after_commit(classifier, db_path, cursor):
+    """
+    Persist the classifier once the transaction behind cursor commits, so the
+    on-disk cache never describes service_details rows that were rolled back.
+    """
+    conn = cursor.connection
+    if conn.in_transaction and hasattr(conn, 'after_commit'):
+        conn.after_commit(('service_classifier', db_path), lambda: save_classifier(classifier, db_path))
+    else:
+        save_classifier(classifier, db_path)
+
+def load_classifier(db_path, cursor=None):
+    """
+    Return a classifier matching the current service_details version.
+    Uses the in-process cache, then the on-disk cache, and refits only when
+    both are stale or too many rows were added since the last fit.
+    """
+    own_conn = cursor is None
+    if own_conn:
+        conn = connect(db_path)
+        cursor = conn.cursor()
+    try:
+        version = get_service_details_version(cursor)
+
+        classifier = _classifiers.get(db_path)
+        if classifier is not None and classifier.version == version and not classifier.needs_refit():
+            return classifier
+
+        cache_path = get_cache_path(db_path)
+        if os.path.exists(cache_path):
+            try:
+                with open(cache_path, 'rb') as f:
+                    classifier = pickle.load(f)
+            except Exception as e:
+                print(f"Ignoring unreadable service classifier cache: {str(e)}")
+                classifier = None
+            if classifier is not None and classifier.version == version and not classifier.needs_refit():
+                _classifiers[db_path] = classifier
+                return classifier
+
+        # Cache missing or stale, fit once on the current table
+        cursor.execute("SELECT service_name, service_type FROM service_details ORDER BY service_id")
+        rows = cursor.fetchall()
+        classifier = ServiceTypeClassifier().fit(
+            [r[0] for r in rows], [r[1] for r in rows], version
+        )
+        _classifiers[db_path] = classifier
+        save_after_commit(classifier, db_path, cursor)
+        return classifier
+    finally:
+        if own_conn:
+            conn.close()
+
+def record_new_services(db_path, service_names, service_types, cursor):
+    """Incrementally update the cached classifier after services were inserted."""
+    classifier = _classifiers.get(db_path)
+    if classifier is None:
+        return
+    classifier.add(service_names, service_types, get_service_details_version(cursor))
+    save_after_commit(classifier, db_path, cursor)
@@ -0,0 +1,159 @@
+import sys
+import time
+import pandas as pd
+from db_session import connect, get_db_path
+from create_db import read_sql, get_table_sql
+
+# Spend vs AOP aggregate behind the dashboards:
+# entity x hod_id x service_type x month with spend, aop_amount and variance.
+# AOP is budgeted per account, so it only appears on the ALL_SERVICES rows
+# (account-level spend); the per-service-type rows carry spend only.
+CUBE_TABLE = 'spend_aop_cube'
+ALL_SERVICES = 'All'
+# Accounts missing from account_details (or without entity/HOD) are grouped here
+UNKNOWN = 'Unknown'
+
+# Fact rows for the months of the staged partitions, resolved to the cube dimensions
+CUBE_FACTS_SQL = f"""
+    WITH facts AS (
+        SELECT account_id, month, '{ALL_SERVICES}' AS service_type, spend, NULL AS aop_amount
+        FROM as_acct_monthly
+        WHERE month IN (SELECT month FROM cube_partitions)
+        UNION ALL
+        SELECT account_id, month, '{ALL_SERVICES}', 0.0, aop_amount
+        FROM aop_budget_monthly
+        WHERE month IN (SELECT month FROM cube_partitions)
+        UNION ALL
+        SELECT s.account_id, s.month, COALESCE(d.service_type, 'Others'), s.spend, NULL
+        FROM as_acct_service_monthly s
+        LEFT JOIN service_details d ON d.service_id = s.service_id
+        WHERE s.month IN (SELECT month FROM cube_partitions)
+    )
+    INSERT INTO {CUBE_TABLE} (entity, hod_id, service_type, month, spend, aop_amount, variance)
+    SELECT p.entity, p.hod_id, f.service_type, f.month,
+           SUM(f.spend), SUM(f.aop_amount), SUM(f.spend) - SUM(f.aop_amount)
+    FROM facts f
+    LEFT JOIN account_details a ON a.account_id = f.account_id
+    JOIN cube_partitions p
+      ON p.entity = COALESCE(a.entity, '{UNKNOWN}')
+     AND p.hod_id = COALESCE(a.hod_id, '{UNKNOWN}')
+     AND p.month = f.month
+    GROUP BY p.entity, p.hod_id, f.service_type, f.month
+"""
+
+def ensure_cube_table(conn):
+    """
+    Create the cube on databases bootstrapped before it existed.
+    Returns:
+        bool: True if the cube already holds rows
+    """
+    cursor = conn.cursor()
+    if get_table_sql(cursor, CUBE_TABLE) is None:
+        cursor.execute(read_sql(CUBE_TABLE))
+        return False
+    cursor.execute(f"SELECT EXISTS (SELECT 1 FROM {CUBE_TABLE})")
+    return bool(cursor.fetchone()[0])
+
+def stage_cube_partitions(conn, keys=None):
+    """
+    Load the (entity, hod_id, month) partitions behind a set of (account_id, month)
+    keys into the temp table cube_partitions.
+    Args:
+        conn (sqlite3.Connection): Open database connection
+        keys (iterable or str): (account_id, month) pairs, the name of a table holding
+            them (e.g. the touched_months temp table), or None for every partition
+    Returns:
+        int: Number of partitions staged
+    """
+    cursor = conn.cursor()
+    cursor.execute("CREATE TEMP TABLE IF NOT EXISTS cube_partitions (entity TEXT NOT NULL, hod_id TEXT NOT NULL, month DATE NOT NULL, PRIMARY KEY (entity, hod_id, month))")
+    cursor.execute("DELETE FROM cube_partitions")
+
+    if keys is None:
+        source = """(SELECT account_id, month FROM as_acct_monthly
+                     UNION SELECT account_id, month FROM aop_budget_monthly
+                     UNION SELECT account_id, month FROM as_acct_service_monthly)"""
+    elif isinstance(keys, str):
+        source = keys
+    else:
+        cursor.execute("CREATE TEMP TABLE IF NOT EXISTS cube_keys (account_id TEXT NOT NULL, month DATE NOT NULL)")
+        cursor.execute("DELETE FROM cube_keys")
+        cursor.executemany("INSERT INTO cube_keys (account_id, month) VALUES (?, ?)", keys)
+        source = 'cube_keys'
+
+    cursor.execute(f"""
+        INSERT OR IGNORE INTO cube_partitions (entity, hod_id, month)
+        SELECT DISTINCT COALESCE(a.entity, '{UNKNOWN}'), COALESCE(a.hod_id, '{UNKNOWN}'), k.month
+        FROM {source} k
+        LEFT JOIN account_details a ON a.account_id = k.account_id
+    """)
+    cursor.execute("SELECT COUNT(*) FROM cube_partitions")
+    return cursor.fetchone()[0]
+
+def refresh_cube(conn, keys=None):
+    """
+    Recompute the cube partitions touched by a set of (account_id, month) keys:
+    every (entity, hod_id, month) those keys fall in is deleted and rebuilt from
+    as_acct_monthly, as_acct_service_monthly and aop_budget_monthly.
+    An empty cube, or keys=None, rebuilds every partition.
+    The caller owns the transaction and is responsible for committing.
+    Args:
+        conn (sqlite3.Connection): Open database connection
+        keys (iterable or str): See stage_cube_partitions
+    Returns:
+        int: Number of cube rows written
+    """
+    start_time = time.perf_counter()
+    cursor = conn.cursor()
+    if not ensure_cube_table(conn):
+        keys = None
+
+    partitions = stage_cube_partitions(conn, keys)
+    if keys is None:
+        cursor.execute(f"DELETE FROM {CUBE_TABLE}")
+    else:
+        cursor.execute(f"""
+            DELETE FROM {CUBE_TABLE}
+            WHERE (entity, hod_id, month) IN (SELECT entity, hod_id, month FROM cube_partitions)
+        """)
+    # rowcount is not reported for statements that start with WITH
+    changes_before = conn.total_changes
+    cursor.execute(CUBE_FACTS_SQL)
+    rows = conn.total_changes - changes_before
+
+    print(f"Refreshed {partitions} spend vs AOP partitions ({rows} cube rows) "
+          f"in {time.perf_counter() - start_time:.2f}s")
+    return rows
+
+def rebuild_cube(db_path=None):
+    """Rebuild the whole cube, e.g. after accounts moved to another HOD or entity"""
+    conn = connect(db_path)
+    try:
+        rows = refresh_cube(conn)
+        conn.commit()
+        return rows
+    except Exception as e:
+        print(f"Error rebuilding {CUBE_TABLE}: {str(e)}")
+        conn.rollback()
+        return None
+    finally:
+        conn.close()
+
+def show_cube(db_path=None, limit=20):
+    """Print the latest months of the cube, account-level rows only"""
+    conn = connect(db_path)
+    try:
+        ensure_cube_table(conn)
+        cube = pd.read_sql_query(
+            f"SELECT * FROM {CUBE_TABLE} WHERE service_type = ? ORDER BY month DESC, entity, hod_id LIMIT ?",
+            conn, params=(ALL_SERVICES, limit)
+        )
+    finally:
+        conn.close()
+    print(cube.to_string(index=False))
+    return cube
+
+if __name__ == "__main__":
+    db_path = sys.argv[1] if len(sys.argv) > 1 else get_db_path()
+    if rebuild_cube(db_path) is not None:
+        show_cube(db_path)
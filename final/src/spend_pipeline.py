@@ -0,0 +1,117 @@
+import os
+import threading
+import pandas as pd
+from contextlib import nullcontext
+from transform_spend import transform_spend_frame
+from validate_spend import validate_pre_transpose, validate_post_transpose
+from spend_schema import export_frame, report_memory
+
+class SpendPipeline:
+    """
+    One consolidated spend file, parsed once and handed between stages in memory.
+    The database stages take pipeline.transformed directly instead of re-reading
+    the transformed CSV; that CSV is only written as an artifact, optionally on a
+    background thread while the database stages run.
+
+        pipeline = SpendPipeline(file_path, file_type, metrics)
+        is_valid, message = pipeline.run()
+        pipeline.save_artifact(background=True)
+        ... database stages on pipeline.transformed ...
+        pipeline.wait_for_artifact()
+    """
+
+    def __init__(self, file_path, file_type, metrics=None):
+        self.file_path = file_path
+        self.file_type = file_type
+        self.metrics = metrics
+        self.raw = None
+        self.transformed = None
+        self.pre_totals = None
+        self.artifact_path = os.path.join(os.path.dirname(file_path), f"transformed_{os.path.basename(file_path)}")
+        self._writer = None
+        self._writer_error = None
+        self._artifact_requested = False
+
+    def stage(self, name, rows_in=None):
+        """Time a stage when the pipeline was given a RunMetrics"""
+        if self.metrics is None:
+            return nullcontext({'rows_out': None})
+        return self.metrics.stage(name, rows_in)
+
+    def read(self):
+        """Parse the file once (header=None, as every validator and transform expects)"""
+        with self.stage('read') as stage:
+            self.raw = pd.read_csv(self.file_path, header=None)
+            stage['rows_out'] = len(self.raw)
+
+    def validate_pre(self):
+        """Pre-transpose validation of the parsed file"""
+        with self.stage('pre_validate', rows_in=len(self.raw)):
+            is_valid, message, account_totals, month_totals = validate_pre_transpose(self.raw, self.file_type)
+        self.pre_totals = (account_totals, month_totals)
+        return is_valid, message
+
+    def transform(self):
+        """Transform the parsed file to long format"""
+        with self.stage('transform', rows_in=len(self.raw)) as stage:
+            self.transformed = transform_spend_frame(self.raw, self.file_type)
+            stage['rows_out'] = len(self.transformed) if self.transformed is not None else 0
+        if self.transformed is None:
+            return False
+        report_memory(self.transformed, 'transformed spend')
+        return True
+
+    def validate_post(self):
+        """Check the transformed frame against the pre-transpose totals"""
+        with self.stage('post_validate', rows_in=len(self.transformed)):
+            return validate_post_transpose(self.transformed, self.file_type, self.pre_totals)
+
+    def run(self):
+        """
+        Read, validate, transform and validate again.
+        Returns:
+            tuple: (is_valid, message)
+        """
+        self.read()
+        is_valid, message = self.validate_pre()
+        if not is_valid:
+            return False, f"Pre-transpose validation failed: {message}"
+        if not self.transform():
+            return False, "Error transforming data"
+        is_valid, message = self.validate_post()
+        if not is_valid:
+            return False, f"Post-transpose validation failed: {message}"
+        return True, "Spend file parsed and validated"
+
+    def _write_artifact(self):
+        try:
+            with self.stage('write_transformed', rows_in=len(self.transformed)):
+                export_frame(self.transformed).to_csv(self.artifact_path, index=False)
+        except Exception as e:
+            self._writer_error = e
+
+    def save_artifact(self, background=False):
+        """Write the transformed CSV, on a background thread if asked"""
+        self._artifact_requested = True
+        if background:
+            self._writer = threading.Thread(target=self._write_artifact, name='transformed-csv-writer')
+            self._writer.start()
+        else:
+            self._write_artifact()
+
+    def wait_for_artifact(self):
+        """
+        Wait for the transformed CSV to be written.
+        Returns:
+            str: Path of the artifact, or None if it was not requested or writing it failed
+        """
+        if not self._artifact_requested:
+            return None
+        if self._writer is not None:
+            self._writer.join()
+            self._writer = None
+        if self._writer_error is not None:
+            print(f"Error writing transformed data to {self.artifact_path}: {str(self._writer_error)}")
+            return None
+        print(f"Transformed data saved to: {self.artifact_path}")
+        return self.artifact_path
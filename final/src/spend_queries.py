@@ -0,0 +1,173 @@
+import sys
+import time
+from collections import OrderedDict
+import pandas as pd
+from db_session import connect, get_db_path, get_generation
+from spend_cube import CUBE_TABLE, ALL_SERVICES
+
+# Named aggregate queries for scripts and notebooks. Every query takes the same
+# named parameters; the ones a caller leaves out fall back to DEFAULT_PARAMS
+# (all months, every entity and HOD).
+QUERIES = {
+    # Account-level spend, AOP and variance per entity, HOD and month
+    'spend_by_entity_hod_month': f"""
+        SELECT c.entity, c.hod_id, COALESCE(h.hod_name, c.hod_id) AS hod_name, c.month,
+               c.spend, c.aop_amount, c.variance
+        FROM {CUBE_TABLE} c
+        LEFT JOIN hod_details h ON h.hod_id = c.hod_id
+        WHERE c.service_type = '{ALL_SERVICES}'
+          AND c.month BETWEEN :start_month AND :end_month
+          AND (:entity IS NULL OR c.entity = :entity)
+          AND (:hod_id IS NULL OR c.hod_id = :hod_id)
+        ORDER BY c.month, c.entity, c.hod_id
+    """,
+    # Spend per service type and month
+    'spend_by_service_type': f"""
+        SELECT c.service_type, c.month, SUM(c.spend) AS spend
+        FROM {CUBE_TABLE} c
+        WHERE c.service_type != '{ALL_SERVICES}'
+          AND c.month BETWEEN :start_month AND :end_month
+          AND (:entity IS NULL OR c.entity = :entity)
+          AND (:hod_id IS NULL OR c.hod_id = :hod_id)
+        GROUP BY c.service_type, c.month
+        ORDER BY c.month, spend DESC
+    """,
+    # Services with the highest spend over the period
+    'top_services': """
+        SELECT d.service_name, d.service_type, SUM(s.spend) AS spend
+        FROM as_acct_service_monthly s
+        JOIN service_details d ON d.service_id = s.service_id
+        LEFT JOIN account_details a ON a.account_id = s.account_id
+        WHERE s.month BETWEEN :start_month AND :end_month
+          AND (:entity IS NULL OR a.entity = :entity)
+          AND (:hod_id IS NULL OR a.hod_id = :hod_id)
+        GROUP BY s.service_id
+        ORDER BY spend DESC
+        LIMIT :limit
+    """,
+    # Spend against AOP per entity and HOD over the period, largest overspend first
+    'aop_variance': f"""
+        SELECT c.entity, c.hod_id, COALESCE(h.hod_name, c.hod_id) AS hod_name,
+               SUM(c.spend) AS spend, TOTAL(c.aop_amount) AS aop_amount,
+               SUM(c.spend) - TOTAL(c.aop_amount) AS variance,
+               (SUM(c.spend) - TOTAL(c.aop_amount)) * 100.0 / NULLIF(TOTAL(c.aop_amount), 0) AS variance_pct
+        FROM {CUBE_TABLE} c
+        LEFT JOIN hod_details h ON h.hod_id = c.hod_id
+        WHERE c.service_type = '{ALL_SERVICES}'
+          AND c.month BETWEEN :start_month AND :end_month
+          AND (:entity IS NULL OR c.entity = :entity)
+          AND (:hod_id IS NULL OR c.hod_id = :hod_id)
+        GROUP BY c.entity, c.hod_id
+        ORDER BY variance DESC
+    """,
+}
+
+DEFAULT_PARAMS = {'start_month': '0000-01-01', 'end_month': '9999-12-31', 'entity': None, 'hod_id': None, 'limit': 10}
+
+# Number of query results kept per reader
+CACHE_SIZE = 128
+
+class SpendQueries:
+    """
+    Read API over the CloudRev database with a versioned result cache.
+    Results are kept in an LRU keyed by query name, parameters and the database
+    generation (see db_session.bump_generation). Every commit that writes
+    through db_session.connect bumps the generation in the same transaction as
+    its data, so a cached result is only reused while the data it was computed
+    from is still current.
+
+        with SpendQueries() as queries:
+            df = queries.run('aop_variance', start_month='2025-04-01', entity='OCL')
+    """
+
+    def __init__(self, db_path=None, cache_size=CACHE_SIZE):
+        self.db_path = db_path or get_db_path()
+        self.cache_size = cache_size
+        self.conn = None
+        self.hits = 0
+        self.misses = 0
+        self._cache = OrderedDict()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    def connection(self):
+        """The reader's connection, opened on first use"""
+        if self.conn is None:
+            self.conn = connect(self.db_path)
+        return self.conn
+
+    def run(self, name, **params):
+        """
+        Run a named query, or return its cached result if the data has not changed since.
+        Args:
+            name (str): Key of QUERIES
+            **params: start_month, end_month, entity, hod_id, limit
+        Returns:
+            pd.DataFrame: Query result (a copy, safe to modify)
+        """
+        if name not in QUERIES:
+            raise KeyError(f"Unknown query '{name}', expected one of: {', '.join(QUERIES)}")
+        params = {**DEFAULT_PARAMS, **params}
+        conn = self.connection()
+
+        # The generation and the result are read from one snapshot
+        conn.execute("BEGIN")
+        try:
+            key = (name, tuple(sorted(params.items())), get_generation(conn))
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return self._cache[key].copy()
+            result = pd.read_sql_query(QUERIES[name], conn, params=params)
+        finally:
+            conn.rollback()
+
+        self.misses += 1
+        self._cache[key] = result
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return result.copy()
+
+    def cache_info(self):
+        """Hit/miss counters and current cache size"""
+        return {'hits': self.hits, 'misses': self.misses, 'size': len(self._cache), 'max_size': self.cache_size}
+
+    def clear_cache(self):
+        self._cache.clear()
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+# One reader per database for run_query
+_readers = {}
+
+def run_query(name, db_path=None, **params):
+    """Run a named query on a shared reader, so repeated calls in a script or notebook hit the cache"""
+    db_path = db_path or get_db_path()
+    if db_path not in _readers:
+        _readers[db_path] = SpendQueries(db_path)
+    return _readers[db_path].run(name, **params)
+
+def parse_param(value):
+    """Command-line parameter: ints stay ints, everything else is a string"""
+    return int(value) if value.isdigit() else value
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] not in QUERIES:
+        print(f"Usage: python spend_queries.py <{'|'.join(QUERIES)}> [param=value ...]")
+        sys.exit(1)
+    cli_params = dict(arg.split('=', 1) for arg in sys.argv[2:])
+    with SpendQueries() as queries:
+        for attempt in ['first run', 'cached run']:
+            start_time = time.perf_counter()
+            df = queries.run(sys.argv[1], **{key: parse_param(value) for key, value in cli_params.items()})
+            print(f"{sys.argv[1]} ({attempt}): {len(df)} rows in {(time.perf_counter() - start_time) * 1000:.1f} ms")
+        print(df.to_string(index=False))
+        print(queries.cache_info())
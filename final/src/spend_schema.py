@@ -0,0 +1,66 @@
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+from date_keys import encode_dates, date_strings
+
+# Canonical layout of every transformed spend frame:
+# - account_id, account_name, service_name: categorical (dictionary encoded)
+# - day: int32 days since 1970-01-01
+# - month: int32 yyyymm
+# - spend: float64
+TEXT_COLUMNS = ['account_id', 'account_name', 'service_name']
+DATE_COLUMNS = ['day', 'month']
+
+def text_values(series):
+    """
+    Plain string values of a text column. For a categorical column the
+    categories are converted once and indexed by the codes.
+    """
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        categories = series.cat.categories.astype(str).to_numpy(dtype=object)
+        return np.append(categories, None)[series.cat.codes.to_numpy()]
+    return series.astype(str).to_numpy(dtype=object)
+
+def key_strings(df, col):
+    """String values of any key column of a spend frame"""
+    return date_strings(df[col], col) if col in DATE_COLUMNS else text_values(df[col])
+
+def compact_spend_frame(df):
+    """Convert a transformed spend frame to the canonical typed layout"""
+    compact = {}
+    for col in df.columns:
+        if col in TEXT_COLUMNS:
+            compact[col] = df[col].astype('category')
+        elif col in DATE_COLUMNS:
+            compact[col] = encode_dates(df[col], col)
+        elif col == 'spend':
+            compact[col] = pd.to_numeric(df[col], errors='coerce').fillna(0.0).astype(np.float64)
+        else:
+            compact[col] = df[col]
+    return pd.DataFrame(compact, index=df.index)
+
+def concat_spend_frames(frames):
+    """Concatenate compact frames, merging the category dictionaries instead of falling back to strings"""
+    df = pd.concat(frames, ignore_index=True)
+    for col in TEXT_COLUMNS:
+        if col in df.columns and not isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = pd.Series(union_categoricals([f[col].astype('category') for f in frames]), index=df.index)
+    return df
+
+def export_frame(df):
+    """Copy of a compact frame with plain strings and ISO dates, for CSV artifacts and display"""
+    df = df.copy()
+    for col in df.columns:
+        if col in DATE_COLUMNS:
+            df[col] = date_strings(df[col], col)
+        elif col in TEXT_COLUMNS:
+            df[col] = text_values(df[col])
+    return df
+
+def report_memory(df, label):
+    """Print the deep memory usage of a frame per column"""
+    usage = df.memory_usage(deep=True, index=False)
+    print(f"\nMemory usage of {label}: {usage.sum() / 1024 ** 2:.2f} MB for {len(df)} rows")
+    for col, size in usage.items():
+        print(f"- {col:<14}{str(df[col].dtype):<12}{size / 1024 ** 2:>10.2f} MB")
+    return usage.sum()
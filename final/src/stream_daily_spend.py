@@ -0,0 +1,183 @@
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+from db_session import DBSession
+from transform_spend import transform_daily_spend
+from update_service_details import resolve_service_ids
+from update_spend import bulk_upsert_daily_spend, stage_touched_months, cascade_daily_spend
+from validate_spend import SPEND_TOLERANCE
+from date_keys import encode_dates, decode_dates
+from account_ids import normalize_account_ids
+from update_account_details import upsert_accounts
+from ingest_ledger import record_ingest
+from instrument import RunMetrics
+
+# Rows of the wide file read per chunk; peak memory scales with this
+STREAM_CHUNK_ROWS = 20000
+
+# main.py switches to streaming for daily files larger than this
+STREAMING_THRESHOLD_BYTES = 200 * 1024 * 1024
+
+TOTAL_COLUMNS = ['total_cost', 'Total']
+
+# Non-day columns of the consolidated layout; account_name is optional
+ID_COLUMNS = ['account_id', 'account_name', 'service_name']
+
+def is_consolidated_daily_file(file_path):
+    """True if the file has the consolidated layout this module streams (account_id, service_name, <day columns>)"""
+    columns = {str(col).strip() for col in pd.read_csv(file_path, nrows=0).columns}
+    return {'account_id', 'service_name'} <= columns
+
+def stream_daily_spend_file(file_path, chunk_size=STREAM_CHUNK_ROWS, db_path=None, entity=None, file_hash=None):
+    """
+    Stream a consolidated daily service file (account_id, [account_name,] service_name,
+    <day columns>) into as_acct_service_daily without loading it whole.
+    Each chunk is melted, checked against its own row totals, added to running
+    per-day totals and written straight away, after upserting its accounts under
+    entity. All chunks share one transaction, which is rolled back if the running
+    totals don't match the file's 'Total' row. The months the file touched are
+    rolled up into the monthly tables at the end, and with file_hash the load is
+    recorded in the ingestion ledger in the same transaction. Every chunk's read,
+    validation, account update, transform, service resolution and spend upsert are
+    timed in a RunMetrics, saved as JSON lines when the run ends.
+    Returns:
+        dict: row_count, start_date and end_date of the load, or None on failure
+    """
+    start_time = time.perf_counter()
+    service_ids = {}
+    running_input = None      # per-day totals of the wide input
+    running_written = None    # per-day totals of the rows written
+    expected_totals = None    # per-day totals from the file's 'Total' row, if any
+    rows_written = 0
+    first_day, last_day = None, None
+
+    try:
+        with RunMetrics(f"stream_daily_{entity or 'spend'}") as metrics, DBSession(db_path) as session:
+            reader = iter(pd.read_csv(file_path, dtype={'account_id': str}, chunksize=chunk_size))
+            chunk_no = 0
+            while True:
+                with metrics.stage('read') as stage:
+                    chunk = next(reader, None)
+                    stage['rows_out'] = len(chunk) if chunk is not None else 0
+                if chunk is None:
+                    break
+                chunk_no += 1
+                chunk.columns = [str(col).strip() for col in chunk.columns]
+                total_col = next((col for col in TOTAL_COLUMNS if col in chunk.columns), None)
+                day_cols = [col for col in chunk.columns if col not in ID_COLUMNS + [total_col]]
+                # Day keys of the header, in whatever format it uses
+                day_keys = encode_dates(day_cols, 'day')
+                first_day, last_day = decode_dates([day_keys.min(), day_keys.max()], 'day')
+
+                with metrics.stage('validate', rows_in=len(chunk)):
+                    # Spend values may carry thousands separators
+                    values = chunk[day_cols].apply(
+                        lambda col: pd.to_numeric(col.astype(str).str.replace(',', '', regex=False), errors='coerce')
+                    ).fillna(0.0)
+
+                    # Pull out the file-level 'Total' row; it is checked once at the end
+                    is_total = chunk['account_id'].astype(str).str.strip() == 'Total'
+                    if is_total.any():
+                        expected_totals = values[is_total].iloc[0]
+                    values = values[~is_total]
+                    chunk = chunk[~is_total]
+
+                    # Row totals must match the total column within the chunk
+                    totals_match = True
+                    if total_col is not None:
+                        row_totals = pd.to_numeric(chunk[total_col].astype(str).str.replace(',', '', regex=False), errors='coerce').fillna(0.0)
+                        totals_match = np.allclose(values.sum(axis=1), row_totals, rtol=1e-5, atol=SPEND_TOLERANCE)
+                if not totals_match:
+                    print(f"Row totals don't match '{total_col}' in chunk {chunk_no}")
+                    session.rollback()
+                    return None
+
+                # New accounts of this chunk go in before their spend
+                if entity:
+                    with metrics.stage('account_update', rows_in=len(chunk)):
+                        accounts = pd.DataFrame({
+                            'account_id': normalize_account_ids(chunk['account_id']),
+                            'account_name': chunk['account_name'].to_numpy() if 'account_name' in chunk.columns else None,
+                        }).dropna(subset=['account_id'])
+                        accounts_ok = upsert_accounts(accounts, entity, session.conn)
+                    if not accounts_ok:
+                        session.rollback()
+                        return None
+
+                with metrics.stage('transform', rows_in=len(chunk)) as stage:
+                    wide = pd.concat([chunk[['account_id', 'service_name']], values], axis=1)
+                    df_long = transform_daily_spend(wide)
+                    stage['rows_out'] = len(df_long) if df_long is not None else 0
+                if df_long is None:
+                    print(f"Failed to transform chunk {chunk_no}")
+                    session.rollback()
+                    return None
+
+                # Resolve only service names not seen in earlier chunks
+                with metrics.stage('service_resolution', rows_in=len(df_long)):
+                    new_names = [name for name in df_long['service_name'].unique() if name not in service_ids]
+                    success = True
+                    if new_names:
+                        success, resolved = resolve_service_ids(new_names, session.db_path, session.conn)
+                        service_ids.update(resolved)
+                    df_long['service_id'] = df_long['service_name'].map(service_ids)
+                if not success:
+                    session.rollback()
+                    return None
+
+                with metrics.stage('spend_upsert', rows_in=len(df_long)) as stage:
+                    stage['rows_out'] = bulk_upsert_daily_spend(session.conn, df_long)
+                    rows_written += stage['rows_out']
+                    # Months touched by every chunk are rolled up once the file is in
+                    stage_touched_months(session.conn, df_long, reset=chunk_no == 1)
+
+                # Running totals per day, from the input and from what was written
+                input_sums = values.sum(axis=0)
+                written_sums = df_long['spend'].groupby(df_long['day']).sum().reindex(day_keys, fill_value=0.0).set_axis(day_cols)
+                running_input = input_sums if running_input is None else running_input.add(input_sums, fill_value=0.0)
+                running_written = written_sums if running_written is None else running_written.add(written_sums, fill_value=0.0)
+
+                if not np.allclose(running_input, running_written, rtol=1e-5, atol=SPEND_TOLERANCE):
+                    print(f"Running totals diverged after chunk {chunk_no}")
+                    session.rollback()
+                    return None
+
+            if running_input is None:
+                print(f"No data found in {file_path}")
+                session.rollback()
+                return None
+
+            if expected_totals is not None:
+                expected = expected_totals.reindex(running_input.index, fill_value=0.0)
+                bad_days = ~np.isclose(running_input, expected, rtol=1e-5, atol=SPEND_TOLERANCE)
+                if bad_days.any():
+                    print(f"Day totals don't match the 'Total' row for: {list(running_input.index[bad_days])}")
+                    session.rollback()
+                    return None
+
+            # Monthly rollups, discrepancy check and cube refresh for the whole file
+            with metrics.stage('rollup', rows_in=rows_written):
+                cascade_daily_spend(session.conn)
+
+            summary = {'row_count': rows_written, 'start_date': first_day, 'end_date': last_day}
+            if file_hash:
+                # The ledger entry commits together with the data
+                record_ingest(session.conn, [dict(summary, file_hash=file_hash, entity=entity, file_type=1,
+                                                  file_name=os.path.basename(file_path), status='loaded')])
+
+        elapsed = time.perf_counter() - start_time
+        print(f"\nStreamed {rows_written} daily spend rows from {os.path.basename(file_path)} in {elapsed:.2f}s")
+        return summary
+
+    except Exception as e:
+        print(f"Error streaming daily spend file {file_path}: {str(e)}")
+        return None
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python stream_daily_spend.py <file> [chunk_rows] [entity]")
+        sys.exit(1)
+    stream_daily_spend_file(sys.argv[1], int(sys.argv[2]) if len(sys.argv) > 2 else STREAM_CHUNK_ROWS,
+                            entity=sys.argv[3] if len(sys.argv) > 3 else None)
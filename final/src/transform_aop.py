@@ -2,6 +2,8 @@ import pandas as pd
 import numpy as np
 from datetime import datetime
 import os
+from account_ids import normalize_account_ids
+from date_keys import date_strings
 
 def detect_file_format(df):
     """Detect the format of the input file"""
@@ -36,25 +38,10 @@ def validate_totals(df, month_cols):
     
     return row_totals, col_totals
 
-def normalize_account_id(account_id):
-    """Normalize account_id to 12 characters only if it's numeric"""
-    if pd.isna(account_id) or account_id == '':
-        return None
-    
-    # Convert to string and strip whitespace
-    account_id = str(account_id).strip()
-    
-    # If it starts with No_AC_ID or contains any non-numeric characters, return as is
-    if account_id.startswith('No_AC_ID') or not account_id.isdigit():
-        return account_id
-    
-    # For numeric account IDs, pad with leading zeros to make it 12 digits
-    return account_id.zfill(12)
-
 def check_duplicate_accounts(df):
     """Check for duplicate account IDs in the data"""
     # Normalize account IDs
-    df['normalized_account_id'] = df['account_id'].apply(normalize_account_id)
+    df['normalized_account_id'] = normalize_account_ids(df['account_id'])
     
     # Find duplicate account IDs
     duplicates = df[df['normalized_account_id'].duplicated(keep=False)].sort_values('normalized_account_id')
@@ -88,12 +75,8 @@ def transform_aop_data(input_file):
         if check_duplicate_accounts(df):
             return None
         
-        # Create month mapping based on the actual columns in the file
-        month_mapping = {}
-        for col in month_cols:
-            # Extract month and year from column name (e.g., 'Apr-25' -> '01-Apr-2025')
-            month, year = col.split('-')
-            month_mapping[col] = f'01-{month}-20{year}'
+        # Map month columns (e.g. 'Apr-25') to ISO month keys, detecting their format once
+        month_mapping = dict(zip(month_cols, date_strings(month_cols, 'month')))
         
         # Validate original data
         print("Validating original data...")
@@ -105,7 +88,7 @@ def transform_aop_data(input_file):
             id_vars.extend(['hod_name', 'entity'])
         
         # Normalize account_id in original data
-        df['account_id'] = df['account_id'].apply(normalize_account_id)
+        df['account_id'] = normalize_account_ids(df['account_id'])
         
         # Melt the dataframe
         df_melted = pd.melt(
@@ -119,9 +102,9 @@ def transform_aop_data(input_file):
         # Convert aop_amount to numeric, handling any non-numeric values
         df_melted['aop_amount'] = pd.to_numeric(df_melted['aop_amount'].astype(str).str.replace(',', ''), errors='coerce')
         
-        # Convert month to date format
+        # Convert month to its ISO key
         df_melted['month'] = df_melted['month'].map(month_mapping)
-        df_melted['month'] = pd.to_datetime(df_melted['month'], format='%d-%b-%Y')
+        original_months = {month: col for col, month in month_mapping.items()}
         
         # Validate transformed data
         print("\nValidating transformed data...")
@@ -142,7 +125,7 @@ def transform_aop_data(input_file):
         print("\nValidating monthly totals...")
         monthly_mismatches = False
         for month, total in transformed_totals.items():
-            original_month = month.strftime('%b-%y')
+            original_month = original_months[month]
             if not np.isclose(total, original_col_totals[original_month], rtol=1e-5, atol=1e-5):
                 print(f"Warning: Total mismatch for {original_month}")
                 print(f"Original: {original_col_totals[original_month]}")
@@ -1,5 +1,7 @@
 import pandas as pd
 import numpy as np
+from spend_schema import compact_spend_frame, encode_dates, export_frame
+from account_ids import normalize_account_ids
 
 def transform_monthly_spend(df):
     """
@@ -8,39 +10,43 @@ def transform_monthly_spend(df):
         df (pd.DataFrame): Input DataFrame with monthly spend data
     Returns:
         pd.DataFrame: Transformed DataFrame with columns: account_id, account_name, month, spend
+            in the compact layout of spend_schema
     """
     # Show the DataFrame as read from the CSV before any processing
     print("\nOriginal DataFrame as read from CSV (header=None):")
     print(df.head(10))
     
+    # Work on a single object matrix, slicing a wide frame column by column is slow.
     # Ignore the last column (totals)
-    df = df.iloc[:, :-1]
+    raw = df.to_numpy(dtype=object)[:, :-1]
     # Extract account_id and account_name from the first two rows
-    account_ids = df.iloc[0].values[1:]
-    account_names = df.iloc[1].values[1:]
+    account_ids = raw[0, 1:]
+    account_names = raw[1, 1:]
     # Extract month rows (from row 3 onwards, skipping 'Linked account total')
-    months = df.iloc[3:, 0].values
+    months = raw[3:, 0]
     # Extract spend values (from row 3 onwards, columns 1:)
-    spend_data = df.iloc[3:, 1:].values
-    # Build long DataFrame
-    records = []
-    for i, account_id in enumerate(account_ids):
-        for j, month in enumerate(months):
-            spend = spend_data[j, i]
-            records.append({
-                'account_id': account_id,
-                'account_name': account_names[i],
-                'month': month,
-                'spend': spend
-            })
-    df_long = pd.DataFrame(records)
-    # Replace NaN spend values with 0
-    df_long['spend'] = df_long['spend'].fillna(0)
-    # Remove ' ($)' suffix from account_name
-    df_long['account_name'] = df_long['account_name'].str.replace(' ($)', '')
+    spend_data = raw[3:, 1:]
+    # Build long DataFrame in one reshape, account-major like the original layout:
+    # every month of the first account, then every month of the next one, ...
+    n_accounts = len(account_ids)
+    n_months = len(months)
+    spend = pd.to_numeric(spend_data.T.reshape(-1), errors='coerce')
+    # Remove ' ($)' suffix from account_name, once per account rather than per row
+    account_names = pd.Series(account_names).str.replace(' ($)', '', regex=False)
+    # Text columns are built straight from their codes and month keys are
+    # encoded once per month, so no per-row strings are materialized
+    id_codes, id_values = pd.factorize(normalize_account_ids(account_ids))
+    name_codes, name_values = pd.factorize(account_names)
+    df_long = pd.DataFrame({
+        'account_id': pd.Categorical.from_codes(np.repeat(id_codes, n_months), id_values),
+        'account_name': pd.Categorical.from_codes(np.repeat(name_codes, n_months), name_values),
+        'month': np.tile(encode_dates(months, 'month'), n_accounts),
+        # Replace NaN spend values with 0
+        'spend': np.nan_to_num(spend, nan=0.0).astype(np.float64)
+    })
     print("\nTransformed DataFrame (first 10 rows):")
-    print(df_long.head(10))
-    return df_long
+    print(export_frame(df_long.head(10)))
+    return compact_spend_frame(df_long)
 
 def transform_daily_spend(df):
     """Transform daily spend data."""
@@ -55,19 +61,10 @@ def transform_daily_spend(df):
         # Remove total rows
         df_transformed = df_transformed[df_transformed['account_id'] != 'Total']
         
-        # Process account IDs
-        def process_account_id(acc_id):
-            if pd.isna(acc_id):
-                return None
-            acc_id = str(acc_id).strip()
-            numeric_id = ''.join(filter(str.isdigit, acc_id))
-            if numeric_id and numeric_id.isdigit():
-                return numeric_id.zfill(12)
-            return acc_id
-
-        df_transformed['account_id'] = df_transformed['account_id'].apply(process_account_id)
+        # Normalize account IDs (12-digit padding, float artifacts)
+        df_transformed['account_id'] = normalize_account_ids(df_transformed['account_id'])
         
-        return df_transformed
+        return compact_spend_frame(df_transformed)
         
     except Exception as e:
         print(f"Error transforming daily spend data: {str(e)}")
@@ -86,24 +83,51 @@ def transform_service_monthly_spend(df):
         # Remove total rows
         df_transformed = df_transformed[df_transformed['account_id'] != 'Total']
         
-        # Process account IDs
-        def process_account_id(acc_id):
-            if pd.isna(acc_id):
-                return None
-            acc_id = str(acc_id).strip()
-            numeric_id = ''.join(filter(str.isdigit, acc_id))
-            if numeric_id and numeric_id.isdigit():
-                return numeric_id.zfill(12)
-            return acc_id
-
-        df_transformed['account_id'] = df_transformed['account_id'].apply(process_account_id)
+        # Normalize account IDs (12-digit padding, float artifacts)
+        df_transformed['account_id'] = normalize_account_ids(df_transformed['account_id'])
         
-        return df_transformed
+        return compact_spend_frame(df_transformed)
         
     except Exception as e:
         print(f"Error transforming service monthly spend data: {str(e)}")
         return None
 
+def transform_cost_explorer_spend(df, account_id, account_name, date_col='day'):
+    """
+    Transform a per-account Cost Explorer export (one row per date, one column
+    per service) into long format.
+    Args:
+        df (pd.DataFrame): File as read with pd.read_csv (first column 'Service')
+        account_id (str): Account ID taken from the filename
+        account_name (str): Account name taken from the filename
+        date_col (str): 'day' for daily files, 'month' for monthly files
+    Returns:
+        pd.DataFrame: Columns account_id, account_name, service_name, <date_col>, spend
+            in the compact layout of spend_schema
+    """
+    try:
+        # Drop the 'Service total' row and the 'Total costs($)' column
+        df = df[df.iloc[:, 0] != 'Service total']
+        service_cols = [col for col in df.columns[1:] if col != 'Total costs($)']
+        
+        df_transformed = df.melt(
+            id_vars=[df.columns[0]],
+            value_vars=service_cols,
+            var_name='service_name',
+            value_name='spend'
+        ).rename(columns={df.columns[0]: date_col})
+        
+        df_transformed['service_name'] = df_transformed['service_name'].str.replace(r'\s*\(\$\)$', '', regex=True)
+        df_transformed['spend'] = pd.to_numeric(df_transformed['spend'], errors='coerce').fillna(0.0)
+        df_transformed.insert(0, 'account_id', account_id)
+        df_transformed.insert(1, 'account_name', account_name)
+        
+        return compact_spend_frame(df_transformed[['account_id', 'account_name', 'service_name', date_col, 'spend']])
+        
+    except Exception as e:
+        print(f"Error transforming Cost Explorer spend data: {str(e)}")
+        return None
+
 def validate_monthly_spend(df):
     """Validate monthly spend data."""
     try:
@@ -144,6 +168,27 @@ def validate_service_data(df):
     except Exception as e:
         return False, f"Validation error: {str(e)}"
 
+def transform_spend_frame(df, file_type):
+    """Transform an already parsed spend file (read with header=None)."""
+    if file_type == 1:  # Daily spend
+        return transform_daily_spend(df)
+    elif file_type == 2:  # Service monthly spend
+        return transform_service_monthly_spend(df)
+    else:  # Monthly spend
+        return transform_monthly_spend(df)
+
+def load_transformed(source):
+    """
+    Get a transformed frame for a database stage.
+    Args:
+        source (pd.DataFrame or str): The frame itself, or the path of a transformed CSV
+    Returns:
+        pd.DataFrame: A copy the caller may modify
+    """
+    if isinstance(source, pd.DataFrame):
+        return source.copy()
+    return pd.read_csv(source)
+
 def transform_spend_data(input_file, file_type):
     """Main function to transform spend data."""
     try:
@@ -151,13 +196,8 @@ def transform_spend_data(input_file, file_type):
         df = pd.read_csv(input_file,header=None)
             
         # Transform data based on file type
-        if file_type == 1:  # Daily spend
-            return transform_daily_spend(df)
-        elif file_type == 2:  # Service monthly spend
-            return transform_service_monthly_spend(df)
-        else:  # Monthly spend
-            return transform_monthly_spend(df)
+        return transform_spend_frame(df, file_type)
             
     except Exception as e:
         print(f"Error processing file: {str(e)}")
-        return None 
\ No newline at end of file
+        return None
\ No newline at end of file
@@ -2,21 +2,15 @@ import sqlite3
 import pandas as pd
 import os
 from datetime import datetime
+from db_session import connect
+from ingest_ledger import record_new_accounts
+from transform_spend import load_transformed
+from spend_schema import text_values
 
 def get_db_connection():
     """Get a connection to the SQLite database"""
     try:
-        # Get the absolute path to the database file
-        current_dir = os.path.dirname(os.path.abspath(__file__))
-        project_root = os.path.dirname(os.path.dirname(current_dir))
-        db_path = os.path.join(project_root, 'final', 'sqlite', 'mydatabase.db')
-        
-        # Ensure the database directory exists
-        os.makedirs(os.path.dirname(db_path), exist_ok=True)
-        
-        conn = sqlite3.connect(db_path)
-        conn.row_factory = sqlite3.Row
-        return conn
+        return connect()
     except Exception as e:
         print(f"Error connecting to database: {str(e)}")
         return False
@@ -33,138 +27,160 @@ def get_next_hod_id(cursor):
     num = int(max_id.split('_')[1])
     return f"HOD_{num + 1:03d}"
 
-def handle_hod_details(cursor, hod_name, entity):
-    """Handle HOD details, creating new entries if needed"""
-    # Check if HOD exists
-    cursor.execute("""
-        SELECT hod_id FROM hod_details 
-        WHERE hod_name = ? AND entity = ?
-    """, (hod_name, entity))
-    
-    result = cursor.fetchone()
-    if result:
-        return result[0]
+def load_account_names(cursor):
+    """Load the account dimension once as {account_id: account_name}"""
+    cursor.execute("SELECT account_id, account_name FROM account_details")
+    return {str(row[0]): row[1] for row in cursor.fetchall()}
+
+def load_hod_ids(cursor, entity):
+    """Load the HOD dimension of one entity once as {hod_name: hod_id}"""
+    cursor.execute("SELECT hod_name, hod_id FROM hod_details WHERE entity = ?", (entity,))
+    return {row[0]: row[1] for row in cursor.fetchall()}
+
+def handle_hod_details(cursor, hod_names, entity, hod_ids):
+    """
+    Create the HODs missing from the preloaded hod_ids dict in one executemany.
+    hod_ids is updated in place with the new entries.
+    Returns:
+        list: New HOD entries as dicts (hod_id, hod_name, entity)
+    """
+    missing = [name for name in dict.fromkeys(hod_names) if name not in hod_ids]
+    if not missing:
+        return []
     
-    # Create new HOD entry
-    new_hod_id = get_next_hod_id(cursor)
-    cursor.execute("""
+    # Allocate consecutive IDs after the current maximum
+    start = int(get_next_hod_id(cursor).split('_')[1])
+    new_hod_entries = [
+        {'hod_id': f"HOD_{start + offset:03d}", 'hod_name': name, 'entity': entity}
+        for offset, name in enumerate(missing)
+    ]
+    cursor.executemany("""
         INSERT INTO hod_details (hod_id, hod_name, entity)
         VALUES (?, ?, ?)
-    """, (new_hod_id, hod_name, entity))
+    """, [(entry['hod_id'], entry['hod_name'], entity) for entry in new_hod_entries])
     
-    return new_hod_id
+    hod_ids.update({entry['hod_name']: entry['hod_id'] for entry in new_hod_entries})
+    return new_hod_entries
 
-def validate_and_update_single_account(account_id, account_name, entity):
-    """Validate and update a single account in the database"""
+def upsert_accounts(accounts, entity, conn=None):
+    """
+    Insert every account not yet in account_details in a single executemany.
+    Accounts are deduplicated first; existing accounts are left unchanged and
+    new ones get the default HOD ID.
+    Args:
+        accounts (pd.DataFrame): Frame with account_id and account_name columns
+        entity (str): Entity of the accounts
+        conn (sqlite3.Connection, optional): Shared session connection
+    Returns:
+        bool: True if successful, False otherwise
+    """
+    # A borrowed session connection is committed and closed by its owner
+    own_conn = conn is None
     try:
-        # Get database connection
-        conn = get_db_connection()
-        if not conn:
-            return False
-        
-        cursor = conn.cursor()
-        
-        # Check if account exists
-        cursor.execute("SELECT * FROM account_details WHERE account_id = ?", (account_id,))
-        existing_account = cursor.fetchone()
-        
-        if not existing_account:
-            # Insert new account with default HOD ID
-            cursor.execute("""
-                INSERT INTO account_details (
-                    account_id, account_name, hod_id, entity, 
-                    cloud_id, business_id, percentage, prod_flg,
-                    account_creation_date, cls_flg, cls_date
-                ) VALUES (?, ?, '00000001', ?, NULL, NULL, NULL, NULL, NULL, NULL, NULL)
-            """, (account_id, account_name, entity))
-            
-            print(f"Added new account: {account_id} - {account_name}")
-        
-        # Commit changes and close connection
-        conn.commit()
-        conn.close()
-        
+        if own_conn:
+            conn = get_db_connection()
+            if not conn:
+                return False
+        
+        unique_accounts = accounts[['account_id', 'account_name']].drop_duplicates('account_id')
+        
+        changes_before = conn.total_changes
+        conn.cursor().executemany("""
+            INSERT OR IGNORE INTO account_details (
+                account_id, account_name, hod_id, entity, 
+                cloud_id, business_id, percentage, prod_flg,
+                account_creation_date, cls_flg, cls_date
+            ) VALUES (?, ?, '00000001', ?, NULL, NULL, NULL, NULL, NULL, NULL, NULL)
+        """, zip(text_values(unique_accounts['account_id']).tolist(),
+                 unique_accounts['account_name'].tolist(),
+                 [entity] * len(unique_accounts)))
+        added = conn.total_changes - changes_before
+        
+        if own_conn:
+            conn.commit()
+        
+        print(f"Accounts checked: {len(unique_accounts)} unique, {added} new")
         return True
         
     except Exception as e:
-        print(f"Error updating account {account_id}: {str(e)}")
-        if 'conn' in locals():
-            conn.close()
+        print(f"Error updating accounts: {str(e)}")
         return False
+    finally:
+        if own_conn and conn:
+            conn.close()
 
-def validate_and_update_accounts_from_file(transformed_file, selected_entity):
-    """Validate accounts and update the database from a transformed file"""
+def validate_and_update_accounts_from_file(transformed_file, selected_entity, conn=None, file_hash=None):
+    """Validate accounts and update the database from a transformed file or frame.
+    New accounts are recorded in the ingestion ledger under file_hash."""
+    # A borrowed session connection is committed and closed by its owner
+    own_conn = conn is None
     try:
-        # Read the transformed data
-        df = pd.read_csv(transformed_file)
-        
-        # Get database connection
-        conn = get_db_connection()
-        if not conn:
-            return False
+        # Use the transformed frame as is, or read it from the transformed file
+        df = load_transformed(transformed_file)
         
+        if own_conn:
+            conn = get_db_connection()
+            if not conn:
+                return False
+
         cursor = conn.cursor()
         
-        # Track new accounts and HOD entries
-        new_accounts = []
-        new_hod_entries = []
+        # Load both dimensions once
+        account_names = load_account_names(cursor)
+        hod_ids = load_hod_ids(cursor, selected_entity)
         
-        # Get unique accounts
-        unique_accounts = df[['account_id', 'account_name']].drop_duplicates()
+        df['account_id'] = text_values(df['account_id'])
+        df['account_name'] = text_values(df['account_name'])
         
-        # Check if we have HOD column
-        has_hod = 'hod_name' in df.columns
+        # One row per account, skipping input account_names that contain 'Redacted'.
+        # As with the row-by-row update, a repeated ID ends up with its last name
+        # but a new account takes the HOD of its first row.
+        named = df[~df['account_name'].astype(str).str.contains('Redacted', regex=False)]
+        unique_accounts = named.drop_duplicates('account_id', keep='last')
         
-        for _, row in unique_accounts.iterrows():
-            account_id = row['account_id']
-            account_name = row['account_name']
-            
-            # Skip if the input account_name contains 'Redacted'
-            if 'Redacted' in account_name:
-                continue
-                
-            # Check if account exists based only on account_id
-            cursor.execute("SELECT account_name FROM account_details WHERE account_id = ?", (account_id,))
-            existing_account = cursor.fetchone()
-            
-            if existing_account:
-                # If account exists and name is different, update the account_name
-                if existing_account['account_name'] != account_name:
-                    cursor.execute("""
-                        UPDATE account_details 
-                        SET account_name = ? 
-                        WHERE account_id = ?
-                    """, (account_name, account_id))
-                    print(f"Updated account_name for account_id {account_id} from {existing_account['account_name']} to {account_name}")
-            else:
-                # Get HOD details if available
-                hod_id = '00000001'  # Default HOD ID
-                if has_hod:
-                    hod_name = df[df['account_id'] == account_id]['hod_name'].iloc[0]
-                    hod_id = handle_hod_details(cursor, hod_name, selected_entity)
-                    new_hod_entries.append({
-                        'hod_id': hod_id,
-                        'hod_name': hod_name,
-                        'entity': selected_entity
-                    })
-                # Insert only if account_id does not exist (INSERT OR IGNORE for extra safety)
-                cursor.execute("""
-                    INSERT OR IGNORE INTO account_details (
-                        account_id, account_name, hod_id, entity, 
-                        cloud_id, business_id, percentage, prod_flg,
-                        account_creation_date, cls_flg, cls_date
-                    ) VALUES (?, ?, ?, ?, NULL, NULL, NULL, NULL, NULL, NULL, NULL)
-                """, (account_id, account_name, hod_id, selected_entity))
-                # Add more details to new_accounts for better tracking
-                new_accounts.append({
-                    'account_id': account_id,
-                    'account_name': account_name,
-                    'hod_id': hod_id,
-                    'entity': selected_entity,
-                    'source_file': os.path.basename(transformed_file),
-                    'added_date': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-                    'status': 'New Account Added'
-                })
+        # New and renamed accounts by set difference against the dimension
+        is_known = unique_accounts['account_id'].isin(account_names.keys())
+        known = unique_accounts[is_known]
+        renamed = known[known['account_name'] != known['account_id'].map(account_names)]
+        new = unique_accounts[~is_known]
+        
+        # Get HOD details if available
+        new_hod_entries = []
+        if 'hod_name' in df.columns and not new.empty:
+            first_hod = df.drop_duplicates('account_id', keep='first').set_index('account_id')['hod_name']
+            new_hod_names = new['account_id'].map(first_hod)
+            new_hod_entries = handle_hod_details(cursor, new_hod_names.tolist(), selected_entity, hod_ids)
+            new_hod = new_hod_names.map(hod_ids).tolist()
+        else:
+            new_hod = ['00000001'] * len(new)  # Default HOD ID
+        
+        # Update the account_name of renamed accounts
+        cursor.executemany("""
+            UPDATE account_details 
+            SET account_name = ? 
+            WHERE account_id = ?
+        """, zip(renamed['account_name'].tolist(), renamed['account_id'].tolist()))
+        for account_id, account_name in zip(renamed['account_id'], renamed['account_name']):
+            print(f"Updated account_name for account_id {account_id} from {account_names[account_id]} to {account_name}")
+        
+        # Insert only if account_id does not exist (INSERT OR IGNORE for extra safety)
+        cursor.executemany("""
+            INSERT OR IGNORE INTO account_details (
+                account_id, account_name, hod_id, entity, 
+                cloud_id, business_id, percentage, prod_flg,
+                account_creation_date, cls_flg, cls_date
+            ) VALUES (?, ?, ?, ?, NULL, NULL, NULL, NULL, NULL, NULL, NULL)
+        """, zip(new['account_id'].tolist(), new['account_name'].tolist(), new_hod, [selected_entity] * len(new)))
+        
+        # Record new accounts in the ingestion ledger
+        new_accounts = [{
+            'account_id': account_id,
+            'account_name': account_name,
+            'hod_id': hod_id,
+            'entity': selected_entity,
+        } for account_id, account_name, hod_id in zip(new['account_id'], new['account_name'], new_hod)]
+        record_new_accounts(conn, new_accounts, file_hash,
+                            os.path.basename(transformed_file) if isinstance(transformed_file, str) else None)
         
         # Save new HOD entries to CSV if any
         if new_hod_entries:
@@ -178,25 +194,12 @@ def validate_and_update_accounts_from_file(transformed_file, selected_entity):
             pd.DataFrame(new_hod_entries).to_csv(output_file, index=False)
             print(f"\nNew HOD entries saved to {output_file}")
         
-        # Save new accounts to CSV if any
         if new_accounts:
-            current_dir = os.path.dirname(os.path.abspath(__file__))
-            output_dir = os.path.join(os.path.dirname(os.path.dirname(current_dir)), 'final', 'data_files', 'new_accounts')
-            os.makedirs(output_dir, exist_ok=True)
-            
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            output_file = os.path.join(output_dir, f'new_accounts_{timestamp}.csv')
-            
-            # Create DataFrame and save with detailed information
-            new_accounts_df = pd.DataFrame(new_accounts)
-            new_accounts_df.to_csv(output_file, index=False)
-            print(f"\nNew accounts saved to {output_file}")
             print("\nNew accounts added:")
-            print(new_accounts_df[['account_id', 'account_name', 'entity', 'added_date']].to_string())
+            print(pd.DataFrame(new_accounts)[['account_id', 'account_name', 'hod_id', 'entity']].to_string())
         
-        # Commit changes and close connection
-        conn.commit()
-        conn.close()
+        if own_conn:
+            conn.commit()
         
         print(f"\nDatabase update completed:")
         print(f"- {len(new_accounts)} new accounts added")
@@ -206,6 +209,7 @@ def validate_and_update_accounts_from_file(transformed_file, selected_entity):
         
     except Exception as e:
         print(f"Error updating database: {str(e)}")
-        if 'conn' in locals():
-            conn.close()
-        return False 
\ No newline at end of file
+        return False
+    finally:
+        if own_conn and conn:
+            conn.close() 
\ No newline at end of file
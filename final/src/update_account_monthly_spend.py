@@ -1,143 +1,91 @@
-import os
 import pandas as pd
-from transform_spend import transform_monthly_spend
-from update_spend import update_monthly_spend
-from update_account_details import validate_and_update_single_account
-from validate_spend import validate_pre_transpose, validate_post_transpose
-import sqlite3
-from datetime import datetime
+from transform_spend import load_transformed
+from spend_schema import text_values, date_strings
+from spend_cube import refresh_cube
 import numpy as np
+from db_session import connect
 
-def update_account_monthly_spend(file_path, entity):
-    """Update account monthly spend data."""
-    try:
-        # Read input file with header=None to treat first row as data
-        df = pd.read_csv(file_path, header=None)
-        
-        # Pre-transpose validation
-        is_valid, message, pre_totals = validate_pre_transpose(df, 3)  # 3 for monthly spend
-        if not is_valid:
-            print(f"Pre-transpose validation failed: {message}")
-            return False
-            
-        # Transform data
-        df_transformed = transform_monthly_spend(df)
-        if df_transformed is None:
-            print(f"Failed to transform file: {file_path}")
-            return False
-            
-        # Post-transpose validation
-        if not validate_post_transpose(df_transformed, 3, pre_totals):
-            print(f"Post-transpose validation failed")
-            return False
-            
-        # Save transformed data
-        output_path = os.path.join(os.path.dirname(file_path), 
-                                 f"transformed_{os.path.basename(file_path)}")
-        df_transformed.to_csv(output_path, index=False)
-        print(f"Transformed data saved to: {output_path}")
-            
-        # First update account details for all accounts
-        account_update_success = True
-        for _, row in df_transformed.iterrows():
-            if not validate_and_update_single_account(row['account_id'], row['account_name'], entity):
-                account_update_success = False
-                print(f"\nFailed to update account details for account: {row['account_id']}")
-                break
-                
-        if not account_update_success:
-            print(f"\nFailed to update account details for file: {file_path}")
-            return False
-            
-        # Get absolute path to database
-        current_dir = os.path.dirname(os.path.abspath(__file__))
-        project_root = os.path.dirname(os.path.dirname(current_dir))
-        db_path = os.path.join(project_root, 'final', 'sqlite', 'mydatabase.db')
-            
-        # Then update spend tables
-        if update_monthly_spend(df_transformed, db_path):
-            print(f"\nSuccessfully processed file: {file_path}")
-            return True
-        else:
-            print(f"\nFailed to update spend data for file: {file_path}")
-            return False
-            
-    except Exception as e:
-        print(f"Error processing file {file_path}: {str(e)}")
-        return False
+# Same tolerance as np.isclose(existing, new, rtol=1e-5)
+SPEND_RTOL = 1e-5
+
+# Number of largest changes reported in the summary
+TOP_DELTAS = 10
 
-def update_account_monthly_spend(transformed_file):
+def update_account_monthly_spend(transformed_file, conn=None):
     """Update as_acct_monthly table with transformed spend data.
     
     Args:
-        transformed_file (str): Path to the transformed CSV file
+        transformed_file (pd.DataFrame or str): Transformed frame, or the path of the transformed CSV
+        conn (sqlite3.Connection, optional): Shared session connection
         
     Returns:
-        bool: True if successful, False otherwise
+        dict: Change summary with inserted, updated and unchanged counts and
+            largest_deltas (DataFrame of the biggest spend changes), or None on failure
     """
+    # A borrowed session connection is committed and closed by its owner
+    own_conn = conn is None
     try:
-        # Read the transformed file
-        df = pd.read_csv(transformed_file)
+        # Use the transformed frame as is, or read it from the transformed file
+        df = load_transformed(transformed_file)
         
-        # Convert month to datetime
-        df['month'] = pd.to_datetime(df['month'])
+        # Plain keys from the compact frame (or ISO dates from a transformed file)
+        df = pd.DataFrame({
+            'account_id': text_values(df['account_id']),
+            'month': date_strings(df['month'], 'month'),
+            'spend': df['spend'].astype(float).to_numpy(),
+        })
+        
+        # One row per key; a repeated account-month keeps its last value, as the row-by-row writer did
+        df = df.groupby(['account_id', 'month'], as_index=False, sort=False)['spend'].last()
+        
+        # Connect to database unless a shared session connection was given
+        if own_conn:
+            conn = connect()
+
+        # One bulk read of the existing rows for the months in this file
+        months = df['month'].unique().tolist()
+        existing = pd.read_sql_query(
+            f"SELECT account_id, month, spend AS existing_spend FROM as_acct_monthly "
+            f"WHERE month IN ({', '.join('?' * len(months))})",
+            conn, params=months
+        )
+        existing['account_id'] = existing['account_id'].astype(str)
         
-        # Connect to database
-        db_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'sqlite', 'mydatabase.db')
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
+        # Vectorized diff against the incoming frame
+        merged = df[['account_id', 'month', 'spend']].merge(existing, on=['account_id', 'month'], how='left')
+        is_new = merged['existing_spend'].isna()
+        is_changed = ~is_new & ~np.isclose(merged['existing_spend'].fillna(0), merged['spend'], rtol=SPEND_RTOL)
+        changed = merged[is_new | is_changed]
         
-        # Track statistics
-        updated_records = 0
-        inserted_records = 0
+        # Write only new or changed rows in one round trip
+        conn.cursor().executemany("""
+            INSERT INTO as_acct_monthly (account_id, month, spend)
+            VALUES (?, ?, ?)
+            ON CONFLICT(account_id, month) DO UPDATE SET spend = excluded.spend
+        """, zip(changed['account_id'].tolist(), changed['month'].tolist(), changed['spend'].tolist()))
         
-        # Process each record
-        for _, row in df.iterrows():
-            account_id = row['account_id']
-            month = row['month'].strftime('%Y-%m-%d')
-            spend = float(row['spend'])
-            
-            # Check if record exists
-            cursor.execute("""
-                SELECT spend FROM as_acct_monthly 
-                WHERE account_id = ? AND month = ?
-            """, (account_id, month))
-            
-            result = cursor.fetchone()
-            
-            if result:
-                # Update existing record if spend is different
-                existing_spend = float(result[0])
-                if not np.isclose(existing_spend, spend, rtol=1e-5):
-                    cursor.execute("""
-                        UPDATE as_acct_monthly 
-                        SET spend = ? 
-                        WHERE account_id = ? AND month = ?
-                    """, (spend, account_id, month))
-                    updated_records += 1
-            else:
-                # Insert new record
-                cursor.execute("""
-                    INSERT INTO as_acct_monthly (account_id, month, spend)
-                    VALUES (?, ?, ?)
-                """, (account_id, month, spend))
-                inserted_records += 1
+        # Rebuild the spend vs AOP partitions of the rows that changed
+        refresh_cube(conn, zip(changed['account_id'].tolist(), changed['month'].tolist()))
         
-        # Commit changes and close connection
-        conn.commit()
-        conn.close()
+        if own_conn:
+            conn.commit()
         
-        print(f"\nDatabase update completed:")
-        print(f"- {updated_records} records updated")
-        print(f"- {inserted_records} new records inserted")
+        deltas = merged[is_changed].assign(delta=lambda d: d['spend'] - d['existing_spend'])
+        largest_deltas = deltas.reindex(deltas['delta'].abs().sort_values(ascending=False).index).head(TOP_DELTAS)
         
-        return True
+        return {
+            'inserted': int(is_new.sum()),
+            'updated': int(is_changed.sum()),
+            'unchanged': int(len(merged) - is_new.sum() - is_changed.sum()),
+            'largest_deltas': largest_deltas.reset_index(drop=True),
+        }
         
     except Exception as e:
         print(f"Error updating monthly spend: {str(e)}")
-        if 'conn' in locals():
+        return None
+    finally:
+        if own_conn and conn:
             conn.close()
-        return False
 
 if __name__ == "__main__":
     # This file is meant to be imported and used by the main program
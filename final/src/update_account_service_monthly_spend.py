@@ -2,11 +2,13 @@ import os
 import pandas as pd
 from transform_spend import transform_service_monthly_spend
 from update_spend import update_service_monthly_spend
-from update_account_details import validate_and_update_single_account
+from update_account_details import upsert_accounts
 from update_service_details import update_service_details_in_df
+from db_session import get_db_path
+from spend_schema import export_frame
 from validate_spend import validate_pre_transpose, validate_post_transpose, extract_account_details_from_filename
 
-def update_account_service_monthly_spend(file_path, entity):
+def update_account_service_monthly_spend(file_path, entity, conn=None):
     """Update account service monthly spend data."""
     try:
         # Extract account details from filename
@@ -19,7 +21,7 @@ def update_account_service_monthly_spend(file_path, entity):
         df = pd.read_csv(file_path)
         
         # Pre-transpose validation
-        is_valid, message, pre_totals = validate_pre_transpose(df, 2, os.path.basename(file_path))
+        is_valid, message, account_totals, month_totals = validate_pre_transpose(df, 2, os.path.basename(file_path))
         if not is_valid:
             print(f"Pre-transpose validation failed: {message}")
             return False
@@ -35,34 +37,32 @@ def update_account_service_monthly_spend(file_path, entity):
         df_transformed['account_name'] = account_name
             
         # Post-transpose validation
-        if not validate_post_transpose(df_transformed, 2, pre_totals):
-            print(f"Post-transpose validation failed")
+        is_valid, message = validate_post_transpose(df_transformed, 2, (account_totals, month_totals))
+        if not is_valid:
+            print(f"Post-transpose validation failed: {message}")
             return False
             
         # Save transformed data
         output_path = os.path.join(os.path.dirname(file_path), 
                                  f"transformed_{os.path.basename(file_path)}")
-        df_transformed.to_csv(output_path, index=False)
+        export_frame(df_transformed).to_csv(output_path, index=False)
         print(f"Transformed data saved to: {output_path}")
             
         # First update account details
-        if not validate_and_update_single_account(account_id, account_name, entity):
+        if not upsert_accounts(df_transformed, entity, conn):
             print(f"\nFailed to update account details for file: {file_path}")
             return False
             
-        # Get absolute path to database
-        current_dir = os.path.dirname(os.path.abspath(__file__))
-        project_root = os.path.dirname(os.path.dirname(current_dir))
-        db_path = os.path.join(project_root, 'final', 'sqlite', 'mydatabase.db')
+        db_path = get_db_path()
             
         # Update service details and get service_ids
-        success, df_with_service_ids = update_service_details_in_df(df_transformed, db_path)
+        success, df_with_service_ids = update_service_details_in_df(df_transformed, db_path, conn)
         if not success:
             print(f"\nFailed to update service details for file: {file_path}")
             return False
             
         # Then update spend tables with service_ids
-        if update_service_monthly_spend(df_with_service_ids, db_path):
+        if update_service_monthly_spend(df_with_service_ids, db_path, conn):
             print(f"\nSuccessfully processed file: {file_path}")
             return True
         else:
@@ -3,85 +3,111 @@ import pandas as pd
 import numpy as np
 import os
 from datetime import datetime
+from db_session import connect
+from account_ids import normalize_account_ids
+from date_keys import date_strings
+from spend_cube import refresh_cube
 
 def get_db_connection():
     """Create a database connection"""
     try:
-        # Get the absolute path to the database file
-        current_dir = os.path.dirname(os.path.abspath(__file__))
-        project_root = os.path.dirname(os.path.dirname(current_dir))
-        db_path = os.path.join(project_root, 'final', 'sqlite', 'mydatabase.db')
-        
-        conn = sqlite3.connect(db_path)
-        return conn
+        return connect()
     except Exception as e:
         print(f"Error connecting to database: {str(e)}")
         return None
 
-def update_aop_budget_monthly(transformed_file):
+# Same tolerance as np.isclose(existing, new, rtol=1e-5)
+AOP_RTOL = 1e-5
+AOP_ATOL = 1e-8
+
+def update_aop_budget_monthly(transformed_file, conn=None):
     """Update aop_budget_monthly table with transformed AOP data"""
+    # A borrowed session connection is committed and closed by its owner
+    own_conn = conn is None
     try:
         # Read the transformed file
         df = pd.read_csv(transformed_file)
         
-        # Convert month to datetime
-        df['month'] = pd.to_datetime(df['month'])
+        # The CSV reader turns account IDs into numbers, restore the 12-digit form
+        df['account_id'] = normalize_account_ids(df['account_id'])
+        
+        # Canonical ISO month keys; mixed or ambiguous formats raise
+        df['month'] = date_strings(df['month'], 'month')
         
-        # Connect to database
-        conn = get_db_connection()
-        if not conn:
-            return False
+        # account_id and aop_amount are NOT NULL; a blank ID or unreadable amount is no
+        # budget line rather than a failed merge
+        missing_account = df['account_id'].isna()
+        if missing_account.any():
+            print(f"Skipping {missing_account.sum()} AOP rows without an account ID")
+            df = df[~missing_account]
+        df['aop_amount'] = pd.to_numeric(df['aop_amount'], errors='coerce')
+        missing = df['aop_amount'].isna()
+        if missing.any():
+            print(f"Skipping {missing.sum()} AOP rows without an amount")
+            df = df[~missing]
+        
+        # Connect to database unless a shared session connection was given
+        if own_conn:
+            conn = get_db_connection()
+            if not conn:
+                return False
         
         cursor = conn.cursor()
         
-        # Track statistics
-        updated_records = 0
-        inserted_records = 0
+        # Bulk-load the file into a staging table
+        cursor.execute("""
+            CREATE TEMP TABLE IF NOT EXISTS aop_staging (
+                account_id TEXT NOT NULL,
+                month DATE NOT NULL,
+                aop_amount REAL,
+                PRIMARY KEY (account_id, month)
+            )
+        """)
+        cursor.execute("DELETE FROM aop_staging")
+        cursor.executemany("""
+            INSERT OR REPLACE INTO aop_staging (account_id, month, aop_amount)
+            VALUES (?, ?, ?)
+        """, zip(df['account_id'].tolist(), df['month'].tolist(),
+                 df['aop_amount'].tolist()))
+        
+        # Inserted/updated/unchanged counts from the same tolerance the merge applies
+        cursor.execute(f"""
+            SELECT COUNT(*),
+                   COALESCE(SUM(b.account_id IS NULL), 0),
+                   COALESCE(SUM(b.account_id IS NOT NULL
+                                AND abs(b.aop_amount - s.aop_amount) > {AOP_ATOL} + {AOP_RTOL} * abs(s.aop_amount)), 0)
+            FROM aop_staging s
+            LEFT JOIN aop_budget_monthly b ON b.account_id = s.account_id AND b.month = s.month
+        """)
+        total_records, inserted_records, updated_records = cursor.fetchone()
+        unchanged_records = total_records - inserted_records - updated_records
         
-        # Process each record
-        for _, row in df.iterrows():
-            account_id = row['account_id']
-            month = row['month'].strftime('%Y-%m-%d')
-            aop_amount = float(row['aop_amount'])  # Convert to float for comparison
-            
-            # Check if record exists
-            cursor.execute("""
-                SELECT aop_amount FROM aop_budget_monthly 
-                WHERE account_id = ? AND month = ?
-            """, (account_id, month))
-            
-            result = cursor.fetchone()
-            
-            if result:
-                # Update existing record if amount is different
-                existing_amount = float(result[0])  # Convert to float for comparison
-                if not np.isclose(existing_amount, aop_amount, rtol=1e-5):
-                    cursor.execute("""
-                        UPDATE aop_budget_monthly 
-                        SET aop_amount = ? 
-                        WHERE account_id = ? AND month = ?
-                    """, (aop_amount, account_id, month))
-                    updated_records += 1
-            else:
-                # Insert new record
-                cursor.execute("""
-                    INSERT INTO aop_budget_monthly (account_id, month, aop_amount)
-                    VALUES (?, ?, ?)
-                """, (account_id, month, aop_amount))
-                inserted_records += 1
+        # Merge: insert new keys, update only amounts that actually changed
+        cursor.execute(f"""
+            INSERT INTO aop_budget_monthly (account_id, month, aop_amount)
+            SELECT account_id, month, aop_amount FROM aop_staging s WHERE true
+            ON CONFLICT(account_id, month) DO UPDATE
+            SET aop_amount = excluded.aop_amount
+            WHERE abs(aop_budget_monthly.aop_amount - excluded.aop_amount)
+                  > {AOP_ATOL} + {AOP_RTOL} * abs(excluded.aop_amount)
+        """)
         
-        # Commit changes and close connection
-        conn.commit()
-        conn.close()
+        # Rebuild the spend vs AOP partitions of the loaded budget lines
+        refresh_cube(conn, 'aop_staging')
         
+        if own_conn:
+            conn.commit()
+
         print(f"\nAOP Budget Monthly table update completed:")
         print(f"- {updated_records} records updated")
         print(f"- {inserted_records} records inserted")
+        print(f"- {unchanged_records} records unchanged")
         
         return True
         
     except Exception as e:
         print(f"Error updating AOP budget monthly table: {str(e)}")
-        if 'conn' in locals():
+        return False
+    finally:
+        if own_conn and conn:
             conn.close()
-        return False 
\ No newline at end of file
@@ -1,84 +1,62 @@
 import sqlite3
 import pandas as pd
-from typing import Tuple, Optional
+from typing import Dict, Tuple, Optional
+from db_session import connect
+from service_classifier import load_classifier, record_new_services
 
-def get_or_create_service_id(service_name: str, db_path: str) -> Tuple[bool, int, str]:
+def resolve_service_ids(service_names, db_path: str, conn: Optional[sqlite3.Connection] = None) -> Tuple[bool, Dict[str, int]]:
     """
-    Get existing service_id or create new entry in service_details table.
-    Returns: (success, service_id, service_type)
+    Resolve service_ids for a batch of service names.
+    Loads service_details into a dict once and creates all missing services
+    in a single transaction, typed in one batch by the service classifier.
+    Returns: (success, {service_name: service_id})
     """
+    # A borrowed session connection is committed, rolled back and closed by its owner
+    own_conn = conn is None
     try:
-        conn = sqlite3.connect(db_path)
+        if own_conn:
+            conn = connect(db_path)
         cursor = conn.cursor()
         
-        # First try to get existing service
-        cursor.execute("""
-            SELECT service_id, service_type 
-            FROM service_details 
-            WHERE service_name = ?
-        """, (service_name,))
+        # Load the whole dimension once
+        cursor.execute("SELECT service_name, service_id FROM service_details")
+        service_ids = dict(cursor.fetchall())
         
-        result = cursor.fetchone()
+        # Work out which names are new, keeping first-seen order for stable IDs
+        missing = [name for name in dict.fromkeys(service_names) if name not in service_ids]
         
-        if result:
-            # Service exists, return its details
-            service_id, service_type = result
-            conn.close()
-            return True, service_id, service_type
+        if missing:
+            cursor.execute("SELECT MAX(service_id) FROM service_details")
+            max_id = cursor.fetchone()[0] or 0
             
-        # Service doesn't exist, create new entry
-        # First get the max service_id
-        cursor.execute("SELECT MAX(service_id) FROM service_details")
-        max_id = cursor.fetchone()[0]
-        new_service_id = 1 if max_id is None else max_id + 1
-        
-        # Determine service type using AI categorization
-        service_type = categorize_service(service_name)
-        
-        # Insert new service
-        cursor.execute("""
-            INSERT INTO service_details (service_id, service_name, service_type)
-            VALUES (?, ?, ?)
-        """, (new_service_id, service_name, service_type))
-        
-        conn.commit()
-        conn.close()
+            # Type every new name in one batch with the shared TF-IDF classifier
+            service_types = load_classifier(db_path, cursor).classify(missing)
+            new_rows = []
+            for offset, (service_name, service_type) in enumerate(zip(missing, service_types), start=1):
+                new_service_id = max_id + offset
+                new_rows.append((new_service_id, service_name, service_type))
+                service_ids[service_name] = new_service_id
+            
+            cursor.executemany("""
+                INSERT INTO service_details (service_id, service_name, service_type)
+                VALUES (?, ?, ?)
+            """, new_rows)
+            # Extend the cached classifier instead of refitting on the next load
+            record_new_services(db_path, missing, service_types, cursor)
+            if own_conn:
+                conn.commit()
+            print(f"Added {len(new_rows)} new services to service_details")
         
-        return True, new_service_id, service_type
+        return True, service_ids
         
     except Exception as e:
-        print(f"Error in get_or_create_service_id: {str(e)}")
-        return False, -1, ""
-
-def categorize_service(service_name: str) -> str:
-    """
-    Categorize service into one of the predefined types.
-    This is a simplified version - you may want to use more sophisticated AI categorization.
-    """
-    service_name = service_name.lower()
-    
-    # Define service categories and their keywords
-    categories = {
-        'Compute': ['ec2', 'lambda', 'fargate', 'compute', 'instance'],
-        'Storage': ['s3', 'ebs', 'storage', 'glacier', 'efs'],
-        'Database': ['rds', 'dynamodb', 'database', 'redshift', 'elasticache'],
-        'Network': ['vpc', 'route53', 'cloudfront', 'network', 'direct connect'],
-        'Security': ['iam', 'kms', 'security', 'waf', 'shield'],
-        'Analytics': ['athena', 'quicksight', 'analytics', 'emr', 'kinesis'],
-        'Management': ['cloudwatch', 'cloudtrail', 'management', 'config', 'organizations'],
-        'Integration': ['sns', 'sqs', 'api gateway', 'integration', 'eventbridge'],
-        'Developer Tools': ['codebuild', 'codepipeline', 'developer', 'tools', 'x-ray'],
-        'Other': []  # Default category
-    }
-    
-    # Check each category's keywords
-    for category, keywords in categories.items():
-        if any(keyword in service_name for keyword in keywords):
-            return category
-            
-    return 'Other'  # Default category if no match found
+        print(f"Error in resolve_service_ids: {str(e)}")
+        return False, {}
+    finally:
+        if own_conn and conn:
+            conn.close()
 
-def update_service_details_in_df(df: pd.DataFrame, db_path: str) -> Tuple[bool, pd.DataFrame]:
+def update_service_details_in_df(df: pd.DataFrame, db_path: str, conn: Optional[sqlite3.Connection] = None) -> Tuple[bool, pd.DataFrame]:
     """
     Update DataFrame with service_ids from service_details table.
     Returns: (success, updated_df)
@@ -87,20 +65,15 @@ def update_service_details_in_df(df: pd.DataFrame, db_path: str) -> Tuple[bool,
         # Create a copy of the DataFrame
         df_updated = df.copy()
         
-        # Add service_id column if it doesn't exist
-        if 'service_id' not in df_updated.columns:
-            df_updated['service_id'] = None
-            
-        # Process each unique service name
-        for service_name in df_updated['service_name'].unique():
-            success, service_id, _ = get_or_create_service_id(service_name, db_path)
-            if not success:
-                print(f"Failed to get/create service_id for {service_name}")
-                return False, df
-                
-            # Update service_id in DataFrame
-            df_updated.loc[df_updated['service_name'] == service_name, 'service_id'] = service_id
-            
+        # Resolve every unique service name in one pass
+        success, service_ids = resolve_service_ids(df_updated['service_name'].unique(), db_path, conn)
+        if not success:
+            print("Failed to get/create service_ids")
+            return False, df
+        
+        # Map service_id onto the frame in a single vectorized step
+        df_updated['service_id'] = df_updated['service_name'].map(service_ids)
+        
         return True, df_updated
         
     except Exception as e:
@@ -1,103 +1,27 @@
 import sqlite3
+import time
 import pandas as pd
 from datetime import datetime
 import numpy as np
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
+from db_session import connect
+from audit_spend import find_daily_discrepancies, find_monthly_discrepancies, save_discrepancies
+from update_service_details import resolve_service_ids
+from ingest_ledger import record_new_accounts
+from spend_schema import text_values, date_strings
+from spend_cube import refresh_cube
 
-def get_service_type(service_name, db_path):
-    """Determine service type using AI-based categorization."""
-    try:
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
-        
-        # Get existing service mappings
-        cursor.execute("SELECT service_name, service_type FROM service_details")
-        existing_services = cursor.fetchall()
-        
-        if not existing_services:
-            return 'Others'
-        
-        # Create TF-IDF vectors
-        vectorizer = TfidfVectorizer()
-        service_names = [s[0] for s in existing_services]
-        service_names.append(service_name)
-        tfidf_matrix = vectorizer.fit_transform(service_names)
-        
-        # Calculate similarity with existing services
-        similarities = cosine_similarity(tfidf_matrix[-1:], tfidf_matrix[:-1])[0]
-        most_similar_idx = np.argmax(similarities)
-        
-        if similarities[most_similar_idx] > 0.3:  # Threshold for similarity
-            return existing_services[most_similar_idx][1]
-        
-        # If no good match, use keyword-based categorization
-        service_name_lower = service_name.lower()
-        if any(word in service_name_lower for word in ['ec2', 'lambda', 'compute', 'server']):
-            return 'Compute'
-        elif any(word in service_name_lower for word in ['s3', 'storage', 'backup']):
-            return 'Storage'
-        elif any(word in service_name_lower for word in ['vpc', 'network', 'route', 'dns']):
-            return 'Network'
-        elif any(word in service_name_lower for word in ['iops', 'throughput']):
-            return 'IOPS'
-        elif any(word in service_name_lower for word in ['rds', 'dynamodb', 'database']):
-            return 'DB'
-        elif any(word in service_name_lower for word in ['ml', 'ai', 'sagemaker', 'comprehend']):
-            return 'AI'
-        
-        return 'Others'
-        
-    except Exception as e:
-        print(f"Error in service type determination: {str(e)}")
-        return 'Others'
-    finally:
-        conn.close()
-
-def get_next_service_id(db_path):
-    """Get next available service_id."""
-    try:
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
-        cursor.execute("SELECT MAX(service_id) FROM service_details")
-        max_id = cursor.fetchone()[0]
-        return (max_id or 0) + 1
-    finally:
-        conn.close()
-
-def get_service_id(service_name, db_path):
-    """Get or create service_id for a service_name."""
-    try:
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
-        
-        # Check if service exists
-        cursor.execute("SELECT service_id FROM service_details WHERE service_name = ?", (service_name,))
-        result = cursor.fetchone()
-        
-        if result:
-            return result[0]
-        
-        # Create new service
-        service_id = get_next_service_id(db_path)
-        service_type = get_service_type(service_name, db_path)
-        
-        cursor.execute("""
-            INSERT INTO service_details (service_id, service_name, service_type)
-            VALUES (?, ?, ?)
-        """, (service_id, service_name, service_type))
-        
-        conn.commit()
-        return service_id
-        
-    finally:
-        conn.close()
-
-def update_monthly_spend(df, db_path):
+def update_monthly_spend(df, db_path, conn=None):
     """Update monthly spend table."""
+    # A borrowed session connection is committed, rolled back and closed by its owner
+    own_conn = conn is None
     try:
-        conn = sqlite3.connect(db_path)
+        if own_conn:
+            conn = connect(db_path)
         cursor = conn.cursor()
+        # Plain column arrays straight from the compact frame, bound with executemany
+        account_ids = text_values(df['account_id'])
+        months = date_strings(df['month'], 'month')
+        spends = pd.to_numeric(df['spend'], errors='coerce').fillna(0).astype(float).to_numpy()
         
         # Get existing accounts from account_details
         cursor.execute("SELECT account_id FROM account_details")
@@ -108,284 +32,284 @@ def update_monthly_spend(df, db_path):
         aop_accounts = {row[0] for row in cursor.fetchall()}
         
         # Track new accounts and their status
-        new_accounts = []
-        unique_accounts = df[['account_id', 'account_name']].drop_duplicates()
-        
-        for _, row in unique_accounts.iterrows():
-            account_id = row['account_id']
-            account_name = row['account_name']
-            
-            # Check if this is a new account
-            is_new = account_id not in existing_accounts
-            has_aop = account_id in aop_accounts
-            
-            if is_new:
-                new_accounts.append({
-                    'account_id': account_id,
-                    'account_name': account_name,
-                    'has_aop': has_aop
-                })
-            
-            # Update account_details table
-            cursor.execute("""
-                INSERT OR REPLACE INTO account_details
-                (account_id, account_name, hod_id)
-                VALUES (?, ?, ?)
-            """, (account_id, account_name, '00000001'))
-        
-        # Save new accounts info to CSV if any found
+        unique_accounts = pd.DataFrame({
+            'account_id': account_ids,
+            'account_name': text_values(df['account_name']),
+        }).drop_duplicates()
+        new_accounts = [{
+            'account_id': account_id,
+            'account_name': account_name,
+            'has_aop': account_id in aop_accounts
+        } for account_id, account_name in zip(unique_accounts['account_id'], unique_accounts['account_name'])
+          if account_id not in existing_accounts]
+        
+        # Update account_details table
+        cursor.executemany("""
+            INSERT OR REPLACE INTO account_details
+            (account_id, account_name, hod_id)
+            VALUES (?, ?, '00000001')
+        """, zip(unique_accounts['account_id'].tolist(), unique_accounts['account_name'].tolist()))
+        
+        # Record new accounts in the ingestion ledger
         if new_accounts:
-            new_accounts_df = pd.DataFrame(new_accounts)
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            output_file = f'new_accounts_{timestamp}.csv'
-            new_accounts_df.to_csv(output_file, index=False)
-            print(f"\nNew accounts found and saved to {output_file}:")
-            print(new_accounts_df.to_string())
+            record_new_accounts(conn, new_accounts)
+            print(f"\nNew accounts found and recorded in the ingestion ledger:")
+            print(pd.DataFrame(new_accounts).to_string())
         
         # Then update monthly spend table (without account_name)
-        for _, row in df.iterrows():
-            cursor.execute("""
-                INSERT OR REPLACE INTO as_acct_monthly
-                (account_id, month, spend)
-                VALUES (?, ?, ?)
-            """, (row['account_id'], row['month'], row['spend']))
+        cursor.executemany("""
+            INSERT OR REPLACE INTO as_acct_monthly
+            (account_id, month, spend)
+            VALUES (?, ?, ?)
+        """, zip(account_ids.tolist(), months.tolist(), spends.tolist()))
         
-        conn.commit()
+        # Rebuild the spend vs AOP partitions of this file
+        refresh_cube(conn, zip(account_ids.tolist(), months.tolist()))
+        
+        if own_conn:
+            conn.commit()
         return True
         
     except Exception as e:
         print(f"Error updating monthly spend: {str(e)}")
         return False
     finally:
-        conn.close()
+        if own_conn and conn:
+            conn.close()
+
+# Number of rows handed to a single executemany call
+DAILY_SPEND_CHUNK_SIZE = 50000
+
+def bulk_upsert_daily_spend(conn, df, chunk_size=DAILY_SPEND_CHUNK_SIZE):
+    """
+    Write daily spend rows into as_acct_service_daily using chunked executemany.
+    Rows are upserted on UNIQUE(account_id, day, service_id) with INSERT OR REPLACE.
+    The caller owns the transaction and is responsible for committing.
+    Args:
+        conn (sqlite3.Connection): Open database connection
+        df (pd.DataFrame): Frame with account_id, day, spend and service_id columns
+        chunk_size (int): Number of rows per executemany call
+    Returns:
+        int: Number of rows written
+    """
+    # Pull plain column arrays once instead of building a Series per row
+    account_ids = text_values(df['account_id'])
+    days = date_strings(df['day'], 'day')
+    spends = pd.to_numeric(df['spend'], errors='coerce').fillna(0).astype(float).to_numpy()
+    service_ids = df['service_id'].astype('int64').to_numpy()
+    
+    total_rows = len(df)
+    start_time = time.perf_counter()
+    cursor = conn.cursor()
+    for start in range(0, total_rows, chunk_size):
+        end = start + chunk_size
+        # tolist() converts numpy scalars to Python types sqlite3 can bind
+        cursor.executemany("""
+            INSERT OR REPLACE INTO as_acct_service_daily
+            (account_id, day, spend, service_id)
+            VALUES (?, ?, ?, ?)
+        """, zip(account_ids[start:end].tolist(), days[start:end].tolist(),
+                 spends[start:end].tolist(), service_ids[start:end].tolist()))
+    
+    elapsed = time.perf_counter() - start_time
+    rows_per_sec = total_rows / elapsed if elapsed > 0 else float('inf')
+    print(f"Wrote {total_rows} daily spend rows in {elapsed:.2f}s ({rows_per_sec:,.0f} rows/sec)")
+    return total_rows
+
+def bulk_upsert_service_monthly_spend(conn, df, chunk_size=DAILY_SPEND_CHUNK_SIZE):
+    """
+    Write service monthly spend rows into as_acct_service_monthly using chunked executemany,
+    upserting on UNIQUE(account_id, month, service_id). The caller commits.
+    Returns:
+        int: Number of rows written
+    """
+    account_ids = text_values(df['account_id'])
+    months = date_strings(df['month'], 'month')
+    spends = pd.to_numeric(df['spend'], errors='coerce').fillna(0).astype(float).to_numpy()
+    service_ids = df['service_id'].astype('int64').to_numpy()
+    
+    cursor = conn.cursor()
+    for start in range(0, len(df), chunk_size):
+        end = start + chunk_size
+        cursor.executemany("""
+            INSERT OR REPLACE INTO as_acct_service_monthly
+            (account_id, month, spend, service_id)
+            VALUES (?, ?, ?, ?)
+        """, zip(account_ids[start:end].tolist(), months[start:end].tolist(),
+                 spends[start:end].tolist(), service_ids[start:end].tolist()))
+    return len(df)
 
-def update_daily_spend(df, db_path):
-    """Update daily spend table."""
+def update_daily_spend(df, db_path, conn=None):
+    """Update daily spend table and cascade updates to the monthly tables."""
+    # A borrowed session connection is committed, rolled back and closed by its owner
+    own_conn = conn is None
     try:
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
-        
-        # First, ensure all services exist in service_details table
-        unique_services = df['service_name'].unique()
-        for service_name in unique_services:
-            # This will create the service if it doesn't exist
-            get_service_id(service_name, db_path)
+        if own_conn:
+            conn = connect(db_path)
         
-        # Now get service IDs for each service
-        df['service_id'] = df['service_name'].apply(lambda x: get_service_id(x, db_path))
+        # Resolve every unique service in one pass; new ones are typed in one batch
+        success, service_ids = resolve_service_ids(df['service_name'].unique(), db_path, conn)
+        if not success:
+            print("Error: Failed to resolve service IDs")
+            return False
+        df['service_id'] = df['service_name'].map(service_ids)
         
         # Verify all services have valid IDs
         if df['service_id'].isna().any():
             print("Error: Some services could not be mapped to service IDs")
             return False
         
-        for _, row in df.iterrows():
-            cursor.execute("""
-                INSERT OR REPLACE INTO as_acct_service_daily
-                (account_id, day, spend, service_id)
-                VALUES (?, ?, ?, ?)
-            """, (row['account_id'], row['day'], row['spend'], row['service_id']))
+        # All chunks go into one transaction
+        bulk_upsert_daily_spend(conn, df)
         
-        conn.commit()
+        # Roll up inside SQLite, limited to the (account, month) keys in this batch
+        stage_touched_months(conn, df)
+        cascade_daily_spend(conn)
+        
+        if own_conn:
+            conn.commit()
         return True
         
     except Exception as e:
         print(f"Error updating daily spend: {str(e)}")
         return False
     finally:
-        conn.close()
+        if own_conn and conn:
+            conn.close()
 
-def update_service_daily_spend(df, db_path):
-    """Update service daily spend and cascade updates to monthly tables."""
-    try:
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
-        
-        # Get unique months from the input data
-        df['month'] = pd.to_datetime(df['day']).dt.strftime('%Y-%m')
-        unique_months = df['month'].unique()
-        
-        # First update service daily table
-        for _, row in df.iterrows():
-            cursor.execute("""
-                INSERT OR REPLACE INTO as_acct_service_daily
-                (account_id, service_name, day, spend)
-                VALUES (?, ?, ?, ?)
-            """, (row['account_id'], row['service_name'], row['day'], row['spend']))
-        
-        # Get service IDs for each service
-        df['service_id'] = df['service_name'].apply(lambda x: get_service_id(x, db_path))
-        
-        # Roll up to service monthly level
-        service_monthly_data = df.groupby(['account_id', 'service_id', 'month'])['spend'].sum().reset_index()
-        
-        # Update service monthly table
-        for _, row in service_monthly_data.iterrows():
-            cursor.execute("""
-                INSERT OR REPLACE INTO as_acct_service_monthly
-                (account_id, month, spend, service_id)
-                VALUES (?, ?, ?, ?)
-            """, (row['account_id'], row['month'], row['spend'], row['service_id']))
-        
-        # Roll up to account monthly level
-        account_monthly_data = df.groupby(['account_id', 'month'])['spend'].sum().reset_index()
-        
-        # Update account monthly table
-        for _, row in account_monthly_data.iterrows():
-            cursor.execute("""
-                INSERT OR REPLACE INTO as_acct_monthly
-                (account_id, month, spend)
-                VALUES (?, ?, ?)
-            """, (row['account_id'], row['month'], row['spend']))
-        
-        # Validate summaries
-        discrepancies = []
-        
-        # Check service monthly summaries
-        for month in unique_months:
-            # Get service monthly data from daily rollup
-            cursor.execute("""
-                SELECT account_id, service_id, SUM(spend) as daily_sum
-                FROM as_acct_service_daily
-                WHERE month = ?
-                GROUP BY account_id, service_id
-            """, (month,))
-            daily_rollup = {f"{row[0]}_{row[1]}": row[2] for row in cursor.fetchall()}
-            
-            # Get service monthly data directly
-            cursor.execute("""
-                SELECT account_id, service_id, spend
-                FROM as_acct_service_monthly
-                WHERE month = ?
-            """, (month,))
-            monthly_data = {f"{row[0]}_{row[1]}": row[2] for row in cursor.fetchall()}
-            
-            # Compare and record discrepancies
-            for key in set(daily_rollup.keys()) | set(monthly_data.keys()):
-                daily_sum = daily_rollup.get(key, 0)
-                monthly_sum = monthly_data.get(key, 0)
-                if not np.isclose(daily_sum, monthly_sum, rtol=1e-5):
-                    account_id, service_id = key.split('_')
-                    discrepancies.append({
-                        'month': month,
-                        'account_id': account_id,
-                        'service_id': service_id,
-                        'daily_sum': daily_sum,
-                        'monthly_sum': monthly_sum,
-                        'difference': daily_sum - monthly_sum
-                    })
-        
-        # Save discrepancies to CSV if any found
-        if discrepancies:
-            discrepancies_df = pd.DataFrame(discrepancies)
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            output_file = f'spend_discrepancies_{timestamp}.csv'
-            discrepancies_df.to_csv(output_file, index=False)
-            print(f"\nDiscrepancies found and saved to {output_file}:")
-            print(discrepancies_df.to_string())
-        
-        conn.commit()
-        return True
-        
-    except Exception as e:
-        print(f"Error updating service daily spend: {str(e)}")
-        return False
-    finally:
-        conn.close()
+def stage_touched_months(conn, df, reset=True):
+    """
+    Load the distinct (account_id, month) keys of a batch into the temp table
+    touched_months, so rollups only recompute those partitions.
+    Daily frames are keyed by the month of each day. With reset=False the keys
+    are added to those already staged, e.g. for the chunks of one streamed file.
+    Returns:
+        int: Number of keys staged by this call
+    """
+    cursor = conn.cursor()
+    cursor.execute("CREATE TEMP TABLE IF NOT EXISTS touched_months (account_id TEXT NOT NULL, month DATE NOT NULL, PRIMARY KEY (account_id, month))")
+    if reset:
+        cursor.execute("DELETE FROM touched_months")
+    if 'day' in df.columns:
+        keys = df[['account_id', 'day']].drop_duplicates()
+        months = pd.Series(date_strings(keys['day'], 'day')).str[:8] + '01'
+    else:
+        keys = df[['account_id', 'month']].drop_duplicates()
+        months = pd.Series(date_strings(keys['month'], 'month'))
+    keys = pd.DataFrame({'account_id': text_values(keys['account_id']), 'month': months.to_numpy()}).drop_duplicates()
+    cursor.executemany("INSERT OR IGNORE INTO touched_months (account_id, month) VALUES (?, ?)",
+                       zip(keys['account_id'].tolist(), keys['month'].tolist()))
+    return len(keys)
+
+def rollup_daily_to_service_monthly(conn):
+    """Recompute as_acct_service_monthly from as_acct_service_daily for the touched months."""
+    # Range on day uses the (account_id, day, service_id) key, so cost follows the
+    # touched partitions rather than the size of the daily history
+    cursor = conn.cursor()
+    cursor.execute("""
+        INSERT OR REPLACE INTO as_acct_service_monthly (account_id, month, spend, service_id)
+        SELECT d.account_id, t.month, SUM(d.spend), d.service_id
+        FROM touched_months t
+        JOIN as_acct_service_daily d
+          ON d.account_id = t.account_id
+         AND d.day >= t.month AND d.day < date(t.month, '+1 month')
+        GROUP BY d.account_id, t.month, d.service_id
+    """)
+    return cursor.rowcount
+
+def rollup_service_monthly_to_account_monthly(conn):
+    """Recompute as_acct_monthly from as_acct_service_monthly for the touched months."""
+    cursor = conn.cursor()
+    cursor.execute("""
+        INSERT OR REPLACE INTO as_acct_monthly (account_id, month, spend)
+        SELECT s.account_id, s.month, SUM(s.spend)
+        FROM touched_months t
+        JOIN as_acct_service_monthly s
+          ON s.account_id = t.account_id AND s.month = t.month
+        GROUP BY s.account_id, s.month
+    """)
+    return cursor.rowcount
+
+def cascade_daily_spend(conn):
+    """
+    Recompute as_acct_service_monthly and as_acct_monthly for the staged
+    touched_months, check them against the daily rows and refresh the matching
+    spend vs AOP partitions. Every daily writer calls this after its upsert.
+    The caller commits.
+    """
+    # Full month totals come from the daily table, not just the incoming rows
+    start_time = time.perf_counter()
+    service_rows = rollup_daily_to_service_monthly(conn)
+    account_rows = rollup_service_monthly_to_account_monthly(conn)
+    touched = conn.execute("SELECT COUNT(*) FROM touched_months").fetchone()[0]
+    print(f"Rolled up {touched} account-months ({service_rows} service rows, "
+          f"{account_rows} account rows) in {time.perf_counter() - start_time:.2f}s")
+    
+    # Validate summaries for every touched month in one set-based query
+    save_discrepancies(find_daily_discrepancies(conn))
+    
+    # Rebuild the spend vs AOP partitions of the touched months
+    refresh_cube(conn, 'touched_months')
+
+def cascade_service_monthly_spend(conn):
+    """
+    Recompute as_acct_monthly for the staged touched_months, check it against
+    the service monthly rows and refresh the matching spend vs AOP partitions.
+    The caller commits.
+    """
+    # Services not in this batch still count towards the account total
+    start_time = time.perf_counter()
+    account_rows = rollup_service_monthly_to_account_monthly(conn)
+    print(f"Rolled up {account_rows} account-months in {time.perf_counter() - start_time:.2f}s")
+    
+    # Validate summaries for every touched month in one set-based query
+    save_discrepancies(find_monthly_discrepancies(conn))
+    
+    # Rebuild the spend vs AOP partitions of the touched months
+    refresh_cube(conn, 'touched_months')
 
-def update_service_monthly_spend(df, db_path):
+def update_service_monthly_spend(df, db_path, conn=None):
     """Update service monthly spend and cascade updates to account monthly table."""
+    # A borrowed session connection is committed, rolled back and closed by its owner
+    own_conn = conn is None
     try:
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
-        
-        # Get unique months from the input data
-        unique_months = df['month'].unique()
+        if own_conn:
+            conn = connect(db_path)
         
-        # Get service IDs for each service
-        df['service_id'] = df['service_name'].apply(lambda x: get_service_id(x, db_path))
+        # Resolve every unique service in one pass; new ones are typed in one batch
+        success, service_ids = resolve_service_ids(df['service_name'].unique(), db_path, conn)
+        if not success:
+            print("Error: Failed to resolve service IDs")
+            return False
+        df['service_id'] = df['service_name'].map(service_ids)
         
         # Update service monthly table
-        for _, row in df.iterrows():
-            cursor.execute("""
-                INSERT OR REPLACE INTO as_acct_service_monthly
-                (account_id, month, spend, service_id)
-                VALUES (?, ?, ?, ?)
-            """, (row['account_id'], row['month'], row['spend'], row['service_id']))
-        
-        # Roll up to account monthly level
-        account_monthly_data = df.groupby(['account_id', 'month'])['spend'].sum().reset_index()
-        
-        # Update account monthly table
-        for _, row in account_monthly_data.iterrows():
-            cursor.execute("""
-                INSERT OR REPLACE INTO as_acct_monthly
-                (account_id, month, spend)
-                VALUES (?, ?, ?)
-            """, (row['account_id'], row['month'], row['spend']))
-        
-        # Validate summaries
-        discrepancies = []
-        
-        # Check account monthly summaries
-        for month in unique_months:
-            # Get account monthly data from service monthly rollup
-            cursor.execute("""
-                SELECT account_id, SUM(spend) as service_sum
-                FROM as_acct_service_monthly
-                WHERE month = ?
-                GROUP BY account_id
-            """, (month,))
-            service_rollup = {row[0]: row[1] for row in cursor.fetchall()}
-            
-            # Get account monthly data directly
-            cursor.execute("""
-                SELECT account_id, spend
-                FROM as_acct_monthly
-                WHERE month = ?
-            """, (month,))
-            monthly_data = {row[0]: row[1] for row in cursor.fetchall()}
-            
-            # Compare and record discrepancies
-            for account_id in set(service_rollup.keys()) | set(monthly_data.keys()):
-                service_sum = service_rollup.get(account_id, 0)
-                monthly_sum = monthly_data.get(account_id, 0)
-                if not np.isclose(service_sum, monthly_sum, rtol=1e-5):
-                    discrepancies.append({
-                        'month': month,
-                        'account_id': account_id,
-                        'service_sum': service_sum,
-                        'monthly_sum': monthly_sum,
-                        'difference': service_sum - monthly_sum
-                    })
+        bulk_upsert_service_monthly_spend(conn, df)
         
-        # Save discrepancies to CSV if any found
-        if discrepancies:
-            discrepancies_df = pd.DataFrame(discrepancies)
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            output_file = f'spend_discrepancies_{timestamp}.csv'
-            discrepancies_df.to_csv(output_file, index=False)
-            print(f"\nDiscrepancies found and saved to {output_file}:")
-            print(discrepancies_df.to_string())
+        # Roll up inside SQLite, limited to the (account, month) keys in this batch
+        stage_touched_months(conn, df)
+        cascade_service_monthly_spend(conn)
         
-        conn.commit()
+        if own_conn:
+            conn.commit()
         return True
         
     except Exception as e:
         print(f"Error updating service monthly spend: {str(e)}")
         return False
     finally:
-        conn.close()
+        if own_conn and conn:
+            conn.close()
 
-def update_spend_data(df, file_type, db_path):
+def update_spend_data(df, file_type, db_path, conn=None):
     """Main function to update spend data in database."""
     try:
         if file_type == 1:  # Daily spend
-            return update_daily_spend(df, db_path)
+            return update_daily_spend(df, db_path, conn)
         elif file_type == 2:  # Service monthly spend
-            return update_service_monthly_spend(df, db_path)
+            return update_service_monthly_spend(df, db_path, conn)
         else:  # Monthly spend
-            return update_monthly_spend(df, db_path)
+            return update_monthly_spend(df, db_path, conn)
             
     except Exception as e:
         print(f"Error updating spend data: {str(e)}")
@@ -2,6 +2,11 @@ import pandas as pd
 import numpy as np
 import re
 import traceback
+from spend_schema import key_strings, date_strings
+from account_ids import normalize_account_ids, is_account_id
+
+# Allowed absolute difference between expected and transformed spend
+SPEND_TOLERANCE = 0.01
 
 def extract_account_details_from_filename(filename):
     """Extract account name and ID from filename."""
@@ -24,7 +29,11 @@ def extract_account_details_from_filename(filename):
         return None, None
 
 def validate_pre_transpose(df, file_type, filename=None):
-    """Validate data before transformation."""
+    """
+    Validate data before transformation.
+    For account monthly files (file_type 3) account_totals is a Series indexed by
+    (account_id, month) and month_totals a Series indexed by month.
+    """
     try:
         # Convert all null/NaN values to 0 first
         df = df.fillna(0)
@@ -47,63 +56,42 @@ def validate_pre_transpose(df, file_type, filename=None):
                 print("[ERROR] DataFrame does not have enough columns after removing total rows.")
                 return False, "Not enough columns after removing total rows", {}, {}
             
-            # Calculate column sums (account_id-wise totals)
+            # Pull the whole sheet into one object matrix once
+            raw = df.to_numpy(dtype=object)
+            
+            # Spend block: date rows x account columns (exclude first and last columns)
             try:
-                col_sums = df.iloc[2:, 1:-1].astype(float).sum()  # Exclude last column
+                spend = raw[2:, 1:-1].astype(np.float64)
             except Exception as e:
                 print(f"[ERROR] Failed to calculate column sums: {e}")
                 print(df.iloc[2:, 1:-1].head())
                 return False, f"Failed to calculate column sums: {e}", {}, {}
             
-            # Store account-wise monthly totals for post-validation
-            account_totals = {}
-            month_totals = {}
+            # Normalize account IDs the same way the transform does; only 12-digit IDs count
+            account_ids = normalize_account_ids(raw[0, 1:-1])
+            valid = is_account_id(account_ids).to_numpy()
+            # Canonical ISO month keys, as the transform emits them
+            dates = date_strings(raw[2:, 0], 'month')
             
-            # Debug: Print DataFrame shape and column count
-            # print(f"[DEBUG] Processing DataFrame with shape: {df.shape}")
-            # print(f"[DEBUG] Number of columns to process: {len(df.columns)-2}")
+            # Only positive spend counts towards the totals
+            positive_spend = np.where(spend > 0, spend, 0.0)[:, valid]
             
-            for i in range(len(df.columns)-2):  # Exclude first and last columns
-                try:
-                    account_id = str(df.iloc[0, i+1]).strip()  # First row has account IDs
-                    account_name = str(df.iloc[1, i+1]).strip()  # Second row has account names
-                    # print(f"[DEBUG] Processing column {i+1}: account_id={account_id}, account_name={account_name}")
-                except Exception as e:
-                    print(f"[ERROR] Failed to access account_id/account_name at column {i+1}: {e}")
-                    continue
-                
-                if account_id and account_id != 'Total costs ($)':
-                    # Remove ($) from account name
-                    account_name = account_name.replace(' ($)', '')
-                    # Extract numeric part from account_id if it contains non-numeric characters
-                    account_id = ''.join(filter(str.isdigit, account_id))
-                    
-                    if len(account_id) == 12:  # Only store if account_id is valid
-                        account_totals[account_id] = {}
-                        for j, date in enumerate(df.iloc[2:, 0]):
-                            # Debug: Print current iteration details
-                            # print(f"[DEBUG] Processing row {j+2}, column {i+1}")
-                            # print(f"[DEBUG] DataFrame shape: {df.shape}")
-                            # print(f"[DEBUG] Current date: {date}")
-                            
-                            # Bounds check before accessing DataFrame
-                            if j+2 >= df.shape[0] or i+1 >= df.shape[1]:
-                                print(f"[ERROR] Index out of bounds: j+2={j+2}, i+1={i+1}, shape={df.shape}")
-                                continue
-                            
-                            try:
-                                spend = float(df.iloc[j+2, i+1])
-                                # print(f"[DEBUG] Retrieved spend value: {spend}")
-                            except Exception as e:
-                                print(f"[ERROR] Failed to access spend at row {j+2}, col {i+1}: {e}")
-                                continue
-                            
-                            if pd.notna(spend) and spend > 0:
-                                account_totals[account_id][str(date).strip()] = spend
-                                # Update month-wise totals
-                                if str(date).strip() not in month_totals:
-                                    month_totals[str(date).strip()] = 0
-                                month_totals[str(date).strip()] += spend
+            # Month totals: one reduction across the account axis
+            month_sums = positive_spend.sum(axis=1)
+            has_spend = (positive_spend > 0).any(axis=1)
+            month_totals = pd.Series(month_sums[has_spend], index=pd.Index(dates[has_spend], name='month'))
+            
+            # Account totals: (account_id, month) -> spend for every positive cell.
+            # If an account ID appears in several columns the last one wins.
+            valid_ids = account_ids.to_numpy()[valid]
+            keep = ~pd.Series(valid_ids).duplicated(keep='last').to_numpy()
+            acct_idx, date_idx = np.nonzero(positive_spend[:, keep].T > 0)
+            account_totals = pd.Series(
+                positive_spend[:, keep].T[acct_idx, date_idx],
+                index=pd.MultiIndex.from_arrays(
+                    [valid_ids[keep][acct_idx], dates[date_idx]], names=['account_id', 'month']
+                )
+            )
             
             return True, "Pre-transpose validation successful", account_totals, month_totals
                 
@@ -117,6 +105,9 @@ def validate_pre_transpose(df, file_type, filename=None):
                 account_id, _ = extract_account_details_from_filename(filename)
                 if account_id:
                     account_totals[account_id] = {}
+                    # Canonical ISO keys of the date/month columns, parsed once
+                    date_col = 'day' if file_type == 1 else 'month'
+                    date_keys = dict(zip(df.columns[3:], date_strings(df.columns[3:], date_col)))
                     # Group by service and date/month
                     for idx, row in df.iterrows():
                         if isinstance(row['service_name'], str):  # Skip total rows
@@ -132,7 +123,7 @@ def validate_pre_transpose(df, file_type, filename=None):
                                     print(f"[ERROR] Failed to access spend for service {service_name}, col {col}: {e}")
                                     continue
                                 if pd.notna(spend) and spend > 0:
-                                    account_totals[account_id][service_name][str(col).strip()] = spend
+                                    account_totals[account_id][service_name][date_keys[col]] = spend
             
             return True, "Pre-transpose validation successful", account_totals, {}
         
@@ -140,103 +131,128 @@ def validate_pre_transpose(df, file_type, filename=None):
         print(f"[ERROR] Exception in validate_pre_transpose: {e}")
         return False, f"Pre-transpose validation error: {str(e)}", {}, {}
 
+def validate_cost_explorer_file(df):
+    """
+    Validate a per-account Cost Explorer export against its own total row and column.
+    Returns: (is_valid, message, service_totals) where service_totals is a Series
+    of the 'Service total' row indexed by service column name.
+    """
+    try:
+        first_col = df.iloc[:, 0].astype(str).str.strip()
+        total_rows = df[first_col == 'Service total']
+        if total_rows.empty:
+            return False, "Missing 'Service total' row", None
+        
+        service_cols = [col for col in df.columns[1:] if col != 'Total costs($)']
+        values = df.loc[first_col != 'Service total', service_cols].apply(pd.to_numeric, errors='coerce').fillna(0.0)
+        service_totals = pd.to_numeric(total_rows.iloc[0][service_cols], errors='coerce').fillna(0.0)
+        
+        # Column sums must match the 'Service total' row
+        bad_cols = ~np.isclose(values.sum(axis=0).to_numpy(), service_totals.to_numpy(), rtol=1e-5, atol=SPEND_TOLERANCE)
+        if bad_cols.any():
+            return False, f"Service totals don't match for: {list(np.array(service_cols)[bad_cols])}", None
+        
+        # Row sums must match the 'Total costs($)' column when present
+        if 'Total costs($)' in df.columns:
+            row_totals = pd.to_numeric(df.loc[first_col != 'Service total', 'Total costs($)'], errors='coerce').fillna(0.0)
+            if not np.allclose(values.sum(axis=1).to_numpy(), row_totals.to_numpy(), rtol=1e-5, atol=SPEND_TOLERANCE):
+                return False, "Date totals don't match 'Total costs($)'", None
+        
+        return True, "Pre-transpose validation successful", service_totals
+        
+    except Exception as e:
+        print(f"[ERROR] Exception in validate_cost_explorer_file: {e}")
+        return False, f"Pre-transpose validation error: {str(e)}", None
+
+def validate_cost_explorer_transform(df, service_totals):
+    """Check the long frame adds back up to the 'Service total' row."""
+    try:
+        expected = service_totals.copy()
+        expected.index = expected.index.str.replace(r'\s*\(\$\)$', '', regex=True)
+        actual = df['spend'].groupby(key_strings(df, 'service_name')).sum().reindex(expected.index, fill_value=0.0)
+        bad = ~np.isclose(actual.to_numpy(), expected.to_numpy(), rtol=1e-5, atol=SPEND_TOLERANCE)
+        if bad.any():
+            return False, f"Service-wise total mismatch for: {list(expected.index[bad])}"
+        return True, "Post-transpose validation successful"
+        
+    except Exception as e:
+        print(f"[ERROR] Exception in validate_cost_explorer_transform: {e}")
+        return False, f"Post-transpose validation error: {str(e)}"
+
+def _compare_totals(expected, actual, keys, check):
+    """
+    Join expected totals against actual totals on keys and return the rows
+    that are missing or differ by more than SPEND_TOLERANCE.
+    """
+    merged = expected.merge(actual, on=keys, how='left', indicator=True)
+    missing = merged['_merge'] == 'left_only'
+    merged['difference'] = merged['actual'] - merged['expected']
+    mismatched = ~missing & (merged['difference'].abs() > SPEND_TOLERANCE)
+    
+    # Keys absent from the transformed data are reported but not treated as failures
+    for row in merged.loc[missing, keys].itertuples(index=False):
+        print(f"[WARNING] No data found for {dict(zip(keys, row))}")
+    
+    mismatches = merged.loc[mismatched, keys + ['expected', 'actual', 'difference']]
+    return mismatches.assign(check=check)
+
+def find_post_transpose_mismatches(df, file_type, pre_validation_data):
+    """
+    Compare the transformed frame against the pre-transpose totals in one join per check.
+    Returns:
+        pd.DataFrame: Every mismatch with its keys, expected, actual and difference
+    """
+    account_totals, month_totals = pre_validation_data
+    spend = pd.to_numeric(df['spend'], errors='coerce').fillna(0)
+    
+    if file_type == 3:  # Monthly spend
+        keys = ['account_id', 'month']
+        frame = pd.DataFrame({key: key_strings(df, key) for key in keys}, index=df.index).assign(spend=spend)
+        
+        # Account-wise totals: one groupby joined against every expected (account, month)
+        actual = frame.groupby(keys, sort=False)['spend'].sum().rename('actual').reset_index()
+        expected = account_totals.rename('expected').reset_index()
+        account_mismatches = _compare_totals(expected, actual, keys, 'account')
+        
+        # Month-wise totals
+        actual = frame.groupby('month', sort=False)['spend'].sum().rename('actual').reset_index()
+        expected = month_totals.rename('expected').reset_index()
+        month_mismatches = _compare_totals(expected, actual, ['month'], 'month')
+        
+        return pd.concat([account_mismatches, month_mismatches], ignore_index=True)
+    
+    # Daily or service monthly spend: flatten account -> service -> date into rows
+    date_col = 'day' if file_type == 1 else 'month'
+    keys = ['account_id', 'service_name', date_col]
+    expected = pd.DataFrame(
+        [(account_id, service_name, date, value)
+         for account_id, services in account_totals.items()
+         for service_name, dates in services.items()
+         for date, value in dates.items()],
+        columns=keys + ['expected']
+    )
+    frame = pd.DataFrame({key: key_strings(df, key) for key in keys}, index=df.index).assign(spend=spend)
+    actual = frame.groupby(keys, sort=False)['spend'].sum().rename('actual').reset_index()
+    return _compare_totals(expected, actual, keys, 'service')
+
 def validate_post_transpose(df, file_type, pre_validation_data=None):
     """Validate data after transformation."""
     try:
-        # print("[DEBUG] Entered validate_post_transpose")
-        # print(f"[DEBUG] DataFrame columns: {df.columns.tolist()}")
-        # print(f"[DEBUG] DataFrame shape: {df.shape}")
-        # print("[DEBUG] DataFrame head:")
-        # print(df.head())
-        if file_type == 3:  # Monthly spend
-            # print("[DEBUG] Starting post-transpose validation")
-            # print(f"[DEBUG] DataFrame shape: {df.shape}")
-            # print("[DEBUG] DataFrame preview:")
-            # print(df.head())
-            
-            if pre_validation_data is None:
-                print("[ERROR] Pre-validation data is required for post-transpose validation")
-                return False, "Pre-validation data is required for post-transpose validation"
-            
-            account_totals, month_totals = pre_validation_data
-            
-            # Validate account-wise totals
-            # print("[DEBUG] Validating account-wise totals")
-            for account_id in account_totals:
-                # print(f"[DEBUG] Processing account_id: {account_id}")
-                account_data = df[df['account_id'] == account_id]
-                if account_data.empty:
-                    print(f"[WARNING] No data found for account_id: {account_id}")
-                    continue
-                
-                for month, expected_spend in account_totals[account_id].items():
-                    # print(f"[DEBUG] Checking month: {str(month)}, expected spend: {expected_spend}")
-                    month_data = account_data[account_data['month'] == month]
-                    # print(f"[DEBUG] month_data for account_id={account_id}, month={str(month)}:")
-                    # print(month_data)
-                    if month_data.empty:
-                        print(f"[WARNING] No data found for month: {str(month)} for account_id: {account_id}")
-                        continue
-                    
-                    # Bounds check before accessing iloc[0]
-                    if len(month_data['spend']) == 0:
-                        print(f"[ERROR] month_data['spend'] is empty for account_id={account_id}, month={month}")
-                        continue
-                    actual_spend = float(month_data['spend'].iloc[0])  # Convert to float
-                    # print(f"[DEBUG] Actual spend: {actual_spend}")
-                    if abs(actual_spend - expected_spend) > 0.01:  # Allow for small floating point differences
-                        print(f"[ERROR] Mismatch for account {account_id}, month {str(month)}: expected {expected_spend}, got {actual_spend}")
-                        return False, f"Account-wise total mismatch for account {str(account_id)}, month {str(month)}"
-            
-            # Validate month-wise totals
-            # print("[DEBUG] Validating month-wise totals")
-            for month in month_totals:
-                # print(f"[DEBUG] Processing month: {str(month)}")
-                month_data = df[df['month'] == month]
-                if month_data.empty:
-                    print(f"[WARNING] No data found for month: {str(month)}")
-                    continue
-                
-                expected_total = month_totals[month]
-                # Ensure spend column is numeric before summing
-                spend_numeric = pd.to_numeric(month_data['spend'], errors='coerce')
-                actual_total = float(spend_numeric.sum())  # Convert to float
-                # print(f"[DEBUG] Month {str(month)}: expected total {expected_total}, actual total {actual_total}")
-                if abs(actual_total - expected_total) > 0.01:  # Allow for small floating point differences
-                    print(f"[ERROR] Mismatch for month {str(month)}: expected {expected_total}, got {actual_total}")
-                    return False, f"Month-wise total mismatch for month {str(month)}"
-            
-            return True, "Post-transpose validation successful"
-                
-        else:  # Daily or service monthly spend
-            if pre_validation_data is None:
-                return False, "Pre-validation data is required for post-transpose validation"
-            
-            account_totals, _ = pre_validation_data
-            
-            # Validate account and service-wise totals
-            for account_id in account_totals:
-                account_data = df[df['account_id'] == account_id]
-                if account_data.empty:
-                    continue
-                
-                for service_name, service_data in account_totals[account_id].items():
-                    service_rows = account_data[account_data['service_name'] == service_name]
-                    if service_rows.empty:
-                        continue
-                    
-                    for date, expected_spend in service_data.items():
-                        date_data = service_rows[service_rows['day' if file_type == 1 else 'month'] == date]
-                        if date_data.empty:
-                            continue
-                        
-                        actual_spend = float(date_data['spend'].iloc[0])  # Convert to float
-                        if abs(actual_spend - expected_spend) > 0.01:
-                            return False, f"Service-wise total mismatch for account {account_id}, service {service_name}, date {date}"
-            
-            return True, "Post-transpose validation successful"
+        if pre_validation_data is None:
+            print("[ERROR] Pre-validation data is required for post-transpose validation")
+            return False, "Pre-validation data is required for post-transpose validation"
+        
+        mismatches = find_post_transpose_mismatches(df, file_type, pre_validation_data)
+        if not mismatches.empty:
+            print(f"[ERROR] {len(mismatches)} spend mismatches after transpose:")
+            print(mismatches.to_string(index=False))
+            first = mismatches.iloc[0]
+            return False, (f"{len(mismatches)} total mismatches, first: {first['check']}-wise total "
+                           f"mismatch for {first.drop(['expected', 'actual', 'difference', 'check']).dropna().to_dict()}")
+        
+        return True, "Post-transpose validation successful"
             
     except Exception as e:
         print(f"[ERROR] Exception in validate_post_transpose: {e}")
         traceback.print_exc()
-        return False, f"Post-transpose validation error: {str(e)}" 
\ No newline at end of file
+        return False, f"Post-transpose validation error: {str(e)}"